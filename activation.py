@@ -1,12 +1,18 @@
 import mouse
 import time
+import threading
 from abc import abstractmethod
+from collections import deque
+from types import SimpleNamespace
 import keyboard
 
 class Activator:
     """
     Class used for activating the sequence capturing
     """
+    # Profiler counting the activation events, None when the profiling is disabled
+    profiler = None
+
     def __init__(self):
         self.active = False
     
@@ -21,6 +27,13 @@ class Activator:
     @abstractmethod
     def isActive(self):
         """Return True if an activation event is ongoing"""
+
+    def stateAt(self, timestamp = None):
+        """
+        Return (active, number of activations) at a monotonic timestamp in ns,
+        polling activators only know the current state and return None as the number of activations
+        """
+        return self.isActive(), None
     
     
     def waitUntilEvent(self):
@@ -35,27 +48,23 @@ class Activator:
     
     def waitForSeconds(self, seconds = 60):
         """
-        Sequence capture active for given number of seconds
+        Sequence capture active for given number of seconds, the timer belongs to the activator instance
+        and restarts on the call following the end of the period
         """
         self.active = True
-        if (not hasattr(Activator, 'start')) or (Activator.start == 0):  
-            Activator.start =  time.time()
-        if((time.time() - Activator.start) >= seconds):
+        now = time.monotonic_ns()
+        if not getattr(self, 'timerStart', None):
+            self.timerStart = now
+        if now - self.timerStart >= seconds * 1e9:
             self.active = False
-            Activator.start = 0
+            self.timerStart = None
         return self.active
     
     def waitForMinutes(self, minutes = 1):
         """
         Sequence capture active for given number of minutes
         """
-        self.active = True
-        if (not hasattr(Activator, 'start')) or (Activator.start == 0):  
-            Activator.start =  time.time()
-        if((time.time() - Activator.start) >= (minutes * 60)):
-            self.active = False
-            Activator.start = 0
-        return self.active
+        return self.waitForSeconds(minutes * 60)
     
     
 class mouseActivator(Activator):
@@ -94,3 +103,167 @@ class keyboardActivator(Activator):
         if event not in self.keys:
             raise ValueError(f"The {event} key is not supported please enter one of the following keys {self.keys}")
         self.event = event
+
+
+class SyntheticEventSource:
+    """
+    Event source replaying scripted input events through the same hook interface as the mouse and
+    keyboard modules, used to drive the event activators headless
+    """
+    def __init__(self):
+        self.callbacks = []
+
+    def hook(self, callback):
+        self.callbacks.append(callback)
+        return callback
+
+    def unhook(self, callback):
+        if callback in self.callbacks:
+            self.callbacks.remove(callback)
+
+    def emit(self, eventType, name):
+        """Send an event of type 'down' or 'up' for the key or mouse button name to the hooked callbacks"""
+        event = SimpleNamespace(event_type=eventType, name=name, button=name, time=time.time())
+        for callback in list(self.callbacks):
+            callback(event)
+
+    def press(self, name):
+        self.emit('down', name)
+
+    def release(self, name):
+        self.emit('up', name)
+
+
+class EventActivator(Activator):
+    """
+    Class used for activation events delivered by input hooks instead of polling,
+    the hooks are called on the listener thread of the input library and keep the
+    pressed state and a timestamped log of the press/release edges
+    """
+    def __init__(self, event, eventSource, logSize = 1024):
+        super().__init__()
+        self.event = event
+        self.eventSource = eventSource
+        self.pressed = False
+        self.pressCount = 0
+        # (monotonic timestamp in ns, pressed) of the latest edges
+        self.edges = deque(maxlen=logSize)
+        self.lock = threading.Lock()
+        self.hooked = False
+        # set by stop, the queries only hook the event source of an activator that was never stopped
+        self.stopped = False
+
+    def start(self):
+        """Subscribe to the event source"""
+        self.stopped = False
+        if not self.hooked:
+            self.eventSource.hook(self.onEvent)
+            self.hooked = True
+
+    def stop(self):
+        """Unsubscribe from the event source, the activator keeps its last state until start is called again"""
+        self.stopped = True
+        if self.hooked:
+            self.eventSource.unhook(self.onEvent)
+            self.hooked = False
+
+    def ensureStarted(self):
+        # the first query hooks the event source if start was not called, a stopped activator stays stopped
+        if not self.hooked and not self.stopped:
+            self.start()
+
+    @abstractmethod
+    def matches(self, event):
+        """Return True if the input event belongs to the activation event"""
+
+    def onEvent(self, event):
+        # take the timestamp first so the edge is as close as possible to the real input
+        timestamp = time.monotonic_ns()
+        # mouse.hook also delivers the move and wheel events, which have no event_type,
+        # and reports the second press of a double click as 'double' instead of 'down'
+        eventType = getattr(event, 'event_type', None)
+        if eventType not in ('down', 'double', 'up') or not self.matches(event):
+            return
+        pressed = eventType != 'up'
+        with self.lock:
+            # key repeats and duplicated events do not make an edge
+            if pressed == self.pressed:
+                return
+            self.pressed = pressed
+            if pressed:
+                self.pressCount += 1
+            self.edges.append((timestamp, pressed))
+        if self.profiler is not None:
+            self.profiler.count('activationPresses' if pressed else 'activationReleases')
+
+    def isActive(self):
+        self.ensureStarted()
+        return self.pressed
+
+    def stateAt(self, timestamp = None):
+        """
+        Return (active, number of presses) at a monotonic timestamp in ns, the edges that happened after
+        the timestamp are rolled back so a frame is assigned to the press it was captured in
+        """
+        self.ensureStarted()
+        rolledBack = 0
+        with self.lock:
+            pressed = self.pressed
+            pressCount = self.pressCount
+            if timestamp is not None:
+                for edgeTimestamp, edgePressed in reversed(self.edges):
+                    if edgeTimestamp <= timestamp:
+                        break
+                    pressed = not edgePressed
+                    if edgePressed:
+                        pressCount -= 1
+                    rolledBack += 1
+        # edges received after the frame was captured show how late the frames are read
+        if rolledBack and self.profiler is not None:
+            self.profiler.count('activationRollbacks', rolledBack)
+        return pressed, pressCount
+
+    def edgesBetween(self, start, stop):
+        """Return the (timestamp, pressed) edges with start < timestamp <= stop"""
+        with self.lock:
+            return [edge for edge in self.edges if start < edge[0] <= stop]
+
+
+class mouseEventActivator(EventActivator):
+    """
+    Class used for mouse activation events delivered by mouse.hook
+    """
+    def __init__(self, event = 'left', eventSource = None, logSize = 1024):
+        if event not in ['left', 'right']:
+            raise ValueError('The event have to be either left or right')
+        super().__init__(event, eventSource if eventSource else mouse, logSize)
+
+    def setEvent(self, event):
+        if event not in ['left', 'right']:
+            raise ValueError('The event have to be either left or right')
+        self.event = event
+
+    def matches(self, event):
+        return getattr(event, 'button', None) == self.event
+
+
+class keyboardEventActivator(EventActivator):
+    """
+    Class used for keyboard activation events delivered by keyboard.hook
+    """
+    def __init__(self, event = ' ', eventSource = None, logSize = 1024):
+        self.keys = ["q","w","e","r","t","y","u","i","o","p","a","s","d",
+                     "f","g","h","j","k","l","z","x","c","v","b","n","m"," "]
+        if event not in self.keys:
+            raise ValueError(f"The {event} key is not supported please enter one of the following keys {self.keys}")
+        super().__init__(event, eventSource if eventSource else keyboard, logSize)
+
+    def setEvent(self, event):
+        if event not in self.keys:
+            raise ValueError(f"The {event} key is not supported please enter one of the following keys {self.keys}")
+        self.event = event
+
+    def matches(self, event):
+        # the keyboard module names the space bar 'space'
+        name = getattr(event, 'name', None)
+        return name == self.event or (self.event == " " and name == 'space')
@@ -1,6 +1,8 @@
 import sys
 import Snap
 import cv2
+from frame_source import FrameSource
+from landmark_cache import LandmarkCache, draw_landmarks
 from PySide6.QtGui import QImage, QPixmap
 from PySide6.QtCore import QSize
 from PySide6.QtUiTools import QUiLoader
@@ -23,9 +25,12 @@ from PySide6.QtWidgets import (
 class PlayerController:
     def __init__(self, window):
         self.window = window
-        self.frames = []
+        self.source = None
+        self.landmarks = None
         self.playing = False
         self.timer = QTimer(window)
+        # refreshes the shown frame while the landmarks are being extracted
+        self.landmark_timer = QTimer(window)
 
         window.btnLoad.clicked.connect(self.load_video)
         window.btnPlay.clicked.connect(self.toggle_play)
@@ -34,6 +39,7 @@ class PlayerController:
         window.frameSlider.valueChanged.connect(self.on_slider)
 
         self.timer.timeout.connect(self.advance)
+        self.landmark_timer.timeout.connect(self.refresh_landmarks)
 
     def load_video(self):
         path, _ = QFileDialog.getOpenFileName(
@@ -42,24 +48,28 @@ class PlayerController:
         if not path:
             return
 
-        self.frames.clear()
-        cap = cv2.VideoCapture(path)
-
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            self.frames.append(frame)
-
-        cap.release()
-
-        self.window.frameSlider.setMaximum(len(self.frames) - 1)
+        if self.source:
+            self.source.close()
+        if self.landmarks:
+            self.landmarks.close()
+        # frames are decoded on demand so the first frame shows immediately whatever the video length
+        self.source = FrameSource(path)
+        # landmarks are extracted once in the background and reloaded from the cache next time
+        self.landmarks = LandmarkCache(path, len(self.source))
+        self.landmark_timer.start(500)
+
+        self.window.frameSlider.setMaximum(len(self.source) - 1)
         self.show_frame(0)
 
     def show_frame(self, idx):
-        if not self.frames:
+        if not self.source:
             return
-        frame = self.frames[idx]
+        frame = self.source.get(idx)
+        if frame is None:
+            return
+        landmarks = self.landmarks.get(idx) if self.landmarks else None
+        if landmarks is not None and len(landmarks):
+            frame = draw_landmarks(frame, landmarks)
         h, w, ch = frame.shape
 
         image = QImage(
@@ -67,25 +77,34 @@ class PlayerController:
         )
         pix = QPixmap.fromImage(image)
         self.window.frameLabel.setPixmap(pix)
-        self.window.lblFrameInfo.setText(f"{idx}/{len(self.frames)-1}")
+        info = f"{idx}/{len(self.source)-1}"
+        if self.landmarks and not self.landmarks.done:
+            info += f" (landmarks {self.landmarks.processed}/{len(self.source)})"
+        self.window.lblFrameInfo.setText(info)
+
+    def refresh_landmarks(self):
+        if not self.landmarks or self.landmarks.done:
+            self.landmark_timer.stop()
+        if not self.playing:
+            self.show_frame(self.window.frameSlider.value())
 
 
     # ---------------- CONTROLS ----------------
 
     def on_slider(self, val):
-        if self.frames:
+        if self.source:
             self.show_frame(val)
 
     def next_frame(self):
         v = self.window.frameSlider.value()
-        self.window.frameSlider.setValue(min(v + 1, len(self.frames) - 1))
+        self.window.frameSlider.setValue(min(v + 1, len(self.source) - 1))
 
     def prev_frame(self):
         v = self.window.frameSlider.value()
         self.window.frameSlider.setValue(max(v - 1, 0))
 
     def toggle_play(self):
-        if not self.frames:
+        if not self.source:
             return
         self.playing = not self.playing
         if self.playing:
@@ -97,7 +116,7 @@ class PlayerController:
 
     def advance(self):
         v = self.window.frameSlider.value()
-        if v < len(self.frames) - 1:
+        if v < len(self.source) - 1:
             self.window.frameSlider.setValue(v + 1)
         else:
             self.toggle_play()
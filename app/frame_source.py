@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+import cv2
+
+
+class FrameSource:
+    """
+    Seekable video frame source with an LRU cache of decoded frames bounded by a memory budget
+    and a background thread reading ahead in the current play direction
+    """
+    def __init__(self, path, memory_budget=512 * 1024 ** 2, read_ahead=32):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Can not open the video {path}")
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        self.memory_budget = memory_budget
+        self.read_ahead = read_ahead
+        self.cache = OrderedDict()
+        self.cache_bytes = 0
+        # position of the next frame the decoder returns without seeking
+        self.decoder_position = 0
+        self.last_index = 0
+        self.direction = 1
+        self.lock = threading.Lock()
+        self.condition = threading.Condition()
+        self.request = None
+        self.closed = False
+        self.thread = threading.Thread(target=self._read_ahead_loop, name='frame-read-ahead', daemon=True)
+        self.thread.start()
+
+    def __len__(self):
+        return self.frame_count
+
+    def get(self, idx):
+        """Return the BGR frame idx, decoding it if it is not cached, None if it can not be read"""
+        if idx < 0 or idx >= self.frame_count:
+            return None
+        if idx != self.last_index:
+            self.direction = 1 if idx > self.last_index else -1
+        self.last_index = idx
+        with self.lock:
+            frame = self.cache.get(idx)
+            if frame is not None:
+                self.cache.move_to_end(idx)
+            else:
+                frame = self._decode(idx)
+        self._request_read_ahead(idx, self.direction)
+        return frame
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+        with self.lock:
+            self.cap.release()
+            self.cache.clear()
+            self.cache_bytes = 0
+
+    # ---------------- DECODING ----------------
+
+    def _decode(self, idx):
+        # must be called with self.lock held
+        if idx != self.decoder_position:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        ret, frame = self.cap.read()
+        if not ret:
+            self.decoder_position = -1
+            return None
+        self.decoder_position = idx + 1
+        self._store(idx, frame)
+        return frame
+
+    def _store(self, idx, frame):
+        if idx in self.cache:
+            return
+        self.cache[idx] = frame
+        self.cache_bytes += frame.nbytes
+        # evict the least recently used frames until the cache fits the budget again
+        while self.cache_bytes > self.memory_budget and len(self.cache) > 1:
+            _, evicted = self.cache.popitem(last=False)
+            self.cache_bytes -= evicted.nbytes
+
+    # ---------------- READ AHEAD ----------------
+
+    def _request_read_ahead(self, idx, direction):
+        with self.condition:
+            self.request = (idx, direction)
+            self.condition.notify()
+
+    def _read_ahead_loop(self):
+        while True:
+            with self.condition:
+                while self.request is None and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                idx, direction = self.request
+                self.request = None
+            # backward windows are decoded forward from their first frame to avoid one seek per frame
+            if direction > 0:
+                window = range(idx + 1, min(idx + 1 + self.read_ahead, self.frame_count))
+            else:
+                window = range(max(idx - self.read_ahead, 0), idx)
+            for target in window:
+                # a newer request replaces the current window
+                if self.request is not None or self.closed:
+                    break
+                with self.lock:
+                    if target in self.cache:
+                        continue
+                    if self._decode(target) is None:
+                        break
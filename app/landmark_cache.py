@@ -0,0 +1,110 @@
+import hashlib
+import os
+import sys
+import threading
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+MAX_HANDS = 2
+LANDMARKS = 21
+
+
+def file_hash(path, chunk_size=16 * 1024 ** 2):
+    """Return the sha1 hex digest of a file read in chunks"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path(video_path, digest):
+    """Return the path of the landmark cache stored next to the video"""
+    return f"{video_path}.{digest[:16]}.landmarks.npz"
+
+
+class LandmarkCache:
+    """
+    Per frame hand landmarks of a video, extracted once in a background thread
+    and persisted next to the video keyed by the video file hash
+
+    landmarks : float32 array (frames, MAX_HANDS, 21, 2) of normalized x, y coordinates
+    hands : int8 array (frames,) number of hands found in each frame, -1 if the frame was not processed yet
+    """
+    def __init__(self, video_path, frame_count, on_progress=None):
+        self.video_path = video_path
+        self.landmarks = np.zeros((frame_count, MAX_HANDS, LANDMARKS, 2), dtype=np.float32)
+        self.hands = np.full(frame_count, -1, dtype=np.int8)
+        self.on_progress = on_progress
+        self.processed = 0
+        self.done = False
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='landmark-extraction', daemon=True)
+        self.thread.start()
+
+    def get(self, idx):
+        """Return the (hands, 21, 2) normalized landmarks of frame idx, None if it is not processed yet"""
+        if idx < 0 or idx >= len(self.hands) or self.hands[idx] < 0:
+            return None
+        return self.landmarks[idx, :self.hands[idx]]
+
+    def close(self):
+        self.stop_event.set()
+        self.thread.join()
+
+    def _run(self):
+        digest = file_hash(self.video_path)
+        path = cache_path(self.video_path, digest)
+        if os.path.isfile(path):
+            with np.load(path) as cached:
+                count = min(len(self.hands), len(cached['hands']))
+                self.landmarks[:count] = cached['landmarks'][:count]
+                self.hands[:count] = cached['hands'][:count]
+            self.processed = count
+            self.done = True
+            self._report()
+            return
+
+        from feature_extraction import MPExtractor
+        extractor = MPExtractor(normalized=True, maxHands=MAX_HANDS)
+        cap = cv2.VideoCapture(self.video_path)
+        # decode sequentially, the extraction runs once over the whole video
+        for idx in range(len(self.hands)):
+            if self.stop_event.is_set():
+                cap.release()
+                return
+            ret, frame = cap.read()
+            if not ret:
+                break
+            found = extractor.extractLandmarks(frame)
+            count = 0 if found is None else min(len(found), MAX_HANDS)
+            if count:
+                self.landmarks[idx, :count] = found[:count]
+            self.hands[idx] = count
+            self.processed = idx + 1
+            if idx % 30 == 0:
+                self._report()
+        cap.release()
+
+        temporary_path = path + '.tmp.npz'
+        np.savez_compressed(temporary_path, landmarks=self.landmarks, hands=self.hands)
+        os.replace(temporary_path, path)
+        self.done = True
+        self._report()
+
+    def _report(self):
+        if self.on_progress:
+            self.on_progress(self.processed, len(self.hands))
+
+
+def draw_landmarks(frame, landmarks, radius=3):
+    """Return a copy of the BGR frame with the normalized landmarks drawn on it"""
+    frame = frame.copy()
+    h, w = frame.shape[:2]
+    points = (landmarks.reshape(-1, 2) * (w, h)).astype(np.int32)
+    for x, y in points:
+        cv2.circle(frame, (int(x), int(y)), radius, (0, 255, 0), -1)
+    return frame
@@ -0,0 +1,227 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import cv2
+from buffer import SampleBuffer
+from storage import SegmentStore
+
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi')
+
+# extractor of the worker process, mediapipe graphs can not be shared between processes
+_workerExtractor = None
+
+
+def findVideos(inputs):
+    """
+    Expand the input files and directories to a sorted list of video files
+
+    Parameters
+    ----------
+    inputs : list of paths to video files or directories searched recursively
+
+    Return
+    ----------
+    list of absolute video paths
+    """
+    videos = []
+    for inputPath in inputs:
+        if os.path.isdir(inputPath):
+            for root, _, files in os.walk(inputPath):
+                videos += [os.path.join(root, name) for name in files if name.lower().endswith(VIDEO_EXTENSIONS)]
+        elif os.path.isfile(inputPath):
+            videos.append(inputPath)
+        else:
+            raise FileNotFoundError(f"{inputPath} is not a file or a directory")
+    return sorted(set(os.path.abspath(video) for video in videos))
+
+
+def loadManifest(manifestPath):
+    """
+    Load the label and sequence assignments of the videos
+
+    The manifest is a csv file with the columns file, label and optionally start, end (frame range,
+    end excluded) and sequence, every row is one sequence, file paths are relative to the manifest
+
+    Parameters
+    ----------
+    manifestPath : path to the manifest csv file
+
+    Return
+    ----------
+    DataFrame with absolute file paths and all the optional columns filled
+    """
+    manifest = pd.read_csv(manifestPath)
+    if not {'file', 'label'}.issubset(manifest.columns):
+        raise ValueError("The manifest have to contain the columns file and label")
+    manifestDir = os.path.dirname(os.path.abspath(manifestPath))
+    manifest['file'] = [os.path.abspath(os.path.join(manifestDir, path)) for path in manifest['file']]
+    manifest['label'] = manifest['label'].astype(str)
+    if 'start' not in manifest.columns:
+        manifest['start'] = 0
+    if 'end' not in manifest.columns:
+        manifest['end'] = -1
+    manifest['start'] = manifest['start'].fillna(0).astype(int)
+    manifest['end'] = manifest['end'].fillna(-1).astype(int)
+    if 'sequence' not in manifest.columns:
+        manifest['sequence'] = np.arange(1, len(manifest) + 1)
+    manifest['sequence'] = manifest['sequence'].astype(int)
+    return manifest
+
+
+def planShards(videos, manifest):
+    """
+    Split the work into shards, one per manifest row of the selected videos
+
+    Return
+    ----------
+    (list of shard dicts, list of label names indexed by label ID)
+    """
+    selected = manifest[manifest['file'].isin(videos)]
+    missing = set(videos) - set(selected['file'])
+    for video in sorted(missing):
+        print(f"{video} is not in the manifest, skipping it")
+    labelNames = list(dict.fromkeys(selected['label']))
+    labelIDs = {label: labelID for labelID, label in enumerate(labelNames)}
+    shards = [{'file': row.file, 'start': int(row.start), 'end': int(row.end),
+               'labelID': labelIDs[row.label], 'sequenceID': int(row.sequence)}
+              for row in selected.itertuples(index=False)]
+    return shards, labelNames
+
+
+def _initWorker(extractorName, extractorOptions):
+    global _workerExtractor
+    from feature_extraction import getExtractor
+    _workerExtractor = getExtractor(extractorName, **extractorOptions)
+
+
+def _processShard(shardIndex, shard, shardDir, flip, batchSize):
+    cap = cv2.VideoCapture(shard['file'])
+    if shard['start']:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, shard['start'])
+    # the fixed shape layouts keep the handedness of their hand slots
+    handSlots = _workerExtractor.maxHands if _workerExtractor.fixedShape else 0
+    buffer = SampleBuffer(_workerExtractor.getFeatureSize() * _workerExtractor.feature_dimensions, handSlots=handSlots)
+    frameIndex = shard['start']
+    misses = 0
+    ended = False
+    while not ended:
+        # read a batch of frames and push it through the extractor in one call
+        frames = []
+        while len(frames) < batchSize and (shard['end'] < 0 or frameIndex < shard['end']):
+            success, frame = cap.read()
+            if not success:
+                break
+            frames.append(cv2.flip(frame, 1) if flip else frame)
+            frameIndex += 1
+        ended = len(frames) < batchSize
+        if not frames:
+            break
+        features, found, handedness = _workerExtractor.extractMany(frames, returnHandedness=True)
+        buffer.extend(features[found], shard['labelID'], shard['sequenceID'],
+                      None if handedness is None else handedness[found])
+        misses += int(len(found) - found.sum())
+    cap.release()
+    shardPath = os.path.join(shardDir, f"shard-{shardIndex:05d}.npz")
+    columns = {'handedness': buffer.getHandedness()} if handSlots else {}
+    np.savez(shardPath, features=buffer.getFeatures(), labels=buffer.getLabels(),
+             sequenceIDs=buffer.getSequenceIDs(), **columns)
+    return shardPath, len(buffer), misses
+
+
+def mergeShards(shardPaths, labelNames, store):
+    """
+    Append the shard outputs to a SegmentStore, one segment per shard, the sequence IDs of the manifest
+    are shifted after the last sequence ID already stored so the batch never merges with earlier sessions
+
+    Parameters
+    ----------
+    shardPaths : list of shard .npz files in the order they are merged
+    labelNames : list of label names indexed by label ID
+    store : SegmentStore receiving the shards
+
+    Return
+    ----------
+    LazyDataset over the store
+    """
+    # one offset for the whole batch, the shards of a video keep sharing its manifest sequence ID
+    manifest = store.readManifest()
+    offset = manifest['lastSequenceID'] if manifest else 0
+    for shardPath in shardPaths:
+        with np.load(shardPath) as shard:
+            handedness = shard['handedness'] if 'handedness' in shard.files else None
+            store.appendSegment(shard['features'], shard['labels'], shard['sequenceIDs'] + offset,
+                                labelNames=labelNames, renumberSequences=False, handedness=handedness)
+    return store.load()
+
+
+def batchExtract(inputs, manifestPath, path = 'Data', datasetName = 'out', workers = None,
+                 flip = False, featureSize = None, extractor = 'hand', extractorOptions = None, batchSize = 32):
+    """
+    Extract the features of recorded videos across a pool of processes
+
+    Parameters
+    ----------
+    inputs : list of video files or directories
+    manifestPath : path to the manifest csv (see loadManifest)
+    path, datasetName : the shards are appended to the SegmentStore path/datasetName
+    workers : int number of worker processes, defaults to the number of cores
+    flip : bool flip the frames horizontally as the live capture does
+    featureSize : int number of features per frame, frames of another size are dropped,
+        defaults to one hand (42) for the hand extractor
+    extractor : str registered extractor name (see feature_extraction.registerExtractor)
+    extractorOptions : dict of extra keyword arguments for the extractor
+    batchSize : int number of frames passed to extractMany at once
+
+    Return
+    ----------
+    LazyDataset over the store
+    """
+    videos = findVideos(inputs)
+    shards, labelNames = planShards(videos, loadManifest(manifestPath))
+    extractorOptions = dict(extractorOptions or {})
+    if featureSize is None and extractor == 'hand' and not extractorOptions.get('fixedShape'):
+        featureSize = 42
+    if featureSize:
+        extractorOptions['features_size'] = featureSize
+    shardDir = os.path.join(path, datasetName + '-shards')
+    os.makedirs(shardDir, exist_ok=True)
+
+    shardPaths = [None] * len(shards)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker,
+                             initargs=(extractor, extractorOptions)) as executor:
+        futures = {executor.submit(_processShard, shardIndex, shard, shardDir, flip, batchSize): shardIndex
+                   for shardIndex, shard in enumerate(shards)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            shardPath, samples, misses = future.result()
+            shardPaths[futures[future]] = shardPath
+            print(f"[{done}/{len(shards)}] {os.path.basename(shardPath)} : {samples} samples, {misses} frames without features")
+
+    dataset = mergeShards(shardPaths, labelNames, SegmentStore(os.path.join(path, datasetName)))
+    for shardPath in shardPaths:
+        os.remove(shardPath)
+    os.rmdir(shardDir)
+    return dataset
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Extract a landmark dataset from recorded videos")
+    parser.add_argument('inputs', nargs='+', help="video files or directories")
+    parser.add_argument('--manifest', required=True, help="csv with the columns file, label[, start, end, sequence]")
+    parser.add_argument('--path', default='Data', help="output directory")
+    parser.add_argument('--name', default='out', help="output dataset name")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes")
+    parser.add_argument('--flip', action='store_true', help="flip the frames horizontally")
+    parser.add_argument('--feature-size', type=int, default=None, help="number of features per frame")
+    parser.add_argument('--extractor', default='hand', help="registered extractor name")
+    parser.add_argument('--batch-size', type=int, default=32, help="frames per extractMany call")
+    args = parser.parse_args(argv)
+    batchExtract(args.inputs, args.manifest, path=args.path, datasetName=args.name,
+                 workers=args.workers, flip=args.flip, featureSize=args.feature_size,
+                 extractor=args.extractor, batchSize=args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,468 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+import numpy as np
+from buffer import SampleBuffer
+
+
+# metrics compared to the baseline, one per measure : the duration relative to the calibration workload
+# so the baseline does not depend on the speed of the machine, and the memory metrics
+COMPARED_METRICS = ('relativeCost', 'bytesPerSample', 'peakBytes')
+# reference results committed with the repository, compared to by default
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+
+
+def benchmarkSampleBuffer(totalSamples = 200000, featureSize = 42, blockSize = 10000):
+    """
+    Measure the append cost of SampleBuffer as the number of samples grows
+
+    Parameters
+    ----------
+    totalSamples : int number of samples to append
+    featureSize : int number of features per sample
+    blockSize : int number of samples timed together
+
+    Return
+    ----------
+    list of (samples appended so far, mean append time in microseconds over the block)
+    """
+    buffer = SampleBuffer()
+    sample = np.random.rand(featureSize).astype(np.float32)
+    results = []
+    for blockStart in range(0, totalSamples, blockSize):
+        start = time.perf_counter_ns()
+        for _ in range(blockSize):
+            buffer.append(sample, 0, 1)
+        elapsed = time.perf_counter_ns() - start
+        results.append((blockStart + blockSize, elapsed / blockSize / 1000))
+    return results
+
+
+class MockHands:
+    """ Stand in for mediapipe Hands returning canned multi_hand_landmarks, every missEvery-th call finds no hand """
+    def __init__(self, hands = 2, landmarks = 21, seed = 0, missEvery = 0):
+        rng = np.random.default_rng(seed)
+        self.results = SimpleNamespace(multi_hand_landmarks=[
+            SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y), z=float(z)) for x, y, z in rng.random((landmarks, 3))])
+            for _ in range(hands)],
+            multi_handedness=[SimpleNamespace(classification=[SimpleNamespace(label=('Left', 'Right')[hand % 2])])
+                              for hand in range(hands)])
+        self.emptyResults = SimpleNamespace(multi_hand_landmarks=None, multi_handedness=None)
+        self.missEvery = missEvery
+        self.calls = 0
+
+    def process(self, image):
+        self.calls += 1
+        if self.missEvery and self.calls % self.missEvery == 0:
+            return self.emptyResults
+        return self.results
+
+
+class FakeVideoCapture:
+    """
+    Stand in for cv2.VideoCapture generating deterministic frames (isOpened/read/release)
+
+    The frames come from a small pool of noise frames generated up front so a read costs no allocation,
+    every emptyEvery-th read fails like a dropped camera frame
+    """
+    def __init__(self, frames = None, frameShape = (480, 640, 3), emptyEvery = 0, poolSize = 8, seed = 0):
+        """
+        Parameters
+        ----------
+        frames : int number of successful reads before the capture closes, endless if None
+        frameShape : shape of the BGR frames
+        emptyEvery : int every emptyEvery-th read returns (False, None), never if 0
+        poolSize : int number of distinct frames
+        seed : int seed of the frame noise
+        """
+        rng = np.random.default_rng(seed)
+        self.pool = [rng.integers(0, 256, frameShape, dtype=np.uint8) for _ in range(poolSize)]
+        self.frames = frames
+        self.emptyEvery = emptyEvery
+        self.reads = 0
+        self.delivered = 0
+        self.opened = True
+
+    def isOpened(self):
+        return self.opened
+
+    def read(self):
+        self.reads += 1
+        if self.emptyEvery and self.reads % self.emptyEvery == 0:
+            return False, None
+        if self.frames is not None and self.delivered >= self.frames:
+            self.opened = False
+            return False, None
+        frame = self.pool[self.delivered % len(self.pool)]
+        self.delivered += 1
+        return True, frame
+
+    def release(self):
+        self.opened = False
+
+
+class ScriptedActivator:
+    """
+    Stand in for the mouse and keyboard activators following a script counted in frames,
+    the activation is on for onFrames frames then off for offFrames frames
+    """
+    profiler = None
+
+    def __init__(self, onFrames = 90, offFrames = 10):
+        self.onFrames = onFrames
+        self.period = onFrames + offFrames
+        self.calls = 0
+
+    def isActive(self):
+        return self.stateAt()[0]
+
+    def stateAt(self, timestamp = None):
+        """ Return (active, number of activations) of the next frame of the script """
+        call = self.calls
+        self.calls += 1
+        return call % self.period < self.onFrames, call // self.period + 1
+
+
+def stubExtractor(hands = 1, missEvery = 0, **extractorOptions):
+    """
+    Return an MPExtractor whose mediapipe model is replaced by MockHands, so the landmark conversion
+    of the real extractor runs on canned landmarks, the clones (used by the worker threads) get their own MockHands
+
+    Parameters
+    ----------
+    hands : int number of hands of the canned results
+    missEvery : int every missEvery-th frame has no hand (the "No sample feature" path), never if 0
+    extractorOptions : keyword arguments passed to MPExtractor (eg : normalized=True, fixedShape=True)
+    """
+    from feature_extraction import MPExtractor
+    extractor = MPExtractor(**extractorOptions)
+    extractor.hands = MockHands(hands, missEvery=missEvery)
+    if extractor.roiHands is not None:
+        extractor.roiHands = MockHands(hands, missEvery=missEvery)
+    # the clones keep the options and the locked feature size like BaseExtractor.clone
+    extractor.clone = lambda: stubExtractor(hands, missEvery, **dict(extractor.options, features_size=extractor.features_size))
+    return extractor
+
+
+def benchmarkLandmarkExtraction(iterations = 5000, hands = 2, frameShape = (480, 640, 3), **extractorOptions):
+    """
+    Measure MPExtractor.extract with the mediapipe inference replaced by MockHands
+
+    Parameters
+    ----------
+    iterations : int number of extract calls timed
+    hands : int number of hands in the mocked results
+    frameShape : shape of the frame passed to extract
+    extractorOptions : keyword arguments passed to MPExtractor (eg : normalized=True, includeDepth=True)
+
+    Return
+    ----------
+    mean extract time in microseconds
+    """
+    from feature_extraction import MPExtractor
+    extractor = MPExtractor(**extractorOptions)
+    extractor.hands = MockHands(hands)
+    frame = np.zeros(frameShape, dtype=np.uint8)
+    extractor.extract(frame)
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        extractor.extract(frame)
+    return (time.perf_counter_ns() - start) / iterations / 1000
+
+
+def measureTrackingDrift(videoPath, maxFrames = None, **adaptiveOptions):
+    """
+    Compare AdaptiveMPExtractor against the full inference of MPExtractor on a recorded clip
+
+    Parameters
+    ----------
+    videoPath : path to the clip
+    maxFrames : int number of frames compared, the whole clip by default
+    adaptiveOptions : keyword arguments passed to AdaptiveMPExtractor (eg : keyframeInterval=5)
+
+    Return
+    ----------
+    dict with the effective inference rate, the mean and max landmark drift in pixels over the frames
+    where both extractors found the same number of hands and the number of frames with a different number of hands
+    """
+    import cv2
+    from feature_extraction import MPExtractor, AdaptiveMPExtractor
+    reference = MPExtractor(normalized=False)
+    adaptive = AdaptiveMPExtractor(normalized=False, **adaptiveOptions)
+    cap = cv2.VideoCapture(videoPath)
+    drifts = []
+    mismatches = 0
+    while maxFrames is None or adaptive.framesProcessed < maxFrames:
+        success, frame = cap.read()
+        if not success:
+            break
+        expected = reference.extractLandmarks(frame)
+        expected = None if expected is None else expected.copy()
+        tracked = adaptive.extractLandmarks(frame)
+        if expected is None or tracked is None:
+            mismatches += (expected is None) != (tracked is None)
+            continue
+        if expected.shape != tracked.shape:
+            mismatches += 1
+            continue
+        drifts.append(np.linalg.norm(expected - tracked, axis=-1).mean())
+    cap.release()
+    return {'inferenceRate': adaptive.getInferenceRate(),
+            'meanDrift': float(np.mean(drifts)) if drifts else 0.0,
+            'maxDrift': float(np.max(drifts)) if drifts else 0.0,
+            'handCountMismatches': mismatches,
+            'stats': adaptive.getStats()}
+
+
+def _measure(function, repeats = 1):
+    # the durations are measured without tracemalloc, which slows the allocations down, then the memory with it
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        function()
+        seconds.append((time.perf_counter_ns() - start) / 1e9)
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    count = function()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(seconds), count, after - before, peak - before
+
+
+def calibrate(iterations = 20000, repeats = 5):
+    """
+    Measure a fixed workload made of the small array copies, dict and list operations of the capture path,
+    the benchmark durations are divided by it so they can be compared across machines
+
+    Return
+    ----------
+    float fastest duration of one iteration in seconds
+    """
+    source = np.arange(42, dtype=np.float32)
+    target = np.empty((64, 42), dtype=np.float32)
+    seconds = []
+    for _ in range(repeats):
+        timestamps = {}
+        values = []
+        start = time.perf_counter_ns()
+        for index in range(iterations):
+            target[index % 64] = source
+            timestamps[index % 64] = index
+            values.append(float(source[index % 42]))
+        seconds.append((time.perf_counter_ns() - start) / 1e9)
+    return min(seconds) / iterations
+
+
+def _benchmarkSnap(extractor):
+    from snap import Snap
+    return Snap(activator=ScriptedActivator(), featureExtractor=extractor, labelList=['a', 'b'])
+
+
+def benchmarkAddData(samples = 1000, frameShape = (120, 160, 3), threaded = False, missEvery = 0, repeats = 1):
+    """
+    Measure Snap.addData headless on a FakeVideoCapture with a stub extractor and a scripted activator
+
+    Return
+    ----------
+    dict with the capture duration in seconds, the captured frames per second, the samples per second,
+    the bytes retained per sample and the peak traced memory
+    """
+    from preview import CaptureControl
+    # the model is created once, out of the measure
+    extractor = stubExtractor(missEvery=missEvery)
+    frames = []
+
+    def run():
+        snap = _benchmarkSnap(extractor)
+        capture = FakeVideoCapture(frameShape=frameShape)
+        # the "No sample feature" prints are not part of the measure
+        with contextlib.redirect_stdout(io.StringIO()):
+            snap.addData(capture, threaded=threaded, dropPolicy='block', preview=None,
+                         control=CaptureControl(maxSamples=samples))
+        frames.append(capture.delivered)
+        return len(snap.dataset)
+
+    seconds, count, retained, peak = _measure(run, repeats)
+    return {'seconds': seconds, 'fps': frames[0] / seconds, 'samplesPerSecond': count / seconds,
+            'bytesPerSample': retained / max(count, 1), 'peakBytes': peak}
+
+
+def benchmarkAddSample(samples = 1000, frameShape = (120, 160, 3), fixedShape = False, repeats = 1):
+    """
+    Measure Snap.addSample (extraction and buffer append) on a canned frame
+
+    Return
+    ----------
+    dict with the duration in seconds, the samples per second, the bytes retained per sample and the peak traced memory
+    """
+    frame = FakeVideoCapture(frameShape=frameShape, poolSize=1).pool[0]
+    extractor = stubExtractor(fixedShape=fixedShape, maxHands=2 if fixedShape else 1)
+
+    def run():
+        snap = _benchmarkSnap(extractor)
+        snap.sequenceID = 1
+        for _ in range(samples):
+            snap.addSample(frame)
+        return len(snap.dataset)
+
+    seconds, count, retained, peak = _measure(run, repeats)
+    return {'seconds': seconds, 'samplesPerSecond': count / seconds,
+            'bytesPerSample': retained / max(count, 1), 'peakBytes': peak}
+
+
+def benchmarkSaveDataset(samples = 1000, featureSize = 42, sequenceLength = 100, repeats = 1):
+    """
+    Measure Snap.saveDataset writing a captured session to a new SegmentStore in a temporary directory
+
+    Return
+    ----------
+    dict with the duration in seconds, the rows per second, the written feature megabytes per second
+    and the peak traced memory
+    """
+    snap = _benchmarkSnap(stubExtractor())
+    rng = np.random.default_rng(0)
+    snap.dataset = SampleBuffer(featureSize, capacity=samples)
+    snap.dataset.extend(rng.random((samples, featureSize), dtype=np.float32), rng.integers(0, 2, samples),
+                        np.arange(samples) // sequenceLength + 1)
+
+    def run():
+        with tempfile.TemporaryDirectory() as directory:
+            snap.saveDataset(directory, 'benchmark')
+            snap.FullDataset = None
+        return samples
+
+    seconds, count, _, peak = _measure(run, repeats)
+    return {'seconds': seconds, 'rowsPerSecond': count / seconds,
+            'megabytesPerSecond': snap.dataset.getFeatures().nbytes / 1e6 / seconds, 'peakBytes': peak}
+
+
+def runSuite(sizes = (1000, 10000, 100000, 1000000), frameShape = (120, 160, 3), repeats = 1, log = print):
+    """
+    Run the capture path benchmarks at every size
+
+    Parameters
+    ----------
+    sizes : list of numbers of samples
+    frameShape : shape of the fake camera frames
+    repeats : int timed runs per benchmark, the fastest is kept
+    log : function receiving a line per benchmark, None for no output
+
+    Return
+    ----------
+    dict "benchmark/size" -> dict of metrics, relativeCost is the duration per sample divided by the
+    calibration workload measured just before the benchmark (single threaded benchmarks only)
+    """
+    # (name, benchmark, calibrated) the threaded benchmark scales with the number of cores, a single thread
+    # calibration does not make its duration comparable across machines so it has no relativeCost
+    benchmarks = [('addData', lambda size: benchmarkAddData(size, frameShape, repeats=repeats), True),
+                  ('addDataThreaded', lambda size: benchmarkAddData(size, frameShape, threaded=True, repeats=repeats), False),
+                  ('addSample', lambda size: benchmarkAddSample(size, frameShape, repeats=repeats), True),
+                  ('addSampleFixedShape', lambda size: benchmarkAddSample(size, frameShape, fixedShape=True, repeats=repeats), True),
+                  ('saveDataset', lambda size: benchmarkSaveDataset(size, repeats=repeats), True)]
+    # import the capture modules before the first measure
+    _benchmarkSnap(stubExtractor())
+    results = {}
+    for size in sizes:
+        for name, benchmark, calibrated in benchmarks:
+            key = f"{name}/{size}"
+            calibration = calibrate() if calibrated else None
+            results[key] = benchmark(size)
+            if calibrated:
+                results[key]['relativeCost'] = results[key]['seconds'] / size / calibration
+            if log:
+                log(f"{key:>28} : " + ", ".join(f"{metric} {value:.4g}" for metric, value in results[key].items()))
+    return results
+
+
+def compareToBaseline(results, baseline, tolerance = 1.0, memoryFloor = 65536):
+    """
+    Compare benchmark results to a baseline, only the COMPARED_METRICS are compared so a slower measure
+    is reported once
+
+    Parameters
+    ----------
+    results : dict "benchmark/size" -> dict of metrics (see runSuite)
+    baseline : dict of the same shape or path of its json file
+    tolerance : float relative growth of a metric tolerated before it is reported, the relative costs of
+        two runs of the same tree on a shared machine differ by up to about 1.6x so only a doubling is reported
+    memoryFloor : int memory changes below this number of bytes are allocator noise and never reported,
+        bytesPerSample is compared as the bytes retained by the whole run
+
+    Return
+    ----------
+    list of the regressions as strings, empty if there is none
+    """
+    if isinstance(baseline, str):
+        with open(baseline) as file:
+            baseline = json.load(file)
+    regressions = []
+    for key, metrics in results.items():
+        for metric in COMPARED_METRICS:
+            value = metrics.get(metric)
+            reference = baseline.get(key, {}).get(metric)
+            if value is None or not reference:
+                continue
+            if metric != 'relativeCost':
+                scale = int(key.rsplit('/', 1)[-1]) if metric == 'bytesPerSample' else 1
+                if abs(value - reference) * scale < memoryFloor:
+                    continue
+            change = value / reference - 1
+            if change > tolerance:
+                regressions.append(f"{key} {metric} : {value:.4g} against {reference:.4g} ({change:+.0%})")
+    return regressions
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Benchmark the capture path with a fake camera, "
+                                                 "a mocked mediapipe model and scripted activators")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000],
+                        help="numbers of samples of the benchmarks")
+    parser.add_argument('--frame-shape', type=int, nargs=3, default=[120, 160, 3], help="height width channels")
+    parser.add_argument('--repeats', type=int, default=3, help="timed runs per benchmark, the fastest is kept")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="json file of the baseline results")
+    parser.add_argument('--no-baseline', action='store_true', help="only run the benchmarks")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="write the results to the baseline file, needed to create a missing baseline")
+    parser.add_argument('--tolerance', type=float, default=1.0, help="relative growth reported as a regression")
+    parser.add_argument('--output', default=None, help="json file receiving the results")
+    parser.add_argument('--micro', action='store_true', help="run the SampleBuffer and extraction micro benchmarks")
+    args = parser.parse_args(argv)
+
+    if args.micro:
+        for samples, microseconds in benchmarkSampleBuffer():
+            print(f"{samples:>8} samples : {microseconds:.2f} us/append")
+        for options in [{}, {'normalized': True, 'includeDepth': True}]:
+            print(f"extract {options} : {benchmarkLandmarkExtraction(**options):.2f} us/frame")
+        return 0
+
+    results = runSuite(args.sizes, tuple(args.frame_shape), args.repeats)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=1)
+    if args.no_baseline:
+        return 0
+    if args.update_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=1)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    # a missing baseline fails the run, otherwise a fresh checkout could never report a regression
+    if not os.path.isfile(args.baseline):
+        print(f"The baseline {args.baseline} does not exist, run with --update-baseline to create it")
+        return 2
+    regressions = compareToBaseline(results, args.baseline, args.tolerance)
+    for regression in regressions:
+        print(f"Regression {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
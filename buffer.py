@@ -0,0 +1,211 @@
+import numpy as np
+
+
+class SampleBuffer:
+    """ Class holding the captured samples in preallocated, growable typed arrays """
+    def __init__(self, featureSize = 0, capacity = 1024,
+                 featureDtype = np.float32, labelDtype = np.int16, sequenceDtype = np.int32, handSlots = 0,
+                 extraColumns = None):
+        """
+        Initialize the sample buffer
+
+        Parameters
+        ----------
+        featureSize : int
+            Number of features per sample, if 0 it is taken from the first appended sample
+        capacity : int
+            Number of rows allocated up front, the capacity is doubled whenever the buffer is full
+        featureDtype, labelDtype, sequenceDtype : numpy dtypes of the stored columns
+        handSlots : int
+            Number of hand slots of a fixed shape feature layout, if set an int8 handedness column
+            of handSlots values per sample is kept (-1 for a missing hand)
+        extraColumns : dict
+            name -> dtype of additional per sample columns (eg : {'sourceID': np.int16, 'timestamp': np.int64})
+        """
+        self.featureSize = featureSize
+        self.initialCapacity = max(int(capacity), 1)
+        self.featureDtype = np.dtype(featureDtype)
+        self.labelDtype = np.dtype(labelDtype)
+        self.sequenceDtype = np.dtype(sequenceDtype)
+        self.handSlots = handSlots
+        self.size = 0
+        self.features = None
+        self.labels = None
+        self.sequenceIDs = None
+        self.handedness = None
+        self.extraColumns = {name: np.dtype(dtype) for name, dtype in (extraColumns or {}).items()}
+        self.extras = {name: None for name in self.extraColumns}
+        if self.featureSize:
+            self._allocate(self.initialCapacity)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def capacity(self):
+        return 0 if self.features is None else self.features.shape[0]
+
+    def _allocate(self, capacity):
+        # allocate the new arrays and copy the filled rows over (amortized O(1) per append)
+        features = np.empty((capacity, self.featureSize), dtype=self.featureDtype)
+        labels = np.empty(capacity, dtype=self.labelDtype)
+        sequenceIDs = np.empty(capacity, dtype=self.sequenceDtype)
+        handedness = np.empty((capacity, self.handSlots), dtype=np.int8) if self.handSlots else None
+        if self.size:
+            features[:self.size] = self.features[:self.size]
+            labels[:self.size] = self.labels[:self.size]
+            sequenceIDs[:self.size] = self.sequenceIDs[:self.size]
+            if self.handSlots:
+                handedness[:self.size] = self.handedness[:self.size]
+        extras = {}
+        for name, dtype in self.extraColumns.items():
+            extras[name] = np.empty(capacity, dtype=dtype)
+            if self.size:
+                extras[name][:self.size] = self.extras[name][:self.size]
+        self.extras = extras
+        self.features = features
+        self.labels = labels
+        self.sequenceIDs = sequenceIDs
+        self.handedness = handedness
+
+    def append(self, features, label, sequenceID, handedness = None, **extras):
+        """
+        Append one sample to the buffer
+
+        Parameters
+        ----------
+        features : array like of featureSize elements
+        label : int label ID of the sample
+        sequenceID : int sequence ID of the sample
+        handedness : array like of handSlots elements, only used if the buffer has hand slots
+        extras : values of the extra columns of the sample
+
+        Return
+        ----------
+        None
+        """
+        features = np.asarray(features).reshape(-1)
+        # infer the feature size from the first sample if it was not given
+        if not self.featureSize:
+            self.featureSize = features.shape[0]
+        if features.shape[0] != self.featureSize:
+            raise ValueError(f"Expected {self.featureSize} features but got {features.shape[0]}")
+        row = self.reserveRow()
+        self.features[row] = features
+        if self.handSlots:
+            self.handedness[row] = -1 if handedness is None else handedness
+        for name, value in extras.items():
+            self.extras[name][row] = value
+        self.commitRow(label, sequenceID)
+
+    def extend(self, features, labels, sequenceIDs, handedness = None, **extras):
+        """
+        Append a batch of samples to the buffer
+
+        Parameters
+        ----------
+        features : array of shape (samples, featureSize)
+        labels : int or array of label IDs
+        sequenceIDs : int or array of sequence IDs
+        handedness : array of shape (samples, handSlots), only used if the buffer has hand slots
+        extras : values or arrays of values of the extra columns
+
+        Return
+        ----------
+        None
+        """
+        features = np.asarray(features)
+        # a batch without samples (eg : no frame of the batch had features) adds nothing
+        if features.shape[0] == 0:
+            return
+        features = features.reshape(features.shape[0], -1)
+        if not self.featureSize:
+            self.featureSize = features.shape[1]
+        if features.shape[1] != self.featureSize:
+            raise ValueError(f"Expected {self.featureSize} features but got {features.shape[1]}")
+        count = features.shape[0]
+        if self.size + count > self.capacity:
+            capacity = max(self.initialCapacity, self.capacity)
+            while capacity < self.size + count:
+                capacity *= 2
+            self._allocate(capacity)
+        rows = slice(self.size, self.size + count)
+        self.features[rows] = features
+        self.labels[rows] = labels
+        self.sequenceIDs[rows] = sequenceIDs
+        if self.handSlots:
+            self.handedness[rows] = -1 if handedness is None else handedness
+        for name, values in extras.items():
+            self.extras[name][rows] = values
+        self.size += count
+
+    def reserveRow(self):
+        """
+        Make room for the next sample without adding it, the caller can then write the sample straight into
+        self.features[row] (and self.handedness[row]) and add it with commitRow
+
+        Return
+        ----------
+        row : int index of the next sample
+        """
+        if not self.featureSize:
+            raise ValueError("The feature size have to be known before reserving a row")
+        if self.size == self.capacity:
+            self._allocate(max(self.initialCapacity, 2 * self.capacity))
+        return self.size
+
+    def commitRow(self, label, sequenceID):
+        """ Add the sample written in the row returned by reserveRow """
+        self.labels[self.size] = label
+        self.sequenceIDs[self.size] = sequenceID
+        self.size += 1
+
+    def getFeatures(self):
+        """ Return a zero copy view of the filled feature rows (size, featureSize) """
+        if self.features is None:
+            return np.empty((0, self.featureSize), dtype=self.featureDtype)
+        return self.features[:self.size]
+
+    def getLabels(self):
+        """ Return a zero copy view of the filled label IDs """
+        if self.labels is None:
+            return np.empty(0, dtype=self.labelDtype)
+        return self.labels[:self.size]
+
+    def getSequenceIDs(self):
+        """ Return a zero copy view of the filled sequence IDs """
+        if self.sequenceIDs is None:
+            return np.empty(0, dtype=self.sequenceDtype)
+        return self.sequenceIDs[:self.size]
+
+    def getHandedness(self):
+        """ Return a zero copy view of the filled handedness rows (size, handSlots), None without hand slots """
+        if not self.handSlots:
+            return None
+        if self.handedness is None:
+            return np.empty((0, self.handSlots), dtype=np.int8)
+        return self.handedness[:self.size]
+
+    def getColumn(self, name):
+        """ Return a zero copy view of the filled values of an extra column """
+        if self.extras[name] is None:
+            return np.empty(0, dtype=self.extraColumns[name])
+        return self.extras[name][:self.size]
+
+    def getExtraColumns(self):
+        """ Return a dict of zero copy views of the filled values of every extra column """
+        return {name: self.getColumn(name) for name in self.extraColumns}
+
+    def getHandMask(self):
+        """ Return the (size, handSlots) presence mask of the hands, None without hand slots """
+        handedness = self.getHandedness()
+        return None if handedness is None else handedness >= 0
+
+    def clear(self):
+        """ Drop all samples while keeping the allocated memory """
+        self.size = 0
+
+    def shrink(self):
+        """ Release the unused capacity of the buffer """
+        if self.features is not None and self.capacity > self.size:
+            self._allocate(max(self.size, 1))
@@ -0,0 +1,210 @@
+import json
+import os
+import numpy as np
+from numpy.lib.format import open_memmap
+from numpy.lib.stride_tricks import sliding_window_view
+from storage import _atomicSave
+
+
+EXPORT_STATE_NAME = 'export.json'
+EXPORT_VERSION = 1
+PADDING_MODES = {'zero': 'constant', 'edge': 'edge'}
+
+
+def paddedLength(rows, length, stride = 1, padding = None):
+    """
+    Return the number of rows of a sequence once padded for the windowing, the padding completes
+    a short sequence to one window and the last window of a longer one so no row is left out
+    """
+    if padding is None or rows == 0:
+        return rows
+    if rows < length:
+        return length
+    return rows + (-(rows - length)) % stride
+
+
+def windowCount(rows, length, stride = 1, padding = None):
+    """ Return the number of windows of a sequence of rows rows """
+    rows = paddedLength(rows, length, stride, padding)
+    return 0 if rows < length else (rows - length) // stride + 1
+
+
+def slidingWindows(features, length, stride = 1, padding = None):
+    """
+    Return the sliding windows of a sequence
+
+    Parameters
+    ----------
+    features : array of shape (rows, features)
+    length : int number of rows per window
+    stride : int number of rows between the starts of two windows
+    padding : None to drop the rows not filling a window, 'zero' or 'edge' to pad the end of the sequence
+
+    Return
+    ----------
+    array of shape (windows, length, features), a zero copy view of features unless the sequence was padded
+    """
+    if length <= 0 or stride <= 0:
+        raise ValueError("The window length and stride have to be greater than zero")
+    if padding is not None and padding not in PADDING_MODES:
+        raise ValueError(f"The padding have to be None or one of {list(PADDING_MODES)}")
+    features = np.asarray(features)
+    missing = paddedLength(len(features), length, stride, padding) - len(features)
+    if missing:
+        features = np.pad(features, [(0, missing)] + [(0, 0)] * (features.ndim - 1), mode=PADDING_MODES[padding])
+    if len(features) < length:
+        return np.empty((0, length) + features.shape[1:], dtype=features.dtype)
+    # sliding_window_view puts the window axis last, move it next to the window index
+    return np.moveaxis(sliding_window_view(features, length, axis=0)[::stride], -1, 1)
+
+
+def windowLabels(labels, length, stride = 1, padding = None, labelMode = 'last'):
+    """
+    Return the label ID of every window of a sequence
+
+    Parameters
+    ----------
+    labels : array of the label IDs of the sequence rows
+    length, stride, padding : windowing of the sequence (see slidingWindows)
+    labelMode : str 'last' for the label of the last row of the window, 'majority' for its most frequent label
+    """
+    labels = np.asarray(labels)
+    missing = paddedLength(len(labels), length, stride, padding) - len(labels)
+    if missing:
+        # the padded rows keep the label of the last row whatever the feature padding is
+        labels = np.pad(labels, (0, missing), mode='edge')
+    if len(labels) < length:
+        return np.empty(0, dtype=labels.dtype)
+    if labelMode == 'last':
+        return labels[length - 1::stride]
+    if labelMode == 'majority':
+        windows = sliding_window_view(labels, length)[::stride]
+        values = np.unique(labels)
+        counts = np.stack([(windows == value).sum(axis=1) for value in values])
+        return values[np.argmax(counts, axis=0)]
+    raise ValueError("The label mode have to be either last or majority")
+
+
+class WindowExporter:
+    """
+    Class exporting the sequences of a stored dataset as fixed length sliding windows for training
+
+    Every export run writes one part made of three memory mappable arrays:
+    <part>.windows.npy (windows x length x features), <part>.labels.npy and <part>.sequences.npy
+    (the sequence ID of every window). The export.json state holds the windowing configuration and the
+    exported sequence IDs so a later run only exports the sequences added since.
+    """
+    def __init__(self, path, length, stride = 1, padding = None, labelMode = 'last'):
+        """
+        Parameters
+        ----------
+        path : str directory of the export
+        length : int number of rows per window
+        stride : int number of rows between the starts of two windows
+        padding : None, 'zero' or 'edge' (see slidingWindows)
+        labelMode : str 'last' or 'majority' (see windowLabels)
+        """
+        if length <= 0 or stride <= 0:
+            raise ValueError("The window length and stride have to be greater than zero")
+        if padding is not None and padding not in PADDING_MODES:
+            raise ValueError(f"The padding have to be None or one of {list(PADDING_MODES)}")
+        if labelMode not in ('last', 'majority'):
+            raise ValueError("The label mode have to be either last or majority")
+        self.path = path
+        self.statePath = os.path.join(path, EXPORT_STATE_NAME)
+        self.config = {'length': length, 'stride': stride, 'padding': padding, 'labelMode': labelMode}
+        self.state = None
+
+    def readState(self):
+        """ Read the export state from the disk, return None if nothing was exported yet """
+        if not os.path.isfile(self.statePath):
+            return None
+        with open(self.statePath) as file:
+            self.state = json.load(file)
+        return self.state
+
+    def _writeState(self):
+        temporaryPath = self.statePath + '.tmp'
+        with open(temporaryPath, 'w') as file:
+            json.dump(self.state, file, indent=1)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporaryPath, self.statePath)
+
+    def partFiles(self, partName):
+        """ Return the paths of the windows, labels and sequences arrays of a part """
+        return tuple(os.path.join(self.path, f"{partName}.{kind}.npy") for kind in ('windows', 'labels', 'sequences'))
+
+    def export(self, dataset, label = None):
+        """
+        Export the sequences of the dataset that were not exported yet as a new part
+
+        Parameters
+        ----------
+        dataset : LazyDataset of the stored dataset (see SegmentStore.load)
+        label : str only export the sequences containing this label
+
+        Return
+        ----------
+        the part entry added to the state, None if there was no new window
+        """
+        if self.readState() is None:
+            os.makedirs(self.path, exist_ok=True)
+            self.state = {'version': EXPORT_VERSION, 'config': self.config,
+                          'featureColumns': dataset.featureColumns, 'labels': [],
+                          'exportedSequences': [], 'parts': []}
+        if self.state['config'] != self.config:
+            raise ValueError(f"{self.path} was exported with {self.state['config']}, export to a new directory "
+                             f"to change the windowing")
+        if self.state['featureColumns'] != dataset.featureColumns:
+            raise ValueError("The dataset features do not match the exported features")
+
+        exported = set(self.state['exportedSequences'])
+        sequenceIDs = [sequenceID for sequenceID in dataset.getSequenceIDs(label) if sequenceID not in exported]
+        length, stride, padding = self.config['length'], self.config['stride'], self.config['padding']
+        # the windows are counted from the index so the output can be allocated before reading any row
+        counts = [windowCount(dataset.getSequenceLength(sequenceID), length, stride, padding)
+                  for sequenceID in sequenceIDs]
+        total = sum(counts)
+        if total:
+            partName = f"part-{len(self.state['parts']):05d}"
+            windowsPath, labelsPath, sequencesPath = self.partFiles(partName)
+            temporaryPath = windowsPath + '.tmp'
+            windows = open_memmap(temporaryPath, mode='w+', dtype=np.dtype(dataset.manifest['featureDtype']),
+                                  shape=(total, length, len(dataset.featureColumns)))
+            labels = np.empty(total, dtype=np.dtype(dataset.manifest['labelDtype']))
+            windowSequenceIDs = np.empty(total, dtype=np.dtype(dataset.manifest['sequenceDtype']))
+            start = 0
+            for sequenceID, count in zip(sequenceIDs, counts):
+                if not count:
+                    continue
+                features, sequenceLabels = dataset.getSequence(sequenceID)
+                windows[start:start + count] = slidingWindows(features, length, stride, padding)
+                labels[start:start + count] = windowLabels(sequenceLabels, length, stride, padding,
+                                                           self.config['labelMode'])
+                windowSequenceIDs[start:start + count] = sequenceID
+                start += count
+            windows.flush()
+            del windows
+            os.replace(temporaryPath, windowsPath)
+            _atomicSave(labelsPath, labels)
+            _atomicSave(sequencesPath, windowSequenceIDs)
+            part = {'name': partName, 'windows': int(total), 'sequences': len(sequenceIDs)}
+            self.state['parts'].append(part)
+        else:
+            part = None
+        # the too short sequences are recorded too so they are not read again by the next run
+        self.state['exportedSequences'].extend(int(sequenceID) for sequenceID in sequenceIDs)
+        self.state['labels'] = list(dataset.labelNames)
+        self._writeState()
+        return part
+
+    def load(self):
+        """
+        Return the memory mapped (windows, labels, sequenceIDs) of every exported part, the label IDs index
+        the labels of the state
+        """
+        if self.readState() is None:
+            return []
+        return [tuple(np.load(path, mmap_mode='r') for path in self.partFiles(part['name']))
+                for part in self.state['parts']]
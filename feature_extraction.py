@@ -1,15 +1,33 @@
 import mediapipe as mp
 import numpy as np
+import threading
+import time
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from types import SimpleNamespace
 import cv2
 
 
+# slot index of every hand in the fixed shape layout, -1 marks a missing hand
+HANDEDNESS = {'Left': 0, 'Right': 1}
+
+
 class BaseExtractor:
     """ Class for extracting features of the input frame """
+    # Profiler receiving the model inference durations, None when the profiling is disabled
+    profiler = None
+    # extractors with a fixed shape layout implement extractInto and extractHands
+    fixedShape = False
+
     def __init__(self, extractor = 'hand', features_size = 0, feature_dimensions = 1):
         self.extractor = extractor
         self.features_size = features_size
         self.feature_dimensions = feature_dimensions
+        # constructor arguments used by clone, subclasses add their own options
+        self.options = {'extractor': extractor, 'features_size': features_size, 'feature_dimensions': feature_dimensions}
+        self.pool = None
+        self.poolWorkers = 0
 
     @abstractmethod
     def extract(self, inputData):
@@ -57,12 +75,119 @@ class BaseExtractor:
         else:
             raise ValueError("Feature size can not be less than or equal to zero")
 
+    def clone(self):
+        """
+        Create a new extractor with the same options, used to give every worker its own model
+
+        Return
+        ----------
+        BaseExtractor
+        """
+        options = dict(self.options)
+        if 'features_size' in options:
+            options['features_size'] = self.features_size
+        return type(self)(**options)
+
+    def extractMany(self, frames, workers = 1, returnHandedness = False):
+        """
+        Extract the features of a batch of frames
+
+        Backends able to batch override this method, the default runs extract frame by frame
+        or on a pool of workers threads each owning a clone of the extractor
+
+        Parameters
+        ----------
+        frames : sequence of input frames
+        workers : int number of worker threads, 1 runs on the calling thread
+        returnHandedness : bool also return the handedness of the fixed shape layouts
+
+        Return
+        ----------
+        (features of shape (frames, feature_dimensions * features_size), bool array of the frames with features)
+        followed by the int8 handedness of shape (frames, hand slots) if returnHandedness, None without hand slots
+        """
+        if workers > 1:
+            results = self.poolMap(frames, workers)
+        else:
+            results = [self.extract(frame) for frame in frames]
+        features, found = self.stackFeatures(results)
+        return (features, found, None) if returnHandedness else (features, found)
+
+    def stackFeatures(self, results):
+        """
+        Stack per frame extract results (None for the frames without features) in one float32 array
+        """
+        found = np.array([result is not None for result in results], dtype=bool)
+        if not self.features_size and found.any():
+            # the worker clones locked their own feature size, the first frame with features locks it here
+            # as the serial extract does
+            self.features_size = np.asarray(results[np.flatnonzero(found)[0]]).size // self.feature_dimensions
+        width = self.feature_dimensions * self.features_size
+        features = np.zeros((len(results), width), dtype=np.float32)
+        for index in np.flatnonzero(found):
+            result = np.asarray(results[index]).reshape(-1)
+            if result.shape[0] == width:
+                features[index] = result
+            else:
+                found[index] = False
+        return features, found
+
+    def poolMap(self, frames, workers, method = 'extract'):
+        """
+        Run an extraction method (extract by default) over the frames on a pool of threads, every thread owns
+        a clone of the extractor since the models are not shareable, the results keep the order of the frames
+        """
+        if self.pool is None or self.poolWorkers != workers:
+            self.close()
+            local = threading.local()
+
+            def extractFrame(frame, method):
+                if not hasattr(local, 'extractor'):
+                    local.extractor = self.clone()
+                # the clones follow the feature size locked by stackFeatures
+                if self.features_size:
+                    local.extractor.features_size = self.features_size
+                return getattr(local.extractor, method)(frame)
+
+            self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='extractor')
+            self.poolWorkers = workers
+            self.extractFrame = extractFrame
+        return list(self.pool.map(self.extractFrame, frames, repeat(method, len(frames))))
+
+    def close(self):
+        """ Shut down the worker pool of extractMany """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+            self.poolWorkers = 0
+
 
 class MPExtractor(BaseExtractor):
     """ Class for extracting features of the input frame based on Media pipe models """
-    def __init__(self, extractor = 'hand', features_size = 0, feature_dimensions = 1):
+    def __init__(self, extractor = 'hand', features_size = 0, feature_dimensions = 1,
+                 normalized = False, includeDepth = False, maxHands = 2, fixedShape = False,
+                 inferenceSize = None, roi = False, roiSize = 256, roiMargin = 0.3):
         """
         Initialize mediapipe extractor
+
+        Parameters
+        ----------
+        normalized : bool
+            if True the landmarks are returned as float coordinates normalized to 0->1,
+            otherwise they are scaled to integer pixel coordinates of the input frame
+        includeDepth : bool add the z-depth of every landmark to its x, y coordinates
+        maxHands : int maximum number of hands detected per frame
+        fixedShape : bool
+            if True every frame gives maxHands x 21 x coordinates float32 features whatever the number of hands
+            found, the hands are placed in their handedness slot (Left then Right) and the missing hands are zeros
+            flagged by the handedness array
+        inferenceSize : (width, height) the frames are resized to before the inference, the full frame by default
+        roi : bool
+            if True the inference runs on a crop around the hands of the previous frame resized to roiSize x roiSize,
+            the full frame is used when there was no hand or none is found in the crop, the crops run on a second
+            model in static image mode (hand detection on every crop) while the full frames keep the video mode model
+        roiSize : int side of the square region of interest sent to the model
+        roiMargin : float margin added around the previous hands bounding box relative to its size
         """
         # Initialize base class
         super().__init__(extractor, features_size, feature_dimensions)
@@ -72,32 +197,249 @@ class MPExtractor(BaseExtractor):
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
         self.mp_hands  = mp.solutions.hands
-        self.hands = mp_hands.Hands(model_complexity=0, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+        self.hands = mp_hands.Hands(static_image_mode=False, model_complexity=0, max_num_hands=maxHands,
+                                    min_detection_confidence=0.5, min_tracking_confidence=0.5)
+        # the video mode tracks the hands with the normalized regions of the previous input, they do not match
+        # the next input when every frame is a different crop so the regions of interest run on an image mode model,
+        # the full frame fallbacks keep the tracking of the video mode model instead of a palm detection per frame
+        self.roiHands = mp_hands.Hands(static_image_mode=True, model_complexity=0, max_num_hands=maxHands,
+                                       min_detection_confidence=0.5) if roi else None
+        self.normalized = normalized
+        self.includeDepth = includeDepth
+        self.landmarkCount = 21
+        self.coordinateDimensions = 3 if includeDepth else 2
+        # Preallocated (hands x landmarks x coordinates) buffer reused by every frame
+        self.landmarkBuffer = np.empty((maxHands, self.landmarkCount, self.coordinateDimensions), dtype=np.float32)
+        self.maxHands = maxHands
+        self.fixedShape = fixedShape
+        if fixedShape:
+            self.features_size = maxHands * self.landmarkCount * self.coordinateDimensions
+            self.feature_dimensions = 1
+        self.inferenceSize = tuple(inferenceSize) if inferenceSize else None
+        self.roi = roi
+        self.roiSize = roiSize
+        self.roiMargin = roiMargin
+        # (x0, y0, x1, y1) pixel box of the hands in the previous frame
+        self.previousBox = None
+        # resize and color conversion buffers reused by every frame
+        self.resizeBuffer = None
+        self.rgbBuffer = None
+        self.options.update(normalized=normalized, includeDepth=includeDepth, maxHands=maxHands, fixedShape=fixedShape,
+                            inferenceSize=inferenceSize, roi=roi, roiSize=roiSize, roiMargin=roiMargin)
 
-    def extract(self, inputData):
-        inputData.flags.writeable = False
-        inputData = cv2.cvtColor(inputData, cv2.COLOR_BGR2RGB)
+    def landmarksToArray(self, multiHandLandmarks, imageShape):
+        """
+        Fill the landmark buffer from the mediapipe hand landmarks in one pass
+
+        Parameters
+        ----------
+        multiHandLandmarks : list of mediapipe NormalizedLandmarkList (results.multi_hand_landmarks)
+        imageShape : shape of the input frame used to scale the normalized landmarks
+
+        Return
+        ----------
+        arr : view of the landmark buffer of shape (hands, 21, coordinateDimensions)
+        """
+        hands = len(multiHandLandmarks)
+        if hands > self.landmarkBuffer.shape[0]:
+            self.landmarkBuffer = np.empty((hands, self.landmarkCount, self.coordinateDimensions), dtype=np.float32)
+        landmarks = self.landmarkBuffer[:hands]
+        count = landmarks.size
+        if self.includeDepth:
+            coordinates = (c for hand_landmarks in multiHandLandmarks for lm in hand_landmarks.landmark for c in (lm.x, lm.y, lm.z))
+        else:
+            coordinates = (c for hand_landmarks in multiHandLandmarks for lm in hand_landmarks.landmark for c in (lm.x, lm.y))
+        landmarks.reshape(-1)[:] = np.fromiter(coordinates, dtype=np.float32, count=count)
+        if not self.normalized:
+            # scale from 0->1 to input width * height (the depth uses the same scale as x)
+            landmarks *= np.array([imageShape[1], imageShape[0], imageShape[1]][:self.coordinateDimensions], dtype=np.float32)
+        return landmarks
+
+    def prepareFrame(self, inputData, size = None):
+        """
+        Resize a BGR frame to size (width, height) and convert it to RGB in the reused buffers, the input is left untouched
+        """
+        if size is not None and (inputData.shape[1], inputData.shape[0]) != size:
+            if self.resizeBuffer is None or self.resizeBuffer.shape[:2] != (size[1], size[0]):
+                self.resizeBuffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            cv2.resize(inputData, size, dst=self.resizeBuffer, interpolation=cv2.INTER_AREA)
+            inputData = self.resizeBuffer
+        if self.rgbBuffer is None or self.rgbBuffer.shape != inputData.shape:
+            self.rgbBuffer = np.empty(inputData.shape, dtype=np.uint8)
+        self.rgbBuffer.flags.writeable = True
+        cv2.cvtColor(inputData, cv2.COLOR_BGR2RGB, dst=self.rgbBuffer)
+        self.rgbBuffer.flags.writeable = False
+        return self.rgbBuffer
+
+    def process(self, inputData):
+        """
+        Run the hands model on a BGR frame and return the mediapipe results,
+        the landmarks are normalized to the full frame whatever the inference resolution or region
+        """
+        if self.roi and self.previousBox is not None:
+            x0, y0, x1, y1 = self.previousBox
+            results = self.infer(self.prepareFrame(inputData[y0:y1, x0:x1], (self.roiSize, self.roiSize)), self.roiHands)
+            if results.multi_hand_landmarks:
+                # map the landmarks from the crop back to the full frame
+                width, height = inputData.shape[1], inputData.shape[0]
+                for hand_landmarks in results.multi_hand_landmarks:
+                    for lm in hand_landmarks.landmark:
+                        lm.x = (x0 + lm.x * (x1 - x0)) / width
+                        lm.y = (y0 + lm.y * (y1 - y0)) / height
+                        lm.z = lm.z * (x1 - x0) / width
+                self.updateRegion(results, inputData.shape)
+                return results
         # Get the feature from mediapipe model
-        results = self.hands.process(inputData)
-        inputData.flags.writeable = True
-        inputData = cv2.cvtColor(inputData, cv2.COLOR_RGB2BGR)
+        results = self.infer(self.prepareFrame(inputData, self.inferenceSize))
+        if self.roi:
+            self.updateRegion(results, inputData.shape)
+        return results
+
+    def infer(self, frame, model = None):
+        """ Run a hands model (the video mode model by default) on a prepared RGB frame """
+        model = model or self.hands
+        profiler = self.profiler
+        if profiler is None:
+            return model.process(frame)
+        start = time.monotonic_ns()
+        results = model.process(frame)
+        profiler.record('inference', start)
+        if not results.multi_hand_landmarks:
+            profiler.count('inferenceMisses')
+        return results
+
+    def updateRegion(self, results, imageShape):
+        """
+        Set the region of interest of the next frame to a square around the hands of the results
+        """
+        if not results.multi_hand_landmarks:
+            self.previousBox = None
+            return
+        height, width = imageShape[0], imageShape[1]
+        points = np.array([(lm.x, lm.y) for hand_landmarks in results.multi_hand_landmarks
+                           for lm in hand_landmarks.landmark], dtype=np.float32) * (width, height)
+        (left, top), (right, bottom) = points.min(axis=0), points.max(axis=0)
+        side = max(right - left, bottom - top) * (1 + 2 * self.roiMargin)
+        side = int(min(max(side, 32), width, height))
+        x0 = int(min(max((left + right - side) / 2, 0), width - side))
+        y0 = int(min(max((top + bottom - side) / 2, 0), height - side))
+        self.previousBox = (x0, y0, x0 + side, y0 + side)
+
+    def extractLandmarks(self, inputData):
+        """
+        Run the hands model on a BGR frame
+
+        Parameters
+        ----------
+        inputData : BGR frame
+
+        Return
+        ----------
+        arr : view of the landmark buffer of shape (hands, 21, coordinateDimensions), None if no hand was found
+        """
+        results = self.process(inputData)
         # Check if there are features extracted from the input data
-        if results.multi_hand_landmarks:
-            # Initialize an array to hold the features extracted
-            features = np.array([])
-            # Loop over the results and 
-            for hand_landmarks in results.multi_hand_landmarks:
-                for id, lm in enumerate(hand_landmarks.landmark):
-                    if lm.x and lm.y:
-                        # Check if the features array is still empty
-                        if features.size == 0:
-                            # if the features array is empty assign the features array to the first value extracted
-                            # multiply by te input data to scale from 0->1 to input width * height withoout normalization
-                            features = np.array([int(lm.x*inputData.shape[1]), int(lm.y*inputData.shape[0])])
-                        # If the features array already contains value/s
-                        else:
-                            # Stack the features array with the added value
-                            features = np.hstack((features, np.array([int(lm.x*inputData.shape[1]), int(lm.y*inputData.shape[0])])))
+        if not results.multi_hand_landmarks:
+            return None
+        return self.landmarksToArray(results.multi_hand_landmarks, inputData.shape)
+
+    def handsToSlots(self, results, imageShape, landmarksOut, handednessOut):
+        """
+        Write the hands of the mediapipe results in their handedness slots
+
+        Parameters
+        ----------
+        results : mediapipe hands results
+        imageShape : shape of the input frame used to scale the normalized landmarks
+        landmarksOut : float array of shape (maxHands, 21, coordinateDimensions) receiving the landmarks
+        handednessOut : int8 array of shape (maxHands,) receiving the handedness of every slot, -1 if empty
+
+        Return
+        ----------
+        True if at least one hand was found
+        """
+        landmarksOut[:] = 0
+        handednessOut[:] = -1
+        if not results.multi_hand_landmarks:
+            return False
+        landmarks = self.landmarksToArray(results.multi_hand_landmarks, imageShape)
+        handedness = results.multi_handedness or []
+        for hand in range(len(landmarks)):
+            side = HANDEDNESS.get(handedness[hand].classification[0].label, 0) if hand < len(handedness) else 0
+            # a hand takes its handedness slot, or the first free slot if it is taken
+            if side < self.maxHands and handednessOut[side] < 0:
+                slot = side
+            else:
+                free = np.flatnonzero(handednessOut < 0)
+                if not free.size:
+                    break
+                slot = free[0]
+            landmarksOut[slot] = landmarks[hand]
+            handednessOut[slot] = side
+        return True
+
+    def extractInto(self, inputData, featuresOut, handednessOut):
+        """
+        Extract the fixed shape features of a frame straight into preallocated rows (eg : a SampleBuffer row)
+
+        Parameters
+        ----------
+        inputData : BGR frame
+        featuresOut : float array of features_size elements
+        handednessOut : int8 array of maxHands elements
+
+        Return
+        ----------
+        True if at least one hand was found
+        """
+        landmarksOut = featuresOut.reshape(self.maxHands, self.landmarkCount, self.coordinateDimensions)
+        return self.handsToSlots(self.process(inputData), inputData.shape, landmarksOut, handednessOut)
+
+    def extractHands(self, inputData):
+        """
+        Extract the fixed shape features of a frame
+
+        Return
+        ----------
+        (landmarks of shape (maxHands, 21, coordinateDimensions), handedness of shape (maxHands,),
+        presence mask of shape (maxHands,)), None if no hand was found
+        """
+        landmarks = np.empty((self.maxHands, self.landmarkCount, self.coordinateDimensions), dtype=np.float32)
+        handedness = np.empty(self.maxHands, dtype=np.int8)
+        if not self.extractInto(inputData, landmarks, handedness):
+            return None
+        return landmarks, handedness, handedness >= 0
+
+    def extractMany(self, frames, workers = 1, returnHandedness = False):
+        """
+        Extract the features of a batch of frames, the fixed shape layout writes every frame
+        straight into one preallocated (frames, features_size) array with its handedness
+        """
+        if not self.fixedShape:
+            return super().extractMany(frames, workers, returnHandedness)
+        if workers > 1:
+            features = np.zeros((len(frames), self.features_size), dtype=np.float32)
+            handedness = np.full((len(frames), self.maxHands), -1, dtype=np.int8)
+            results = self.poolMap(frames, workers, 'extractHands')
+            found = np.array([result is not None for result in results], dtype=bool)
+            for index in np.flatnonzero(found):
+                features[index] = results[index][0].reshape(-1)
+                handedness[index] = results[index][1]
+        else:
+            features = np.empty((len(frames), self.features_size), dtype=np.float32)
+            handedness = np.empty((len(frames), self.maxHands), dtype=np.int8)
+            found = np.fromiter((self.extractInto(frame, features[index], handedness[index])
+                                 for index, frame in enumerate(frames)), dtype=bool, count=len(frames))
+        return (features, found, handedness) if returnHandedness else (features, found)
+
+    def extract(self, inputData):
+        if self.fixedShape:
+            hands = self.extractHands(inputData)
+            return None if hands is None else hands[0].reshape(1, self.features_size)
+        landmarks = self.extractLandmarks(inputData)
+        if landmarks is not None:
+            # Copy out of the reused buffer, truncating to integer pixels when not normalized
+            features = landmarks.reshape(-1).astype(np.float32 if self.normalized else np.int32)
 
             # If the feature size was not assigned by the user assign it to features.shape[0]
             if not self.features_size:
@@ -108,4 +450,263 @@ class MPExtractor(BaseExtractor):
             except ValueError:
                 return None
 
-            return features
\ No newline at end of file
+            return features
+
+
+class AdaptiveMPExtractor(MPExtractor):
+    """
+    Mediapipe hands extractor running the full inference on keyframes only, the landmarks of the frames
+    in between are tracked with pyramidal Lucas-Kanade optical flow and the inference runs again as soon as
+    the tracking is lost, the tracking error is too high or the hands move too fast
+    """
+    def __init__(self, extractor = 'hand', features_size = 0, feature_dimensions = 1,
+                 normalized = False, includeDepth = False, maxHands = 2, fixedShape = False,
+                 inferenceSize = None, roi = False, roiSize = 256, roiMargin = 0.3,
+                 keyframeInterval = 5, maxTrackingError = 20.0, maxMotion = 0.05):
+        """
+        Parameters
+        ----------
+        keyframeInterval : int a full inference runs at least every keyframeInterval frames
+        maxTrackingError : float maximum mean optical flow error of the tracked landmarks
+        maxMotion : float maximum mean landmark motion between two frames relative to the frame diagonal
+        """
+        super().__init__(extractor, features_size, feature_dimensions, normalized, includeDepth, maxHands, fixedShape,
+                         inferenceSize, roi, roiSize, roiMargin)
+        if keyframeInterval < 1:
+            raise ValueError("The keyframe interval can not be less than one")
+        self.keyframeInterval = keyframeInterval
+        self.maxTrackingError = maxTrackingError
+        self.maxMotion = maxMotion
+        self.options.update(keyframeInterval=keyframeInterval, maxTrackingError=maxTrackingError, maxMotion=maxMotion)
+        self.resetTracking()
+        self.framesProcessed = 0
+        self.inferences = 0
+        self.trackedFrames = 0
+        self.fallbacks = 0
+
+    def resetTracking(self):
+        """ Forget the tracked landmarks so the next frame runs the full inference """
+        self.previousGray = None
+        self.trackedPoints = None
+        self.trackedDepth = None
+        self.trackedHandedness = None
+        self.framesSinceKeyframe = 0
+
+    def getInferenceRate(self):
+        """ Return the fraction of the processed frames that ran the full inference """
+        return self.inferences / self.framesProcessed if self.framesProcessed else 0.0
+
+    def getStats(self):
+        return {'frames': self.framesProcessed, 'inferences': self.inferences, 'tracked': self.trackedFrames,
+                'fallbacks': self.fallbacks, 'inferenceRate': self.getInferenceRate()}
+
+    def process(self, inputData):
+        self.framesProcessed += 1
+        gray = cv2.cvtColor(inputData, cv2.COLOR_BGR2GRAY)
+        if self.previousGray is not None and self.previousGray.shape != gray.shape:
+            self.resetTracking()
+        if self.trackedPoints is not None and self.framesSinceKeyframe < self.keyframeInterval - 1:
+            results = self.track(gray)
+            if results is not None:
+                self.previousGray = gray
+                self.framesSinceKeyframe += 1
+                self.trackedFrames += 1
+                return results
+            self.fallbacks += 1
+        results = super().process(inputData)
+        self.inferences += 1
+        self.startTracking(results, gray)
+        return results
+
+    def startTracking(self, results, gray):
+        self.framesSinceKeyframe = 0
+        self.previousGray = gray
+        if not results.multi_hand_landmarks:
+            # nothing to track, the next frame runs the inference again
+            self.trackedPoints = None
+            return
+        height, width = gray.shape
+        landmarks = np.array([[(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark]
+                              for hand_landmarks in results.multi_hand_landmarks], dtype=np.float32)
+        self.trackedPoints = (landmarks[..., :2] * (width, height)).reshape(-1, 1, 2).astype(np.float32)
+        self.trackedDepth = landmarks[..., 2]
+        self.trackedHandedness = results.multi_handedness
+
+    def track(self, gray):
+        """
+        Track the landmarks from the previous frame, return mediapipe like results or None if the tracking failed
+        """
+        points, status, error = cv2.calcOpticalFlowPyrLK(self.previousGray, gray, self.trackedPoints, None,
+                                                         winSize=(15, 15), maxLevel=2)
+        if points is None or not status.all() or float(error.mean()) > self.maxTrackingError:
+            return None
+        height, width = gray.shape
+        motion = float(np.linalg.norm(points - self.trackedPoints, axis=-1).mean()) / np.hypot(width, height)
+        if motion > self.maxMotion:
+            return None
+        self.trackedPoints = points
+        normalizedPoints = points.reshape(self.trackedDepth.shape + (2,)) / (width, height)
+        handLandmarks = [SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y), z=float(z))
+                                                   for (x, y), z in zip(hand, depth)])
+                         for hand, depth in zip(normalizedPoints, self.trackedDepth)]
+        return SimpleNamespace(multi_hand_landmarks=handLandmarks, multi_handedness=self.trackedHandedness)
+
+
+class MPSolutionExtractor(BaseExtractor):
+    """
+    Base class of the single subject mediapipe solutions (pose, face mesh, holistic),
+    every frame gives a fixed number of landmarks and the missing parts are zeros
+    """
+    # (results attribute, number of landmarks) of every part of the feature vector
+    landmarkParts = []
+
+    def __init__(self, extractor = None, features_size = 0, feature_dimensions = 1,
+                 normalized = False, includeDepth = False, **modelOptions):
+        """
+        Parameters
+        ----------
+        normalized : bool return float coordinates normalized to 0->1 instead of integer pixel coordinates
+        includeDepth : bool add the z-depth of every landmark to its x, y coordinates
+        modelOptions : keyword arguments of the mediapipe solution
+        """
+        super().__init__(extractor, features_size, feature_dimensions)
+        self.normalized = normalized
+        self.includeDepth = includeDepth
+        self.coordinateDimensions = 3 if includeDepth else 2
+        self.landmarkCount = sum(count for _, count in self.landmarkParts)
+        self.features_size = self.landmarkCount * self.coordinateDimensions
+        self.feature_dimensions = 1
+        self.landmarkBuffer = np.empty((self.landmarkCount, self.coordinateDimensions), dtype=np.float32)
+        self.model = self.createModel(**modelOptions)
+        self.options.update(normalized=normalized, includeDepth=includeDepth, **modelOptions)
+
+    @abstractmethod
+    def createModel(self, **modelOptions):
+        """ Create the mediapipe solution """
+
+    def extract(self, inputData):
+        rgbData = cv2.cvtColor(inputData, cv2.COLOR_BGR2RGB)
+        rgbData.flags.writeable = False
+        if self.profiler is None:
+            results = self.model.process(rgbData)
+        else:
+            start = time.monotonic_ns()
+            results = self.model.process(rgbData)
+            self.profiler.record('inference', start)
+        parts = []
+        for attribute, count in self.landmarkParts:
+            part = getattr(results, attribute, None)
+            # the multi subject results (eg : multi_face_landmarks) keep the first subject
+            if isinstance(part, (list, tuple)):
+                part = part[0] if part else None
+            parts.append((part, count))
+        if all(part is None for part, _ in parts):
+            return None
+        offset = 0
+        for part, count in parts:
+            target = self.landmarkBuffer[offset:offset + count]
+            if part is None:
+                target[:] = 0
+            else:
+                landmarks = part.landmark[:count]
+                if self.includeDepth:
+                    coordinates = (c for lm in landmarks for c in (lm.x, lm.y, lm.z))
+                else:
+                    coordinates = (c for lm in landmarks for c in (lm.x, lm.y))
+                target.reshape(-1)[:] = np.fromiter(coordinates, dtype=np.float32, count=target.size)
+            offset += count
+        if self.normalized:
+            return self.landmarkBuffer.reshape(1, -1).copy()
+        scale = np.array([inputData.shape[1], inputData.shape[0], inputData.shape[1]][:self.coordinateDimensions], dtype=np.float32)
+        return (self.landmarkBuffer * scale).reshape(1, -1).astype(np.int32)
+
+
+class MPPoseExtractor(MPSolutionExtractor):
+    """ Class for extracting the 33 body pose landmarks """
+    landmarkParts = [('pose_landmarks', 33)]
+
+    def createModel(self, **modelOptions):
+        options = dict(model_complexity=0, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+        options.update(modelOptions)
+        return mp.solutions.pose.Pose(**options)
+
+
+class MPFaceMeshExtractor(MPSolutionExtractor):
+    """ Class for extracting the 468 face mesh landmarks of the first face """
+    landmarkParts = [('multi_face_landmarks', 468)]
+
+    def createModel(self, **modelOptions):
+        options = dict(max_num_faces=1, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+        options.update(modelOptions)
+        return mp.solutions.face_mesh.FaceMesh(**options)
+
+
+class MPHolisticExtractor(MPSolutionExtractor):
+    """ Class for extracting the pose, left hand and right hand landmarks """
+    landmarkParts = [('pose_landmarks', 33), ('left_hand_landmarks', 21), ('right_hand_landmarks', 21)]
+
+    def createModel(self, **modelOptions):
+        options = dict(model_complexity=0, min_detection_confidence=0.5, min_tracking_confidence=0.5)
+        options.update(modelOptions)
+        return mp.solutions.holistic.Holistic(**options)
+
+
+# name -> extractor class of the available extractors
+EXTRACTORS = {}
+
+
+def registerExtractor(name, extractorClass = None):
+    """
+    Register an extractor class under a name, usable as a decorator
+
+    Parameters
+    ----------
+    name : str name given to getExtractor and Snap(featureExtractor=name)
+    extractorClass : BaseExtractor subclass
+    """
+    def register(extractorClass):
+        if not issubclass(extractorClass, BaseExtractor):
+            raise ValueError("The extractor have to be a subclass of BaseExtractor")
+        EXTRACTORS[name] = extractorClass
+        return extractorClass
+    return register(extractorClass) if extractorClass else register
+
+
+def getExtractor(name = 'hand', **options):
+    """
+    Create a registered extractor
+
+    Parameters
+    ----------
+    name : str registered extractor name
+    options : keyword arguments of the extractor
+
+    Return
+    ----------
+    BaseExtractor
+    """
+    if name not in EXTRACTORS:
+        raise ValueError(f"The {name} extractor is not registered please use one of the following {list(EXTRACTORS)}")
+    return EXTRACTORS[name](extractor=name, **options)
+
+
+def createExtractor(featureExtractor = None, **options):
+    """
+    Return an extractor from an extractor instance, a registered name, an extractor class or None (hand extractor)
+    """
+    if isinstance(featureExtractor, BaseExtractor):
+        return featureExtractor
+    if featureExtractor is None:
+        return getExtractor('hand', **options)
+    if isinstance(featureExtractor, str):
+        return getExtractor(featureExtractor, **options)
+    if isinstance(featureExtractor, type) and issubclass(featureExtractor, BaseExtractor):
+        return featureExtractor(**options)
+    raise ValueError("The feature extractor have to be an extractor, a registered extractor name or an extractor class")
+
+
+registerExtractor('hand', MPExtractor)
+registerExtractor('adaptive_hand', AdaptiveMPExtractor)
+registerExtractor('pose', MPPoseExtractor)
+registerExtractor('face_mesh', MPFaceMeshExtractor)
+registerExtractor('holistic', MPHolisticExtractor)
@@ -8,22 +8,52 @@ class Labeler:
         # inactivate label stream functionality
         self.labelStreamerActive = False
         self.streamerCurrentTime = None
-        # initialize labels list
+        # capture schedule driving the current label
+        self.schedule = None
+        # initialize labels list, the display and rotation order of the labels
         if not labelList:
             self.labelList = []
         else:
             self.labelList = labelList
+        # append only label names indexed by label ID, the captured samples store the IDs so reordering
+        # labelList never changes the label of a captured sample
+        self.vocabulary = list(self.labelList)
+        # label -> label ID map for O(1) lookups, the first occurrence of a label keeps its ID
+        self.labelIDs = {}
+        for ID, label in enumerate(self.vocabulary):
+            self.labelIDs.setdefault(label, ID)
+
+    def getLabelID(self, label):
+        """
+        Get the integer ID of a label, None if the label is not in the list
+
+        Parameters
+        ----------
+        label : str
+        """
+        return self.labelIDs.get(label)
+
+    def getLabelName(self, ID):
+        """
+        Get the label of an integer label ID
+
+        Parameters
+        ----------
+        ID : int
+        """
+        return self.vocabulary[ID]
     
     def getLabels(self):
         """
-        Get the current list of labels.
+        Get the label names indexed by label ID, used to decode the captured label IDs
+        (the display order set by changeLabelPlace is labelList)
         
         Parameters
         ----------
         """
-        if self.labelList:
-            # return the label list
-            return self.labelList
+        if self.vocabulary:
+            # return the label names in ID order
+            return self.vocabulary
         else:
             return False
         
@@ -44,10 +74,12 @@ class Labeler:
         if not isinstance(label, str):
             return False
         # check if the input label is already in  the list
-        elif label.lower() in self.labelList:
+        elif label.lower() in self.labelIDs:
             return False
         # if checks are passed append label to the list
         else:
+            self.labelIDs[label] = len(self.vocabulary)
+            self.vocabulary.append(label)
             self.labelList.append(label)
             return True
     
@@ -62,7 +94,7 @@ class Labeler:
         else:
             # remove the label
             self.labelList.remove(label)
-            # insert the label to the neo location
+            # insert the label to the neo location, the label IDs do not change
             self.labelList.insert(newPlace, label)
             return True
         
@@ -75,17 +107,17 @@ class Labeler:
             return False
         # if label is not None set current label
         if isinstance(label, str):
-            # try to get the current label index
-            try:
-                self.currentLabelIndex = self.labelList.index(label.lower())
+            # get the current label index
+            if label.lower() in self.labelIDs:
+                self.currentLabelIndex = self.labelIDs[label.lower()]
                 return True
-            # if the label is not found in the label list raise an exception
-            except ValueError:
+            # if the label is not found in the label list
+            else:
                 print("This label is not in the labels list")
                 return False
         elif isinstance(ID, int):
             # check if the id in the valid label list range
-            if ID in range(len(self.labelList) + 1):
+            if ID in range(len(self.vocabulary) + 1):
                 self.currentLabelIndex = ID
                 return True
             # throw exception if id is out of range
@@ -96,14 +128,44 @@ class Labeler:
             print("The input value is not valid if you want to set the current label by ID \
             please specify the ID by the keyword argument ID (eg : setCurrentLabel(ID = 3))")
 
-    def getCurrentLabel(self):
+    def updateCurrentLabel(self, timestamp = None):
+        # check if a capture schedule drives the labels
+        if self.schedule:
+            # the schedule gives the label of the capture window of the frame timestamp (now by default) in O(1)
+            position = self.schedule.labelIndexAt(timestamp) % len(self.labelList)
+            # the labels rotate in the display order
+            self.currentLabelIndex = self.labelIDs[self.labelList[position]]
         # check if the label stream is active
-        if self.labelStreamerActive:
+        elif self.labelStreamerActive:
             # update the current label
             self.streamLabels(__startStream__=False)
-        
+
+    def getCurrentLabel(self, timestamp = None):
+        self.updateCurrentLabel(timestamp)
         # return current selected label
-        return self.labelList[self.currentLabelIndex]
+        return self.vocabulary[self.currentLabelIndex]
+
+    def getCurrentLabelID(self, timestamp = None):
+        """
+        Return the ID of the current label, timestamp is the monotonic capture time in ns of the frame
+        so a scheduled label follows the window the frame was captured in
+        """
+        self.updateCurrentLabel(timestamp)
+        # return the index of the current selected label
+        return self.currentLabelIndex
+
+    def followSchedule(self, schedule):
+        """
+        Rotate the current label with the capture windows of a CaptureSchedule
+
+        Parameters
+        ----------
+        schedule : CaptureSchedule
+        """
+        if not self.labelList:
+            raise Exception("No labels in the label list to schedule")
+        self.labelStreamerActive = False
+        self.schedule = schedule
 
     def streamLabels(self,timeInterval=5, reset=False, __startStream__=True):
         # check if the stream is being initialized
@@ -121,9 +183,9 @@ class Labeler:
             if self.labelList:
                 # activate the label stream
                 self.labelStreamerActive = True
-                # set the current label to the first label in the label list
-                self.setCurrentLabel(ID=self.labelStreamIterator)
-                self.streamerStartTime = time.time()
+                # set the current label to the first label in the label list, the stream follows the display order
+                self.currentLabelIndex = self.labelIDs[self.labelList[self.labelStreamIterator]]
+                self.streamerStartTime = time.monotonic()
                 return True
             else:
                 raise Exception("No labels in the label list to stream")
@@ -135,19 +197,20 @@ class Labeler:
         # check if the stream is active
         if self.labelStreamerActive:
             # get current time
-            self.streamerCurrentTime = time.time()
+            self.streamerCurrentTime = time.monotonic()
             # check if its time to update the current label
             if(self.streamerCurrentTime - self.streamerStartTime >= self.streamTimeInterval):
                 # update the label iterator
                 self.labelStreamIterator = self.labelStreamIterator+1
                 # set current label to the new value
-                self.setCurrentLabel(ID=self.labelStreamIterator)
+                self.currentLabelIndex = self.labelIDs[self.labelList[self.labelStreamIterator]]
                 # update the start time
-                self.streamerStartTime = time.time()
+                self.streamerStartTime = time.monotonic()
     
     def cancelStream(self):
-        # deactivate the label stream
+        # deactivate the label stream and the schedule
         self.labelStreamerActive = False
+        self.schedule = None
 
     def printLabels(self):
         print(self.labelList)
\ No newline at end of file
@@ -0,0 +1,210 @@
+import queue
+import threading
+import time
+from collections import deque
+import cv2
+
+
+class FramePacket:
+    """ Class holding a captured frame and its state while it moves through the pipeline stages """
+    def __init__(self, index, image, active, labelID, sequenceID):
+        self.index = index
+        self.image = image
+        self.active = active
+        self.labelID = labelID
+        self.sequenceID = sequenceID
+        self.features = None
+        self.handedness = None
+        # monotonic timestamps in nanoseconds of every stage the packet passed
+        self.timestamps = {'capture': time.monotonic_ns()}
+
+
+class StageQueue:
+    """ Bounded queue connecting two pipeline stages """
+    def __init__(self, maxsize = 4, dropPolicy = 'latest'):
+        """
+        Parameters
+        ----------
+        maxsize : int maximum number of packets waiting in the queue
+        dropPolicy : str
+            'latest' drops the oldest waiting packet when the queue is full so the newest always wins,
+            'block' makes the producer wait until the consumer takes a packet
+        """
+        if dropPolicy not in ['latest', 'block']:
+            raise ValueError('The drop policy have to be either latest or block')
+        self.dropPolicy = dropPolicy
+        self.queue = queue.Queue(maxsize)
+        self.dropped = 0
+
+    def put(self, packet, stopEvent):
+        """ Put a packet in the queue, return False if the pipeline was stopped while waiting """
+        if self.dropPolicy == 'block':
+            while not stopEvent.is_set():
+                try:
+                    self.queue.put(packet, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        while True:
+            try:
+                self.queue.put_nowait(packet)
+                return True
+            except queue.Full:
+                # drop the oldest packet to make room for the newest one
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def close(self, stopEvent):
+        """ Signal the end of the stream to the consumer """
+        # the end of stream marker is never dropped by the latest policy since it is always the newest packet
+        self.put(None, stopEvent)
+
+    def get(self, stopEvent):
+        """ Get the next packet, return None at the end of the stream or if the pipeline was stopped """
+        while not stopEvent.is_set():
+            try:
+                return self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+
+class CapturePipeline:
+    """
+    Class running the camera capture and the feature extraction on separate threads
+    connected by bounded queues, the sink stage is consumed by the caller thread
+    """
+    def __init__(self, inputStream, extractor, activator, labeler,
+                 queueSize = 4, dropPolicy = 'latest', flip = True, sequenceID = 0, timingHistory = 1000,
+                 control = None):
+        """
+        Parameters
+        ----------
+        inputStream : object implementing isOpened/read (eg : cv2.VideoCapture)
+        extractor : BaseExtractor used to extract the features of the active frames
+        activator : Activator sampled on the capture thread for every frame
+        labeler : Labeler sampled on the capture thread for every active frame
+        queueSize : int size of the capture->extraction and extraction->sink queues
+        dropPolicy : str 'latest' or 'block' (see StageQueue)
+        flip : bool flip the frames horizontally as the live capture does
+        sequenceID : int the last used sequence ID
+        timingHistory : int number of recent packet timestamps kept in timings
+        control : CaptureControl whose frame, duration and empty frame limits stop the capture thread
+        """
+        self.inputStream = inputStream
+        self.extractor = extractor
+        self.activator = activator
+        self.labeler = labeler
+        self.flip = flip
+        self.sequenceID = sequenceID
+        self.extractQueue = StageQueue(queueSize, dropPolicy)
+        self.sinkQueue = StageQueue(queueSize, dropPolicy)
+        self.stopEvent = threading.Event()
+        self.threads = []
+        self.capturedFrames = 0
+        self.emptyFrames = 0
+        self.timings = deque(maxlen=timingHistory)
+        self.control = control
+        # exception raised by a stage thread, raised again by packets on the consumer thread
+        self.error = None
+
+    def start(self):
+        """ Start the capture and extraction threads """
+        self.stopEvent.clear()
+        self.error = None
+        self.threads = [threading.Thread(target=self._runStage, args=(self._capture, self.extractQueue),
+                                         name='snap-capture', daemon=True),
+                        threading.Thread(target=self._runStage, args=(self._extract, self.sinkQueue),
+                                         name='snap-extract', daemon=True)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        """ Stop the stages and wait for the threads to finish """
+        self.stopEvent.set()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def getDroppedFrames(self):
+        """ Return the number of frames dropped by the capture and extraction queues """
+        return self.extractQueue.dropped + self.sinkQueue.dropped
+
+    def packets(self):
+        """
+        Generator yielding the processed packets to the sink stage in capture order,
+        the exception of a failed stage is raised on the consumer thread
+        """
+        while True:
+            packet = self.sinkQueue.get(self.stopEvent)
+            if packet is None:
+                if self.error is not None:
+                    raise self.error
+                return
+            packet.timestamps['sink'] = time.monotonic_ns()
+            self.timings.append(packet.timestamps)
+            yield packet
+
+    def _runStage(self, stage, downstream):
+        # the downstream queue is always closed so its consumer never waits for a dead stage,
+        # a failure also stops the other stages
+        try:
+            stage()
+        except Exception as error:
+            self.error = error
+            self.stopEvent.set()
+        finally:
+            downstream.close(self.stopEvent)
+
+    def _capture(self):
+        latestActiveState = False
+        latestActivations = None
+        while not self.stopEvent.is_set() and self.inputStream.isOpened():
+            success, image = self.inputStream.read()
+            timestamp = time.monotonic_ns()
+            if self.control is not None:
+                self.control.onFrame(success, timestamp)
+            if not success:
+                self.emptyFrames += 1
+                print("Ignoring empty camera frame.")
+                if self.control is not None and self.control.shouldStop(timestamp=timestamp):
+                    break
+                continue
+            if self.flip:
+                image = cv2.flip(image, 1)
+            # sample the activation state at capture time so the sequence boundaries do not depend on the extraction rate
+            active, activations = self.activator.stateAt(timestamp)
+            if active and (not latestActiveState or activations != latestActivations):
+                self.sequenceID = self.sequenceID + 1
+            latestActiveState = active
+            latestActivations = activations
+            labelID = self.labeler.getCurrentLabelID(timestamp) if active else None
+            packet = FramePacket(self.capturedFrames, image, active, labelID, self.sequenceID)
+            packet.timestamps['capture'] = timestamp
+            self.capturedFrames += 1
+            if not self.extractQueue.put(packet, self.stopEvent):
+                break
+            if self.control is not None and self.control.shouldStop(timestamp=timestamp):
+                break
+
+    def _extract(self):
+        while True:
+            packet = self.extractQueue.get(self.stopEvent)
+            if packet is None:
+                break
+            packet.timestamps['extractStart'] = time.monotonic_ns()
+            # only the active frames are sent to the extractor
+            if packet.active:
+                if self.extractor.fixedShape:
+                    hands = self.extractor.extractHands(packet.image)
+                    if hands is not None:
+                        packet.features, packet.handedness = hands[0], hands[1]
+                else:
+                    packet.features = self.extractor.extract(packet.image)
+            packet.timestamps['extractEnd'] = time.monotonic_ns()
+            if not self.sinkQueue.put(packet, self.stopEvent):
+                return
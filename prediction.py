@@ -0,0 +1,346 @@
+import threading
+import time
+from abc import abstractmethod
+from collections import Counter, deque
+import numpy as np
+from pipeline import StageQueue
+
+
+class ModelAdapter:
+    """ Class giving a common interface to the classifiers used by the prediction mode """
+    @abstractmethod
+    def predict(self, windows):
+        """
+        Predict a batch of windows
+
+        Parameters
+        ----------
+        windows : float32 array of shape (windows, length, features)
+
+        Return
+        ----------
+        array of shape (windows,) of label IDs or (windows, labels) of scores whose columns are the label IDs
+        """
+
+
+class CallableModel(ModelAdapter):
+    """ Adapter of a function taking the (windows, length, features) batch """
+    def __init__(self, function):
+        self.function = function
+
+    def predict(self, windows):
+        return np.asarray(self.function(windows))
+
+
+class SklearnModel(ModelAdapter):
+    """
+    Adapter of a scikit-learn like estimator, the windows are flattened to (windows, length * features)
+    and the classes of the estimator (model.classes_, label IDs or label names) are mapped to the label IDs
+    """
+    def __init__(self, model, useProbabilities = True, labelNames = None):
+        """
+        Parameters
+        ----------
+        model : object implementing predict and / or predict_proba
+        useProbabilities : bool use predict_proba when the model has it so the scores can be smoothed
+        labelNames : list of label names indexed by the label IDs, needed by the estimators trained on label names
+        """
+        self.model = model
+        self.useProbabilities = hasattr(model, 'predict_proba') and (useProbabilities or not hasattr(model, 'predict'))
+        self.labelNames = labelNames
+        # label ID of every class of the estimator, computed on the first prediction
+        self.classIDs = None
+
+    def toLabelID(self, label):
+        """ Return the label ID of a class of the estimator, the class itself if it is not a known label """
+        if self.labelNames and str(label) in self.labelNames:
+            return self.labelNames.index(str(label))
+        if isinstance(label, (int, np.integer)):
+            return int(label)
+        return label
+
+    def getClassIDs(self):
+        if self.classIDs is None:
+            classes = getattr(self.model, 'classes_', None)
+            if classes is not None:
+                classIDs = [self.toLabelID(label) for label in classes]
+                if all(isinstance(labelID, int) and labelID >= 0 for labelID in classIDs):
+                    self.classIDs = np.array(classIDs)
+        return self.classIDs
+
+    def predict(self, windows):
+        windows = windows.reshape(len(windows), -1)
+        if self.useProbabilities:
+            scores = np.asarray(self.model.predict_proba(windows))
+            classIDs = self.getClassIDs()
+            if classIDs is None:
+                return scores
+            # the columns of predict_proba follow model.classes_, the returned columns are the label IDs
+            output = np.zeros((len(scores), max(classIDs.max() + 1, len(self.labelNames or ()))), dtype=scores.dtype)
+            output[:, classIDs] = scores
+            return output
+        labels = np.asarray(self.model.predict(windows))
+        if labels.dtype.kind in 'iu' and not self.labelNames:
+            return labels
+        return np.array([self.toLabelID(label) for label in labels.tolist()])
+
+
+class OnnxModel(ModelAdapter):
+    """ Adapter of an ONNX model run on the CPU with onnxruntime """
+    def __init__(self, model, inputName = None, flattenInput = False):
+        """
+        Parameters
+        ----------
+        model : path of the .onnx file or onnxruntime InferenceSession
+        inputName : str name of the model input, the first input by default
+        flattenInput : bool feed (windows, length * features) instead of (windows, length, features)
+        """
+        if isinstance(model, str):
+            # onnxruntime is only needed by the users of ONNX models
+            import onnxruntime
+            model = onnxruntime.InferenceSession(model, providers=['CPUExecutionProvider'])
+        self.session = model
+        self.inputName = inputName or self.session.get_inputs()[0].name
+        self.flattenInput = flattenInput
+
+    def predict(self, windows):
+        if self.flattenInput:
+            windows = windows.reshape(len(windows), -1)
+        return np.asarray(self.session.run(None, {self.inputName: windows.astype(np.float32, copy=False)})[0])
+
+
+def createModel(model, labelNames = None):
+    """
+    Return the ModelAdapter of a model
+
+    Parameters
+    ----------
+    model : ModelAdapter, path of an .onnx file, onnxruntime InferenceSession, object implementing predict
+        (scikit-learn like) or function taking the (windows, length, features) batch
+    labelNames : list of label names indexed by the label IDs, used to map the classes of the estimators
+    """
+    if isinstance(model, SklearnModel) and model.labelNames is None:
+        model.labelNames = labelNames
+    if isinstance(model, ModelAdapter):
+        return model
+    if isinstance(model, str) and model.endswith('.onnx'):
+        return OnnxModel(model)
+    if hasattr(model, 'get_inputs') and hasattr(model, 'run'):
+        return OnnxModel(model)
+    if hasattr(model, 'predict') or hasattr(model, 'predict_proba'):
+        return SklearnModel(model, labelNames=labelNames)
+    if callable(model):
+        return CallableModel(model)
+    raise ValueError("The model have to be a ModelAdapter, an onnx model, an estimator implementing predict or a function")
+
+
+class RollingWindow:
+    """
+    Class holding the latest rows of a sequence, the rows are written twice in a buffer of twice the window
+    length so the window is always a contiguous view
+    """
+    def __init__(self, length, featureSize, dtype = np.float32):
+        self.length = length
+        self.buffer = np.zeros((2 * length, featureSize), dtype=dtype)
+        self.position = 0
+        self.count = 0
+
+    def reset(self):
+        self.position = 0
+        self.count = 0
+
+    def push(self, features):
+        self.buffer[self.position] = features
+        self.buffer[self.position + self.length] = features
+        self.position = (self.position + 1) % self.length
+        self.count += 1
+
+    def isFull(self):
+        return self.count >= self.length
+
+    def window(self):
+        """ Return a view of the latest length rows from the oldest to the newest """
+        return self.buffer[self.position:self.position + self.length]
+
+
+class PredictionSmoother:
+    """
+    Class smoothing the successive predictions of a sequence, label scores are averaged with an exponential
+    moving average and label IDs with a majority vote over the latest predictions
+    """
+    def __init__(self, alpha = 0.5, history = 5):
+        """
+        Parameters
+        ----------
+        alpha : float weight of the newest scores in the moving average
+        history : int number of latest label IDs of the majority vote
+        """
+        if not 0 < alpha <= 1:
+            raise ValueError("The smoothing factor have to be in ]0, 1]")
+        self.alpha = alpha
+        self.history = deque(maxlen=history)
+        self.scores = None
+
+    def reset(self):
+        self.history.clear()
+        self.scores = None
+
+    def smooth(self, output):
+        """ Return the smoothed (label ID, score) of a model output """
+        output = np.asarray(output)
+        if output.ndim == 0:
+            self.history.append(output.item())
+            labelID, votes = Counter(self.history).most_common(1)[0]
+            return labelID, votes / len(self.history)
+        self.scores = output if self.scores is None else self.alpha * output + (1 - self.alpha) * self.scores
+        labelID = int(np.argmax(self.scores))
+        return labelID, float(self.scores[labelID])
+
+
+class Prediction:
+    """ Class holding a prediction and the capture timestamp of the newest frame of its window """
+    def __init__(self, labelID, label, score, sequenceID, timestamp, latency):
+        self.labelID = labelID
+        self.label = label
+        self.score = score
+        self.sequenceID = sequenceID
+        self.timestamp = timestamp
+        # time in nanoseconds between the capture of the newest frame and the prediction
+        self.latency = latency
+
+    def __repr__(self):
+        return f"Prediction({self.label!r}, score={self.score:.2f}, latency={self.latency / 1e6:.1f} ms)"
+
+
+class Predictor:
+    """
+    Class feeding the features of the live frames to a model on a worker thread
+
+    The features of every sequence are kept in a rolling window, a full window is handed to the worker
+    every stride frames through a one slot queue so the worker always predicts the newest window,
+    the windows older than the latency budget are dropped before the inference
+    """
+    def __init__(self, model, windowLength, stride = 1, latencyBudget = None, smoothing = None,
+                 labelNames = None, onPrediction = None, latencyHistory = 10000):
+        """
+        Parameters
+        ----------
+        model : model or ModelAdapter (see createModel)
+        windowLength : int number of frames per window
+        stride : int number of frames between two predictions of a sequence
+        latencyBudget : float maximum time in seconds between the capture of the newest frame of a window
+            and the start of its inference, the older windows are dropped
+        smoothing : PredictionSmoother smoothing the predictions of a sequence, no smoothing if None
+        labelNames : list of label names indexed by the predicted label IDs
+        onPrediction : function called with every Prediction on the worker thread
+        latencyHistory : int number of latest latencies kept for the statistics
+        """
+        if windowLength <= 0 or stride <= 0:
+            raise ValueError("The window length and stride have to be greater than zero")
+        self.model = createModel(model, labelNames)
+        self.windowLength = windowLength
+        self.stride = stride
+        self.latencyBudget = None if latencyBudget is None else int(latencyBudget * 1e9)
+        self.smoothing = smoothing
+        self.labelNames = labelNames
+        self.onPrediction = onPrediction
+        self.window = None
+        self.sequenceID = None
+        self.framesSinceSubmit = 0
+        self.queue = StageQueue(1, 'latest')
+        self.stopEvent = threading.Event()
+        self.thread = None
+        self.latest = None
+        self.latencies = deque(maxlen=latencyHistory)
+        self.predictions = 0
+        self.staleWindows = 0
+
+    def start(self):
+        """ Start the worker thread """
+        self.stopEvent.clear()
+        self.thread = threading.Thread(target=self._predict, name='snap-predict', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """ Stop the worker once its current prediction is done, a waiting window is dropped """
+        if self.thread is None:
+            return
+        self.queue.close(self.stopEvent)
+        self.thread.join()
+        self.thread = None
+
+    def push(self, features, sequenceID, timestamp = None):
+        """
+        Add the features of a frame to the window of its sequence
+
+        Parameters
+        ----------
+        features : array like of the frame features
+        sequenceID : int sequence of the frame, a new sequence starts a new window
+        timestamp : int monotonic capture time of the frame in ns
+        """
+        features = np.asarray(features, dtype=np.float32).reshape(-1)
+        if self.window is None:
+            self.window = RollingWindow(self.windowLength, features.shape[0])
+        if sequenceID != self.sequenceID:
+            self.sequenceID = sequenceID
+            self.window.reset()
+            self.framesSinceSubmit = 0
+        self.window.push(features)
+        self.framesSinceSubmit += 1
+        if self.window.isFull() and (self.window.count == self.windowLength or self.framesSinceSubmit >= self.stride):
+            self.framesSinceSubmit = 0
+            timestamp = time.monotonic_ns() if timestamp is None else timestamp
+            # the rolling buffer keeps changing so the worker gets a copy of the window
+            self.queue.put((self.window.window().copy(), sequenceID, timestamp), self.stopEvent)
+
+    def getLatest(self):
+        """ Return the latest Prediction, None before the first one """
+        return self.latest
+
+    def getDroppedWindows(self):
+        """ Return the number of windows replaced by a newer one before the worker took them """
+        return self.queue.dropped
+
+    def getLatencyStats(self):
+        """
+        Return the frame to prediction latency statistics in milliseconds over the latest predictions
+        with the prediction and dropped window counts
+        """
+        stats = {'predictions': self.predictions, 'droppedWindows': self.getDroppedWindows(),
+                 'staleWindows': self.staleWindows}
+        if self.latencies:
+            latencies = np.asarray(self.latencies) / 1e6
+            stats.update({'p50': float(np.percentile(latencies, 50)), 'p99': float(np.percentile(latencies, 99)),
+                          'mean': float(latencies.mean()), 'max': float(latencies.max())})
+        return stats
+
+    def _predict(self):
+        latestSequenceID = None
+        while True:
+            item = self.queue.get(self.stopEvent)
+            if item is None:
+                return
+            window, sequenceID, timestamp = item
+            if self.latencyBudget is not None and time.monotonic_ns() - timestamp > self.latencyBudget:
+                self.staleWindows += 1
+                continue
+            output = self.model.predict(window[np.newaxis])[0]
+            # the smoothing state is only touched by the worker, it restarts with every sequence
+            if self.smoothing is not None and sequenceID != latestSequenceID:
+                self.smoothing.reset()
+            latestSequenceID = sequenceID
+            if self.smoothing is not None:
+                labelID, score = self.smoothing.smooth(output)
+            elif np.ndim(output) == 0:
+                labelID, score = output.item(), 1.0
+            else:
+                labelID = int(np.argmax(output))
+                score = float(output[labelID])
+            latency = time.monotonic_ns() - timestamp
+            label = self.labelNames[labelID] if self.labelNames and isinstance(labelID, (int, np.integer)) else labelID
+            self.latest = Prediction(labelID, label, score, sequenceID, timestamp, latency)
+            self.latencies.append(latency)
+            self.predictions += 1
+            if self.onPrediction is not None:
+                self.onPrediction(self.latest)
@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import deque
+import cv2
+
+
+class CaptureControl:
+    """
+    Class deciding when a capture loop stops, replaces the ESC keypress so the capture can run without a display
+    """
+    def __init__(self, maxFrames = None, maxSamples = None, maxSeconds = None, maxEmptyFrames = None):
+        """
+        Parameters
+        ----------
+        maxFrames : int number of captured frames after which the capture stops
+        maxSamples : int number of dataset samples after which the capture stops
+        maxSeconds : float capture duration after which the capture stops, measured from the first frame
+        maxEmptyFrames : int number of consecutive empty frames after which the capture stops (end of a video)
+        """
+        self.maxFrames = maxFrames
+        self.maxSamples = maxSamples
+        self.maxSecondsNs = None if maxSeconds is None else int(maxSeconds * 1e9)
+        self.maxEmptyFrames = maxEmptyFrames
+        self.stopEvent = threading.Event()
+        self.startTime = None
+        self.frames = 0
+        self.emptyFrames = 0
+        self.consecutiveEmptyFrames = 0
+
+    def stop(self):
+        """ Request the capture to stop, can be called from any thread """
+        self.stopEvent.set()
+
+    def onFrame(self, success, timestamp = None):
+        """ Count a frame read by the capture loop """
+        if self.startTime is None:
+            self.startTime = time.monotonic_ns() if timestamp is None else timestamp
+        if success:
+            self.frames += 1
+            self.consecutiveEmptyFrames = 0
+        else:
+            self.emptyFrames += 1
+            self.consecutiveEmptyFrames += 1
+
+    def stopRequested(self, samples = 0):
+        """ Return True once stop() was called or the sample limit was reached """
+        return self.stopEvent.is_set() or (self.maxSamples is not None and samples >= self.maxSamples)
+
+    def shouldStop(self, samples = 0, timestamp = None):
+        """ Return True once stop() was called or one of the limits was reached """
+        if self.stopRequested(samples):
+            return True
+        if self.maxFrames is not None and self.frames >= self.maxFrames:
+            return True
+        if self.maxEmptyFrames is not None and self.consecutiveEmptyFrames >= self.maxEmptyFrames:
+            return True
+        if self.maxSecondsNs is not None and self.startTime is not None:
+            if timestamp is None:
+                timestamp = time.monotonic_ns()
+            return timestamp - self.startTime >= self.maxSecondsNs
+        return False
+
+
+class PreviewSink:
+    """ Class receiving the captured frames for display, the base sink drops them """
+    def show(self, image, control):
+        """
+        Show a captured frame
+
+        Parameters
+        ----------
+        image : BGR frame
+        control : CaptureControl of the capture, the sink can stop the capture with control.stop()
+        """
+        pass
+
+    def close(self):
+        """ Release the display resources at the end of the capture """
+        pass
+
+
+class WindowPreview(PreviewSink):
+    """ Class showing the frames in an OpenCV window, ESC stops the capture """
+    def __init__(self, windowName = 'MediaPipe Hands', fps = None, waitMs = 5, stopKey = 27):
+        """
+        Parameters
+        ----------
+        windowName : str name of the OpenCV window
+        fps : float maximum refresh rate of the window, every frame is shown if None
+        waitMs : int time given to the window event loop per shown frame
+        stopKey : int key code stopping the capture, None to ignore the keyboard
+        """
+        self.windowName = windowName
+        self.intervalNs = int(1e9 / fps) if fps else 0
+        self.waitMs = waitMs
+        self.stopKey = stopKey
+        self.latestShow = None
+
+    def show(self, image, control):
+        now = time.monotonic_ns()
+        # skip the frames coming before the next refresh so the capture does not wait for the display
+        if self.latestShow is not None and now - self.latestShow < self.intervalNs:
+            return
+        self.latestShow = now
+        cv2.imshow(self.windowName, image)
+        key = cv2.waitKey(self.waitMs) & 0xFF
+        if self.stopKey is not None and key == self.stopKey:
+            control.stop()
+
+    def close(self):
+        if self.latestShow is not None:
+            cv2.destroyWindow(self.windowName)
+
+
+class FrameTap(PreviewSink):
+    """ Class keeping the latest frames in memory (eg : for tests or a web preview) """
+    def __init__(self, maxFrames = 1, copy = False):
+        """
+        Parameters
+        ----------
+        maxFrames : int number of latest frames kept
+        copy : bool keep copies of the frames instead of references
+        """
+        self.frames = deque(maxlen=maxFrames)
+        self.copy = copy
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def show(self, image, control):
+        with self.lock:
+            self.frames.append(image.copy() if self.copy else image)
+            self.count += 1
+
+    def latest(self):
+        """ Return the latest frame, None if no frame was received """
+        with self.lock:
+            return self.frames[-1] if self.frames else None
+
+
+def createPreview(preview):
+    """
+    Return the preview sink described by preview
+
+    Parameters
+    ----------
+    preview : PreviewSink, 'window' for an OpenCV window showing every frame, a number for an OpenCV window
+        refreshed at most that many times per second, or None / 'none' for no preview
+
+    Return
+    ----------
+    PreviewSink
+    """
+    if isinstance(preview, PreviewSink):
+        return preview
+    if preview is None or preview == 'none':
+        return PreviewSink()
+    if preview == 'window':
+        return WindowPreview()
+    if isinstance(preview, (int, float)) and not isinstance(preview, bool) and preview > 0:
+        return WindowPreview(fps=preview)
+    raise ValueError("The preview have to be a PreviewSink, 'window', 'none', None or a refresh rate")
@@ -0,0 +1,148 @@
+import json
+import time
+
+
+class LatencyHistogram:
+    """
+    HDR style histogram of durations in nanoseconds
+
+    The values are counted in logarithmic buckets, every power of two is split in 2 ** (subBucketBits - 1)
+    linear sub buckets so the relative error of the percentiles stays under 2 ** (1 - subBucketBits)
+    whatever the magnitude, recording a value is a few integer operations
+    """
+    def __init__(self, subBucketBits = 5):
+        self.subBucketBits = subBucketBits
+        self.counts = [0] * (64 << subBucketBits)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def bucketOf(self, value):
+        """ Return the bucket index of a value """
+        exponent = value.bit_length() - self.subBucketBits
+        if exponent <= 0:
+            return value
+        # the exponent selects the power of two, the leading bits of the value the sub bucket
+        return (exponent << self.subBucketBits) + (value >> exponent)
+
+    def valueOf(self, bucket):
+        """ Return the middle value of a bucket """
+        exponent = bucket >> self.subBucketBits
+        if exponent == 0:
+            return bucket
+        lower = (bucket & ((1 << self.subBucketBits) - 1)) << exponent
+        return lower + (1 << (exponent - 1))
+
+    def record(self, value):
+        """ Count a duration in nanoseconds """
+        value = max(int(value), 0)
+        self.counts[self.bucketOf(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """ Return the value under which percent % of the recorded values are, None if nothing was recorded """
+        if not self.count:
+            return None
+        rank = max(percent / 100 * self.count, 1)
+        seen = 0
+        for bucket, bucketCount in enumerate(self.counts):
+            seen += bucketCount
+            if seen >= rank:
+                return min(max(self.valueOf(bucket), self.min), self.max)
+        return self.max
+
+    def summary(self):
+        """ Return the count and the mean, p50, p90, p99 and max durations in milliseconds """
+        if not self.count:
+            return {'count': 0}
+        summary = {'count': self.count, 'mean': self.total / self.count / 1e6}
+        for percent in (50, 90, 99):
+            summary[f'p{percent}'] = self.percentile(percent) / 1e6
+        summary['max'] = self.max / 1e6
+        return summary
+
+
+class Profiler:
+    """
+    Class collecting the per stage durations and the event counters of a capture
+
+    The instrumented code holds a profiler reference that is None when the profiling is disabled,
+    so a disabled profiler costs a single None check per stage
+    """
+    def __init__(self, logPath = None, logInterval = 10.0):
+        """
+        Parameters
+        ----------
+        logPath : str path of a json lines file receiving a snapshot every logInterval seconds, no log if None
+        logInterval : float seconds between two snapshots of the log
+        """
+        self.logPath = logPath
+        self.logIntervalNs = int(logInterval * 1e9)
+        self.stages = {}
+        self.counters = {}
+        self.startTime = time.monotonic_ns()
+        self.nextLog = self.startTime + self.logIntervalNs
+
+    def record(self, stage, start, stop = None):
+        """
+        Count the duration of a stage
+
+        Parameters
+        ----------
+        stage : str name of the stage
+        start : int monotonic start time of the stage in ns
+        stop : int monotonic end time of the stage in ns, now by default
+
+        Return
+        ----------
+        stop, so consecutive stages can be chained
+        """
+        if stop is None:
+            stop = time.monotonic_ns()
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages.setdefault(stage, LatencyHistogram())
+        histogram.record(stop - start)
+        return stop
+
+    def count(self, name, increment = 1):
+        """ Increment an event counter """
+        self.counters[name] = self.counters.get(name, 0) + increment
+
+    def setCounter(self, name, value):
+        """ Set a counter maintained elsewhere (eg : the dropped frames of the pipeline queues) """
+        self.counters[name] = value
+
+    def reset(self):
+        self.stages = {}
+        self.counters = {}
+        self.startTime = time.monotonic_ns()
+        self.nextLog = self.startTime + self.logIntervalNs
+
+    def snapshot(self):
+        """ Return the stage durations summaries in milliseconds and the counters """
+        return {'elapsed': (time.monotonic_ns() - self.startTime) / 1e9,
+                'stages': {stage: histogram.summary() for stage, histogram in list(self.stages.items())},
+                'counters': dict(self.counters)}
+
+    def maybeLog(self, now = None):
+        """ Append a snapshot to the log once the log interval passed, called from the capture loop """
+        if self.logPath is None:
+            return
+        now = time.monotonic_ns() if now is None else now
+        if now >= self.nextLog:
+            self.nextLog = now + self.logIntervalNs
+            self.writeLog()
+
+    def writeLog(self):
+        """ Append a snapshot to the log """
+        if self.logPath is None:
+            return
+        with open(self.logPath, 'a') as file:
+            file.write(json.dumps(dict(self.snapshot(), time=time.time())) + '\n')
@@ -0,0 +1,87 @@
+import time
+from activation import Activator
+
+
+class CaptureSchedule:
+    """
+    Class describing timed capture windows declared up front, eg : 5 s on, 2 s off, 20 repetitions,
+    the state at any time is computed in O(1) from a monotonic clock
+    """
+    def __init__(self, onSeconds = 5, offSeconds = 0, repetitions = 1, repetitionsPerLabel = 1, delaySeconds = 0):
+        """
+        Parameters
+        ----------
+        onSeconds : float duration of every capture window
+        offSeconds : float pause after every capture window
+        repetitions : int number of capture windows, 0 repeats forever
+        repetitionsPerLabel : int number of consecutive windows sharing a label before the label is cycled
+        delaySeconds : float time before the first window
+        """
+        if onSeconds <= 0:
+            raise ValueError("The capture window can not be less than or equal zero")
+        if offSeconds < 0 or delaySeconds < 0:
+            raise ValueError("The pause and the delay can not be less than zero")
+        if repetitionsPerLabel <= 0:
+            raise ValueError("The repetitions per label can not be less than or equal zero")
+        self.onNs = int(onSeconds * 1e9)
+        self.periodNs = self.onNs + int(offSeconds * 1e9)
+        self.delayNs = int(delaySeconds * 1e9)
+        self.repetitions = repetitions
+        self.repetitionsPerLabel = repetitionsPerLabel
+        self.startTime = None
+
+    def start(self, timestamp = None):
+        """Start the schedule at a monotonic timestamp in ns (now by default)"""
+        self.startTime = time.monotonic_ns() if timestamp is None else timestamp
+
+    def windowAt(self, timestamp = None):
+        """
+        Return (active, window index) at a monotonic timestamp in ns, the window index is -1 before
+        the first window and the schedule starts on the first call if it was not started
+        """
+        if timestamp is None:
+            timestamp = time.monotonic_ns()
+        if self.startTime is None:
+            self.startTime = timestamp
+        elapsed = timestamp - self.startTime - self.delayNs
+        if elapsed < 0:
+            return False, -1
+        window = elapsed // self.periodNs
+        if self.repetitions and window >= self.repetitions:
+            return False, self.repetitions - 1
+        return elapsed - window * self.periodNs < self.onNs, window
+
+    def labelIndexAt(self, timestamp = None):
+        """Return the index of the label of the current (or last) capture window"""
+        _, window = self.windowAt(timestamp)
+        return max(window, 0) // self.repetitionsPerLabel
+
+    def isFinished(self, timestamp = None):
+        """Return True once the last capture window ended"""
+        if timestamp is None:
+            timestamp = time.monotonic_ns()
+        if not self.repetitions or self.startTime is None:
+            return False
+        return timestamp - self.startTime - self.delayNs >= (self.repetitions - 1) * self.periodNs + self.onNs
+
+
+class scheduledActivator(Activator):
+    """
+    Class used for activation by a CaptureSchedule instead of an input event
+    """
+    def __init__(self, schedule = None):
+        super().__init__()
+        self.event = schedule if schedule else CaptureSchedule()
+
+    def setEvent(self, event):
+        if not isinstance(event, CaptureSchedule):
+            raise ValueError('The event have to be a CaptureSchedule')
+        self.event = event
+
+    def isActive(self):
+        return self.event.windowAt()[0]
+
+    def stateAt(self, timestamp = None):
+        # every window is one activation so consecutive windows without a pause still get their own sequence
+        active, window = self.event.windowAt(timestamp)
+        return active, window
@@ -0,0 +1,214 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import cv2
+from buffer import SampleBuffer
+from feature_extraction import createExtractor
+
+
+class CaptureSource:
+    """ Class describing one camera (or any object implementing isOpened/read/release) of a capture session """
+    def __init__(self, sourceID, inputStream, activator = None, flip = True, maxEmptyFrames = 30):
+        """
+        Parameters
+        ----------
+        sourceID : int ID stored with every sample of the source
+        inputStream : object implementing isOpened/read/release (eg : cv2.VideoCapture)
+        activator : Activator of the source, every frame is captured if None
+        flip : bool flip the frames horizontally as the live capture does
+        maxEmptyFrames : int number of consecutive empty frames ending the source
+        """
+        self.sourceID = sourceID
+        self.inputStream = inputStream
+        self.activator = activator
+        self.flip = flip
+        self.maxEmptyFrames = maxEmptyFrames
+        self.sequenceID = 0
+        self.frames = 0
+        self.emptyFrames = 0
+        self.samples = 0
+        self.misses = 0
+        # frames whose extraction or write raised, counted in misses too
+        self.errors = 0
+        self.lastError = None
+
+
+class AsyncCaptureSession:
+    """
+    Class capturing several sources concurrently with asyncio, the frames of all the sources are extracted
+    on one shared pool of worker threads (every worker owns a clone of the extractor) and written in capture
+    order to one shared dataset tagged with the source ID and the monotonic capture timestamp
+    """
+    def __init__(self, sources, extractor = None, workers = None, queueSize = 4, labeler = None, dataset = None,
+                 featureTransform = None):
+        """
+        Parameters
+        ----------
+        sources : list of CaptureSource
+        extractor : extractor, registered extractor name or extractor class (see createExtractor)
+        workers : int number of extraction threads, defaults to the number of cores
+        queueSize : int number of frames of a source waiting for the extraction, the capture of the source waits
+            when it is full (backpressure)
+        labeler : Labeler giving the label of every sample, label ID 0 if None
+        dataset : SampleBuffer with the sourceID and timestamp extra columns receiving the samples
+            (and the hand slots of a fixed shape extractor)
+        featureTransform : FeatureTransformer computing the stored features from the extracted ones, None for raw features
+        """
+        self.sources = sources
+        self.extractor = createExtractor(extractor)
+        self.workers = workers or os.cpu_count() or 1
+        self.queueSize = queueSize
+        self.labeler = labeler
+        self.featureTransform = featureTransform
+        # the fixed shape layouts keep the handedness of their hand slots
+        self.dataset = dataset if dataset is not None else \
+            SampleBuffer(handSlots=self.extractor.maxHands if self.extractor.fixedShape else 0,
+                         extraColumns={'sourceID': np.int16, 'timestamp': np.int64})
+        self.sequenceID = 0
+        self.loop = None
+        self.stopEvent = None
+        # set by a stop before the session started
+        self.stopRequested = False
+
+    def stop(self):
+        """ Stop the session, can be called from any thread """
+        self.stopRequested = True
+        if self.loop is not None and self.stopEvent is not None:
+            self.loop.call_soon_threadsafe(self.stopEvent.set)
+
+    async def run(self, duration = None):
+        """
+        Capture until every source ended, stop() is called, duration seconds passed or the task is cancelled,
+        the sources are released and the pending frames written before returning
+
+        Return
+        ----------
+        the dataset SampleBuffer
+        """
+        self.loop = asyncio.get_running_loop()
+        self.stopEvent = asyncio.Event()
+        if self.stopRequested:
+            self.stopEvent.set()
+        local = threading.local()
+        sizeLock = threading.Lock()
+
+        def extractFrame(image):
+            # models are not shareable, every worker thread extracts with its own clone
+            if not hasattr(local, 'extractor'):
+                local.extractor = self.extractor.clone()
+            extractor = local.extractor
+            if extractor.fixedShape:
+                # the fixed shape layout has a fixed feature size, the handedness is written with the features
+                hands = extractor.extractHands(image)
+                return None if hands is None else hands[:2]
+            # every clone is pinned to the feature size locked by the first frame with features of any worker
+            # so the workers all write rows of the same width
+            featureSize = getattr(self.extractor, 'features_size', 0)
+            if featureSize:
+                extractor.features_size = featureSize
+            features = extractor.extract(image)
+            if features is not None and not featureSize and getattr(extractor, 'features_size', 0):
+                with sizeLock:
+                    if not self.extractor.features_size:
+                        self.extractor.features_size = extractor.features_size
+                if extractor.features_size != self.extractor.features_size:
+                    return None
+            return features
+
+        extractPool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='session-extract')
+        tasks = [asyncio.create_task(self.captureSource(source, extractPool, extractFrame)) for source in self.sources]
+        sourcesTask = asyncio.create_task(asyncio.wait(tasks))
+        stopTask = asyncio.create_task(self.stopEvent.wait())
+        try:
+            await asyncio.wait([sourcesTask, stopTask], timeout=duration, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # clean shutdown, also when the session task is cancelled
+            self.stopEvent.set()
+            results = await asyncio.shield(asyncio.gather(*tasks, sourcesTask, stopTask, return_exceptions=True))
+            extractPool.shutdown()
+        # a failing source does not stop the others but its error is raised once the session ended
+        for result in results[:len(tasks)]:
+            if isinstance(result, Exception):
+                raise result
+        return self.dataset
+
+    async def captureSource(self, source, extractPool, extractFrame):
+        # blocking reads run on a thread of their own so the sources do not wait for each other
+        readPool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'session-read-{source.sourceID}')
+        pending = asyncio.Queue(self.queueSize)
+        writer = asyncio.create_task(self.writeSource(source, pending))
+        latestActiveState = False
+        latestActivations = None
+        consecutiveEmptyFrames = 0
+        try:
+            while not self.stopEvent.is_set() and source.inputStream.isOpened():
+                success, image = await self.loop.run_in_executor(readPool, source.inputStream.read)
+                timestamp = time.monotonic_ns()
+                if not success:
+                    source.emptyFrames += 1
+                    consecutiveEmptyFrames += 1
+                    if consecutiveEmptyFrames >= source.maxEmptyFrames:
+                        break
+                    continue
+                consecutiveEmptyFrames = 0
+                source.frames += 1
+                if source.flip:
+                    image = cv2.flip(image, 1)
+                if source.activator is None:
+                    active, activations = True, None
+                else:
+                    active, activations = source.activator.stateAt(timestamp)
+                if active and (not latestActiveState or activations != latestActivations):
+                    # the sequence IDs are unique across the sources
+                    self.sequenceID += 1
+                    source.sequenceID = self.sequenceID
+                latestActiveState = active
+                latestActivations = activations
+                if not active:
+                    continue
+                labelID = self.labeler.getCurrentLabelID(timestamp) if self.labeler else 0
+                future = self.loop.run_in_executor(extractPool, extractFrame, image)
+                # waits when the source has queueSize frames in flight
+                await pending.put((future, labelID, source.sequenceID, timestamp))
+        finally:
+            # the writer only ends on the end marker or when cancelled, then nothing waits for the marker
+            if not writer.done():
+                await pending.put(None)
+            await writer
+            readPool.shutdown()
+            source.inputStream.release()
+
+    async def writeSource(self, source, pending):
+        # the frames of a source are written in capture order whatever order the workers finish in
+        while True:
+            item = await pending.get()
+            if item is None:
+                return
+            future, labelID, sequenceID, timestamp = item
+            # a failing frame is counted as a miss, the writer keeps draining the queue so the capture never
+            # waits on a full queue
+            try:
+                features = await future
+                if features is None:
+                    source.misses += 1
+                    continue
+                handedness = None
+                if isinstance(features, tuple):
+                    features, handedness = features
+                if self.featureTransform is not None:
+                    # the writers run on the event loop thread in capture order, so every sequence keeps
+                    # its previous frame for the temporal transforms
+                    features = self.featureTransform.transformOnline(features, sequenceID)
+                self.dataset.append(features, labelID, sequenceID, handedness,
+                                    sourceID=source.sourceID, timestamp=timestamp)
+            except Exception as error:
+                if not source.errors:
+                    print(f"Source {source.sourceID} : frame failed with {error!r}, the failed frames are counted as misses")
+                source.misses += 1
+                source.errors += 1
+                source.lastError = error
+                continue
+            source.samples += 1
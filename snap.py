@@ -1,11 +1,23 @@
-import numpy as np
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from activation import mouseActivator
 import pandas as pd
 from labeling import Labeler
 from matplotlib import pyplot as plt
-from feature_extraction import MPExtractor
+from feature_extraction import createExtractor
+from buffer import SampleBuffer
+from pipeline import CapturePipeline
+from session import AsyncCaptureSession
+from preview import CaptureControl, createPreview
+from export import WindowExporter
+from prediction import Predictor
+from profiling import Profiler
+from visualization import plotDataset, plotPoints
+from transforms import FeatureTransformer, TransformCache
+from storage import SegmentStore, migrateCsv
 import cv2
 import os
+import time
 
 
 class Snap:
@@ -21,99 +33,502 @@ class Snap:
         self.activator = activator
         self.sequenceID = 0
         self.latestActiveState = False
-        self.featureExtractor = MPExtractor(featureExtractor)
-        self.dataset = np.array([])
+        self.latestActivations = None
+        self.featureExtractor = createExtractor(featureExtractor)
+        self.dataset = SampleBuffer()
         self.dataset_dataframe = None
         self.FullDataset = None
         self.addedElementsToTimeSeries = 2
         self.columnsList = None
+        self.pipeline = None
+        self.control = None
+        # AsyncCaptureSession of the running multi source capture
+        self.session = None
+        self.profiler = None
+        self.featureTransform = None
         if labels == 'input':
             self.labeler = Labeler(labelList)
         if outputIndicator:
             self.outputIndicator = Indicator(outputIndicator)
 
-    def addData(self, inputStream):
+    def addData(self, inputStream, threaded = False, queueSize = 4, dropPolicy = 'latest', preview = 'window', control = None):
+        """
+        Capture the data of the input stream until the stream ends or the control stops the capture
+
+        Parameters
+        ----------
+        inputStream : object implementing isOpened/read/release (eg : cv2.VideoCapture)
+        threaded : bool run the camera read and the feature extraction on their own threads (see addDataThreaded)
+        queueSize, dropPolicy : queue settings of the threaded capture
+        preview : PreviewSink, 'window', a refresh rate or None for a headless capture (see createPreview)
+        control : CaptureControl deciding when the capture stops, ESC in the preview window also stops it
+        """
         self.inputStream = inputStream
+        self.control = control or CaptureControl()
+        previewSink = createPreview(preview)
+        if threaded:
+            return self.addDataThreaded(inputStream, queueSize=queueSize, dropPolicy=dropPolicy,
+                                        preview=previewSink, control=self.control)
         # Start stream
-        while self.inputStream.isOpened():
-            success, image = self.inputStream.read()
-            image = cv2.flip(image, 1)
-            self.imgShape = (image.shape[0], image.shape[1])
-            if self.activator.isActive() and not self.latestActiveState:
-                self.sequenceID = self.sequenceID + 1
-            if not success:
-                print("Ignoring empty camera frame.")
-                continue
-            if self.activator.isActive():
-                self.addSample(image)
-            self.latestActiveState = self.activator.isActive()
-            cv2.imshow('MediaPipe Hands',image)
-            if cv2.waitKey(5) & 0xFF == 27:
-                break
+        profiler = self.profiler
+        try:
+            while self.inputStream.isOpened():
+                if profiler is not None:
+                    frameStart = time.monotonic_ns()
+                success, image = self.inputStream.read()
+                timestamp = time.monotonic_ns()
+                self.control.onFrame(success, timestamp)
+                if profiler is not None:
+                    profiler.record('read', frameStart, timestamp)
+                if not success:
+                    print("Ignoring empty camera frame.")
+                    if profiler is not None:
+                        profiler.count('emptyFrames')
+                    if self.control.shouldStop(len(self.dataset), timestamp):
+                        break
+                    continue
+                image = cv2.flip(image, 1)
+                if profiler is not None:
+                    stageStart = profiler.record('flip', timestamp)
+                self.imgShape = (image.shape[0], image.shape[1])
+                # read the activation state once per frame, at the time the frame was captured
+                active, activations = self.activator.stateAt(timestamp)
+                if profiler is not None:
+                    profiler.record('activation', stageStart)
+                if active and (not self.latestActiveState or activations != self.latestActivations):
+                    self.sequenceID = self.sequenceID + 1
+                if active:
+                    self.addSample(image, timestamp)
+                self.latestActiveState = active
+                self.latestActivations = activations
+                if profiler is not None:
+                    stageStart = time.monotonic_ns()
+                previewSink.show(image, self.control)
+                if profiler is not None:
+                    frameEnd = profiler.record('display', stageStart)
+                    profiler.record('frame', frameStart, frameEnd)
+                    profiler.count('frames')
+                    profiler.maybeLog(frameEnd)
+                if self.control.shouldStop(len(self.dataset), timestamp):
+                    break
+        finally:
+            previewSink.close()
+            if profiler is not None:
+                profiler.writeLog()
 
+        self.buildDataFrame()
+        inputStream.release()
 
-        if not self.columnsList:
-            self.columnsList = [str(i) for i in range(self.featureExtractor.getFeatureSize())] + ['Label','Sequence ID']
-        self.dataset_dataframe = pd.DataFrame(self.dataset, columns=self.columnsList)
+    def addDataThreaded(self, inputStream, queueSize = 4, dropPolicy = 'latest', preview = 'window', control = None):
+        """
+        Capture the data with the camera read and the feature extraction running on their own threads,
+        the preview and the dataset writes stay on the calling thread
+
+        Parameters
+        ----------
+        inputStream : object implementing isOpened/read/release (eg : cv2.VideoCapture)
+        queueSize : int size of the bounded queues between the stages
+        dropPolicy : str 'latest' to drop the oldest waiting frames when a stage is behind
+            or 'block' to make the capture wait for the extraction
+        preview : PreviewSink, 'window', a refresh rate or None for a headless capture (see createPreview)
+        control : CaptureControl deciding when the capture stops, ESC in the preview window also stops it
+        """
+        self.inputStream = inputStream
+        self.control = control or CaptureControl()
+        previewSink = createPreview(preview)
+        self.prepareDataset()
+        self.pipeline = CapturePipeline(inputStream, self.featureExtractor, self.activator, self.labeler,
+                                        queueSize=queueSize, dropPolicy=dropPolicy, sequenceID=self.sequenceID,
+                                        control=self.control)
+        profiler = self.profiler
+        self.pipeline.start()
+        try:
+            for packet in self.pipeline.packets():
+                if profiler is not None:
+                    # the stage timestamps were taken by the pipeline threads
+                    timestamps = packet.timestamps
+                    profiler.record('captureQueue', timestamps['capture'], timestamps['extractStart'])
+                    profiler.record('extract', timestamps['extractStart'], timestamps['extractEnd'])
+                    profiler.record('sinkQueue', timestamps['extractEnd'], timestamps['sink'])
+                self.sequenceID = packet.sequenceID
+                if packet.active:
+                    if packet.features is not None:
+                        if profiler is not None:
+                            capacity = self.dataset.capacity
+                            stageStart = time.monotonic_ns()
+                        features = packet.features
+                        if self.featureTransform is not None:
+                            features = self.featureTransform.transformOnline(features, packet.sequenceID)
+                        self.dataset.append(features, packet.labelID, packet.sequenceID, packet.handedness)
+                        if profiler is not None:
+                            profiler.record('append', stageStart)
+                            if self.dataset.capacity != capacity:
+                                profiler.count('bufferGrowths')
+                    else:
+                        print("No sample feature")
+                        if profiler is not None:
+                            profiler.count('extractionMisses')
+                if profiler is not None:
+                    stageStart = time.monotonic_ns()
+                previewSink.show(packet.image, self.control)
+                if profiler is not None:
+                    frameEnd = profiler.record('display', stageStart)
+                    profiler.record('frame', packet.timestamps['capture'], frameEnd)
+                    profiler.count('frames')
+                    profiler.maybeLog(frameEnd)
+                # the frame limits stop the capture thread, the packets already captured are still written
+                if self.control.stopRequested(len(self.dataset)):
+                    break
+        finally:
+            self.pipeline.stop()
+            previewSink.close()
+            if profiler is not None:
+                profiler.setCounter('emptyFrames', self.pipeline.emptyFrames)
+                profiler.setCounter('droppedFrames', self.pipeline.getDroppedFrames())
+                profiler.writeLog()
+
+        self.buildDataFrame()
         inputStream.release()
-        cv2.destroyAllWindows()
 
-    def addSample(self, sample):
-        sampleFeature = self.featureExtractor.extract(sample)
-        sample = np.append(sampleFeature, [self.labeler.getCurrentLabel(), self.sequenceID])
+    def stop(self):
+        """ Stop the running capture or multi source capture, can be called from any thread """
+        if self.control is not None:
+            self.control.stop()
+        if self.session is not None:
+            self.session.stop()
+
+    def addDataSources(self, sources, duration = None, workers = None, queueSize = 4):
+        """
+        Capture several sources concurrently with an AsyncCaptureSession sharing the extractor and the feature
+        transform of the Snap, the samples are tagged with the sourceID and timestamp extra columns,
+        stop() ends the capture
+
+        When an event loop is already running on the calling thread (eg : in a Jupyter notebook) the session
+        runs on a helper thread with its own loop, addDataSourcesAsync can be awaited instead
+
+        Parameters
+        ----------
+        sources : list of CaptureSource
+        duration : float maximum capture duration in seconds, the capture runs until every source ended if None
+        workers : int number of extraction threads, defaults to the number of cores
+        queueSize : int number of frames of a source waiting for the extraction
+        """
+        capture = self.addDataSourcesAsync(sources, duration, workers, queueSize)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(capture)
+        # asyncio.run can not be nested in a running loop
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='snap-session') as executor:
+            return executor.submit(asyncio.run, capture).result()
+
+    async def addDataSourcesAsync(self, sources, duration = None, workers = None, queueSize = 4):
+        """ Awaitable version of addDataSources running the session on the current event loop """
+        if len(self.dataset):
+            raise ValueError("The multi source capture needs an empty dataset")
+        self.session = AsyncCaptureSession(sources, self.featureExtractor, workers=workers, queueSize=queueSize,
+                                           labeler=self.labeler, featureTransform=self.featureTransform)
+        self.session.sequenceID = self.sequenceID
+        try:
+            self.dataset = await self.session.run(duration)
+            self.sequenceID = self.session.sequenceID
+        finally:
+            self.session = None
+        return self.buildDataFrame()
+
+    def predict(self, inputStream, model, windowLength, stride = 1, latencyBudget = None, smoothing = None,
+                onPrediction = None, preview = 'window', control = None):
+        """
+        Run the live recognition, the features of the active frames are streamed to the model by a Predictor
+        and every activation starts a new window
+
+        Parameters
+        ----------
+        inputStream : object implementing isOpened/read/release (eg : cv2.VideoCapture)
+        model : model or ModelAdapter (see prediction.createModel)
+        windowLength : int number of frames per window
+        stride : int number of frames between two predictions
+        latencyBudget : float maximum age in seconds of a window at the start of its inference
+        smoothing : PredictionSmoother or None
+        onPrediction : function called with every Prediction on the prediction thread
+        preview : PreviewSink, 'window', a refresh rate or None (see createPreview), the latest prediction
+            is drawn on the previewed frames
+        control : CaptureControl deciding when the recognition stops
+
+        Return
+        ----------
+        the Predictor, getLatencyStats gives the p50/p99 frame to prediction latency
+        """
+        self.control = control or CaptureControl()
+        previewSink = createPreview(preview)
+        predictor = Predictor(model, windowLength, stride=stride, latencyBudget=latencyBudget, smoothing=smoothing,
+                              labelNames=self.labeler.getLabels() or None, onPrediction=onPrediction)
+        predictor.start()
+        try:
+            while inputStream.isOpened():
+                success, image = inputStream.read()
+                timestamp = time.monotonic_ns()
+                self.control.onFrame(success, timestamp)
+                if not success:
+                    if self.control.shouldStop(timestamp=timestamp):
+                        break
+                    continue
+                image = cv2.flip(image, 1)
+                active, activations = self.activator.stateAt(timestamp)
+                if active and (not self.latestActiveState or activations != self.latestActivations):
+                    self.sequenceID = self.sequenceID + 1
+                self.latestActiveState = active
+                self.latestActivations = activations
+                if active:
+                    if self.featureExtractor.fixedShape:
+                        hands = self.featureExtractor.extractHands(image)
+                        features = None if hands is None else hands[0]
+                    else:
+                        features = self.featureExtractor.extract(image)
+                    if features is not None:
+                        if self.featureTransform is not None:
+                            features = self.featureTransform.transformOnline(features, self.sequenceID)
+                        predictor.push(features, self.sequenceID, timestamp)
+                prediction = predictor.getLatest()
+                if prediction is not None:
+                    cv2.putText(image, f"{prediction.label} {prediction.score:.2f}", (10, 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                previewSink.show(image, self.control)
+                if self.control.shouldStop(timestamp=timestamp):
+                    break
+        finally:
+            predictor.stop()
+            previewSink.close()
+        inputStream.release()
+        return predictor
+
+    def prepareDataset(self):
+        """
+        Allocate the sample buffer with the hand slots of a fixed shape extractor before the first sample
+        """
+        if self.featureExtractor.fixedShape and len(self.dataset) == 0 and not self.dataset.handSlots:
+            featureSize = self.featureExtractor.getFeatureSize()
+            if self.featureTransform is not None:
+                featureSize = self.featureTransform.getOutputSize(featureSize)
+            self.dataset = SampleBuffer(featureSize, handSlots=self.featureExtractor.maxHands)
+
+    def setFeatureTransform(self, transforms, keepLandmarks = True):
+        """
+        Store derived features (eg : wrist relative, scale invariant landmarks, fingertip distances, joint angles,
+        velocities) computed after the extraction instead of the raw landmarks
+
+        Parameters
+        ----------
+        transforms : FeatureTransformer, list of LandmarkTransform, or None to store the raw landmarks
+        keepLandmarks : bool start the features of every hand with its transformed landmarks (list of transforms only)
+        """
+        if len(self.dataset):
+            raise ValueError("The feature transform can not be changed once samples were captured")
+        if transforms is not None and not isinstance(transforms, FeatureTransformer):
+            transforms = FeatureTransformer(transforms, getattr(self.featureExtractor, 'coordinateDimensions', 2),
+                                            keepLandmarks=keepLandmarks)
+        self.featureTransform = transforms
+        self.columnsList = None
+        self.dataset = SampleBuffer()
+
+    def addSample(self, sample, timestamp = None):
+        """
+        Extract and append the features of a frame, timestamp is its monotonic capture time in ns (now by default)
+        """
+        # the label is read for the capture time, the extraction may end in the next scheduled window
+        labelID = self.labeler.getCurrentLabelID(timestamp)
+        profiler = self.profiler
+        if profiler is not None:
+            capacity = self.dataset.capacity
+            stageStart = time.monotonic_ns()
+        handedness = None
+        if self.featureExtractor.fixedShape:
+            self.prepareDataset()
+            if self.featureTransform is None:
+                # the extractor writes the features and the handedness straight into the next buffer row
+                row = self.dataset.reserveRow()
+                found = self.featureExtractor.extractInto(sample, self.dataset.features[row], self.dataset.handedness[row])
+                if found:
+                    self.dataset.commitRow(labelID, self.sequenceID)
+                if profiler is not None:
+                    profiler.record('extract', stageStart)
+                    self._profileSample(profiler, found, capacity)
+                if not found:
+                    print("No sample feature")
+                return
+            hands = self.featureExtractor.extractHands(sample)
+            sampleFeature, handedness = (None, None) if hands is None else hands[:2]
+        else:
+            sampleFeature = self.featureExtractor.extract(sample)
+        if profiler is not None:
+            stageStart = profiler.record('extract', stageStart)
 
         if sampleFeature is not None:
-            if self.dataset.size == 0:
-                self.dataset = np.reshape(sample,(1,self.featureExtractor.getFeatureSize() + self.addedElementsToTimeSeries))
-            self.dataset = np.concatenate((self.dataset, 
-                                           np.reshape(sample,(1,self.featureExtractor.getFeatureSize() + self.addedElementsToTimeSeries))), axis = 0)
+            if self.featureTransform is not None:
+                # the derived features use the previous frames of the sequence for the velocities
+                sampleFeature = self.featureTransform.transformOnline(sampleFeature, self.sequenceID)
+                if profiler is not None:
+                    stageStart = profiler.record('transform', stageStart)
+            # append the features with the integer label ID and sequence ID in O(1)
+            self.dataset.append(sampleFeature, labelID, self.sequenceID, handedness)
+            if profiler is not None:
+                profiler.record('append', stageStart)
         else:
             print("No sample feature")
+        if profiler is not None:
+            self._profileSample(profiler, sampleFeature is not None, capacity)
+
+    def _profileSample(self, profiler, found, capacity):
+        if not found:
+            profiler.count('extractionMisses')
+        elif self.dataset.capacity != capacity:
+            profiler.count('bufferGrowths')
+
+    def enableProfiling(self, logPath = None, logInterval = 10.0):
+        """
+        Time the capture stages and count the empty frames, the dropped frames and the extraction misses,
+        the extractor and the activator report to the same profiler
+
+        Parameters
+        ----------
+        logPath : str path of a json lines file receiving the stats every logInterval seconds
+        logInterval : float seconds between two lines of the log
+
+        Return
+        ----------
+        the Profiler
+        """
+        self.profiler = Profiler(logPath, logInterval)
+        self.featureExtractor.profiler = self.profiler
+        self.activator.profiler = self.profiler
+        return self.profiler
+
+    def disableProfiling(self):
+        """ Remove the profiler, the instrumented code then only checks for None """
+        self.profiler = None
+        self.featureExtractor.profiler = None
+        self.activator.profiler = None
+
+    def stats(self):
+        """
+        Return the capture statistics: the number of samples and, when the profiling is enabled,
+        the per stage durations in milliseconds (count, mean, p50, p90, p99, max) and the counters
+        """
+        stats = {'samples': len(self.dataset), 'profiling': self.profiler is not None}
+        if self.profiler is not None:
+            stats.update(self.profiler.snapshot())
+        return stats
+
+    def getFeatureColumns(self):
+        """ Return the names of the feature columns, the derived feature names when a feature transform is set """
+        if self.featureTransform is not None and self.featureTransform.featureSize:
+            return self.featureTransform.featureNames()
+        return [str(i) for i in range(self.dataset.featureSize)]
+
+    def buildDataFrame(self):
+        """
+        Build dataset_dataframe from the sample buffer, the feature columns are a zero copy view of the buffer
+        """
+        if not self.columnsList:
+            self.columnsList = self.getFeatureColumns() + ['Label','Sequence ID']
+        self.dataset_dataframe = pd.DataFrame(self.dataset.getFeatures(), columns=self.columnsList[:-2], copy=False)
+        # decode the stored label IDs with the label vocabulary as a categorical column
+        labelNames = self.labeler.getLabels()
+        labelIDs = self.dataset.getLabels()
+        self.dataset_dataframe['Label'] = pd.Categorical.from_codes(labelIDs, categories=labelNames) if labelNames else labelIDs
+        self.dataset_dataframe['Sequence ID'] = self.dataset.getSequenceIDs()
+        return self.dataset_dataframe
+
+    def getStore(self, path = 'Data', datasetName = 'out'):
+        """
+        Return the SegmentStore of the dataset, a csv dataset saved by older versions is migrated on first use
+        """
+        store = SegmentStore(os.path.join(path, datasetName))
+        csvPath = os.path.join(path, datasetName + ".csv")
+        if not store.exists() and os.path.isfile(csvPath):
+            print(f"Migrating {csvPath} to {store.path}")
+            migrateCsv(csvPath, store)
+        return store
 
     def loadData(self, path = 'Data', datasetName = 'out', featureList = None):
-        if(os.path.exists(path+"/"+datasetName+".csv") and os.path.isfile(path+"/"+datasetName+".csv")):
-            self.FullDataset = pd.read_csv(path+"/"+datasetName+".csv",index_col=0)
-            return self.FullDataset
-        else:
-            return None
+        """
+        Load the saved dataset as a LazyDataset over its memory mapped segments, None if there is no dataset
+        """
+        self.FullDataset = self.getStore(path, datasetName).load()
+        return self.FullDataset
 
     def saveDataset(self, path = 'Data', datasetName = 'out', featureList = None):
-        if featureList:
-            if len(featureList) == self.dataset.shape[0] - 1:
-                self.featureList = featureList
+        """
+        Save the captured session as a new segment of the dataset, the previous sessions are not rewritten
+        """
+        if featureList and len(featureList) == self.dataset.featureSize:
+            self.featureList = featureList
         else:
-            self.featureList = [str(i) for i in range(self.dataset.shape[1] - 2)]
+            self.featureList = self.getFeatureColumns()
 
-        columnsList = self.featureList + ['Label','Sequence ID']
-        if not os.path.exists(path):
-            os.makedirs(path, exist_ok=True)
-            self.dataset_dataframe.to_csv(path+"/"+datasetName+".csv")
-        else:
-            self.FullDataset = self.loadData(path = path, datasetName = datasetName, featureList = featureList)
-            if self.FullDataset is not None:
-                self.FullDataset = pd.concat([self.FullDataset, self.dataset_dataframe], axis = 0)
-                self.FullDataset.reset_index(inplace=True, drop=True)
-            else:
-                self.FullDataset = self.dataset_dataframe
-            self.FullDataset.to_csv(path+"/"+datasetName+".csv")
+        store = self.getStore(path, datasetName)
+        store.appendSegment(self.dataset.getFeatures(), self.dataset.getLabels(), self.dataset.getSequenceIDs(),
+                            labelNames=self.labeler.getLabels() or None, featureColumns=self.featureList,
+                            handedness=self.dataset.getHandedness(), extraColumns=self.dataset.getExtraColumns())
+        self.FullDataset = store.load()
+
+    def exportWindows(self, exportPath, length, stride = 1, padding = None, labelMode = 'last',
+                      path = 'Data', datasetName = 'out'):
+        """
+        Export the saved sequences as fixed length sliding windows, only the sequences added since the last
+        export to exportPath are exported (see WindowExporter)
+
+        Return
+        ----------
+        the WindowExporter, its load method returns the memory mapped (windows, labels, sequenceIDs) parts
+        """
+        dataset = self.getStore(path, datasetName).load()
+        exporter = WindowExporter(exportPath, length, stride=stride, padding=padding, labelMode=labelMode)
+        if dataset is not None:
+            exporter.export(dataset)
+        return exporter
+
+    def loadDerivedFeatures(self, transforms, path = 'Data', datasetName = 'out', keepLandmarks = True):
+        """
+        Return the derived features of the saved raw landmarks, every segment is transformed once and cached
+        next to the dataset under the hash of the transform configuration
+
+        Parameters
+        ----------
+        transforms : FeatureTransformer or list of LandmarkTransform
+        keepLandmarks : bool start the features of every hand with its transformed landmarks (list of transforms only)
+
+        Return
+        ----------
+        list of the memory mapped (rows, derived features) arrays of the segments, None if there is no dataset
+        """
+        dataset = self.getStore(path, datasetName).load()
+        if dataset is None:
+            return None
+        if not isinstance(transforms, FeatureTransformer):
+            transforms = FeatureTransformer(transforms, getattr(self.featureExtractor, 'coordinateDimensions', 2),
+                                            keepLandmarks=keepLandmarks)
+        return TransformCache(transforms).load(dataset)
 
     def printDataset(self):
         print(self.dataset_dataframe)
 
-    def plotData(self, sliceOfInterest = [24,25]):
-        label_list = np.unique(self.dataset_dataframe.iloc[1:,-2])
-        fig, ax = plt.subplots()
-        #print(self.dataset.iloc[:,:-2])
-        data = self.dataset_dataframe.iloc[:,:-2]
-
-        dataOfInterest = data.iloc[:,sliceOfInterest]
-        plt.xlim(0, 600)
-        plt.ylim(0, 600)
-        colorIdx = 0
-
-        for index, row in dataOfInterest.iterrows():
-            plt.plot([int(point) for idx, point in enumerate(row) if idx%2 == 0], 
-                     [int(point) for idx, point in enumerate(row) if idx%2 != 0],'o' ,color = str(1/(2**(colorIdx/len(data)))))
-            colorIdx+=1
-        plt.gca().invert_yaxis()
+    def plotData(self, sliceOfInterest = [24,25], colorBy = 'order', maxPoints = 200000, saved = False):
+        """
+        Plot the landmarks of interest of the captured samples (or of the saved dataset) in one scatter call
+
+        Parameters
+        ----------
+        sliceOfInterest : list of the feature columns to plot (x, y pairs)
+        colorBy : str 'order', 'label' or 'sequence' (see visualization.plotPoints)
+        maxPoints : int maximum number of plotted samples, the samples are decimated above it
+        saved : bool plot the saved dataset loaded by loadData or saveDataset instead of the captured samples
+        """
+        if saved:
+            ax = plotDataset(self.FullDataset, sliceOfInterest, colorBy=colorBy, maxPoints=maxPoints)
+        else:
+            ax = plotPoints(self.dataset.getFeatures(), self.dataset.getLabels(), self.dataset.getSequenceIDs(),
+                            sliceOfInterest, colorBy=colorBy, labelNames=self.labeler.getLabels() or None,
+                            maxPoints=maxPoints)
+        ax.invert_yaxis()
         plt.show()
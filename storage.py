@@ -0,0 +1,377 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+
+MANIFEST_NAME = 'manifest.json'
+STORE_VERSION = 1
+# columns written by older versions of saveDataset when the index was reset twice
+LEGACY_INDEX_COLUMNS = ['level_0', 'index']
+
+
+def computeRuns(labels, sequenceIDs):
+    """
+    Find the runs of consecutive rows sharing the same sequence ID and label
+
+    Return
+    ----------
+    int64 array of shape (runs, 4) with the columns sequenceID, label, start row, stop row
+    """
+    labels = np.asarray(labels)
+    sequenceIDs = np.asarray(sequenceIDs)
+    if len(labels) == 0:
+        return np.empty((0, 4), dtype=np.int64)
+    changes = np.flatnonzero((np.diff(sequenceIDs) != 0) | (np.diff(labels) != 0)) + 1
+    starts = np.concatenate([[0], changes])
+    stops = np.concatenate([changes, [len(labels)]])
+    return np.stack([sequenceIDs[starts], labels[starts], starts, stops], axis=1).astype(np.int64)
+
+
+def _atomicSave(path, array):
+    # write to a temporary file and rename it so a crash never leaves a partial file behind
+    temporaryPath = path + '.tmp'
+    with open(temporaryPath, 'wb') as file:
+        np.save(file, array)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporaryPath, path)
+
+
+class SegmentStore:
+    """
+    Class storing a dataset as a directory of append only .npy segments and a json manifest
+
+    Every saved session is one segment made of three memory mappable arrays:
+    <segment>.features.npy (rows x features), <segment>.labels.npy and <segment>.sequences.npy.
+    The manifest holds the schema, the label vocabulary and the rows and sequence range of every segment,
+    it is rewritten atomically after the segment files so it is the commit point of a save.
+    Every segment also has a small <segment>.index.npy of its (sequenceID, label, start, stop) runs
+    so the sequences can be located without reading the segment rows.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.manifestPath = os.path.join(path, MANIFEST_NAME)
+        self.manifest = None
+
+    def exists(self):
+        return os.path.isfile(self.manifestPath)
+
+    def readManifest(self):
+        """ Read the manifest from the disk, return None if the store does not exist """
+        if not self.exists():
+            return None
+        with open(self.manifestPath) as file:
+            self.manifest = json.load(file)
+        return self.manifest
+
+    def _writeManifest(self):
+        temporaryPath = self.manifestPath + '.tmp'
+        with open(temporaryPath, 'w') as file:
+            json.dump(self.manifest, file, indent=1)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporaryPath, self.manifestPath)
+
+    def _create(self, featureColumns, featureDtype, labelDtype, sequenceDtype):
+        os.makedirs(self.path, exist_ok=True)
+        self.manifest = {'version': STORE_VERSION,
+                         'featureColumns': list(featureColumns),
+                         'featureDtype': np.dtype(featureDtype).str,
+                         'labelDtype': np.dtype(labelDtype).str,
+                         'sequenceDtype': np.dtype(sequenceDtype).str,
+                         'labels': [],
+                         'lastSequenceID': 0,
+                         'segments': []}
+
+    def segmentFiles(self, segmentName):
+        """ Return the paths of the features, labels and sequences arrays of a segment """
+        return tuple(os.path.join(self.path, f"{segmentName}.{kind}.npy") for kind in ('features', 'labels', 'sequences'))
+
+    def handednessFile(self, segmentName):
+        """ Return the path of the handedness array of a fixed shape segment """
+        return os.path.join(self.path, f"{segmentName}.handedness.npy")
+
+    def columnFile(self, segmentName, name):
+        """ Return the path of an extra column of a segment """
+        return os.path.join(self.path, f"{segmentName}.{name}.npy")
+
+    def indexFile(self, segmentName):
+        """ Return the path of the sequence runs index of a segment """
+        return os.path.join(self.path, f"{segmentName}.index.npy")
+
+    def appendSegment(self, features, labels, sequenceIDs, labelNames = None,
+                      featureColumns = None, renumberSequences = True, handedness = None, extraColumns = None):
+        """
+        Write a new segment and commit it to the manifest, the existing segments are not touched
+
+        Parameters
+        ----------
+        features : array of shape (rows, features)
+        labels : array of label IDs indexing labelNames (or the label values if labelNames is None)
+        sequenceIDs : array of sequence IDs
+        labelNames : list of label names indexed by the label IDs of the segment
+        featureColumns : list of feature column names, defaults to "0", "1", ...
+        renumberSequences : bool shift the sequence IDs after the last stored sequence ID
+            so the sequences of different sessions do not collide
+        handedness : int8 array of shape (rows, hand slots) of a fixed shape layout, stored as <segment>.handedness.npy
+        extraColumns : dict name -> array of rows values of additional columns, stored as <segment>.<name>.npy
+
+        Return
+        ----------
+        the segment entry added to the manifest, None if there were no rows
+        """
+        features = np.asarray(features)
+        labels = np.asarray(labels)
+        sequenceIDs = np.asarray(sequenceIDs)
+        if len(labels) == 0:
+            return None
+        if features.ndim != 2:
+            features = features.reshape(len(labels), -1)
+        if featureColumns is None:
+            featureColumns = [str(i) for i in range(features.shape[1])]
+        if self.readManifest() is None:
+            self._create(featureColumns, np.float32, np.int16, np.int32)
+        if len(featureColumns) != len(self.manifest['featureColumns']):
+            raise ValueError(f"The store has {len(self.manifest['featureColumns'])} features "
+                             f"but the segment has {len(featureColumns)}")
+
+        # map the label IDs of the segment to the vocabulary of the store
+        if labelNames is None:
+            labelNames, labels = np.unique(labels, return_inverse=True)
+        vocabulary = self.manifest['labels']
+        labelIDs = {label: labelID for labelID, label in enumerate(vocabulary)}
+        for label in map(str, labelNames):
+            if label not in labelIDs:
+                labelIDs[label] = len(vocabulary)
+                vocabulary.append(label)
+        labelMap = np.array([labelIDs[str(label)] for label in labelNames], dtype=np.int64)
+        labels = labelMap[labels]
+
+        if renumberSequences:
+            sequenceIDs = sequenceIDs + self.manifest['lastSequenceID']
+
+        segmentName = f"segment-{len(self.manifest['segments']):05d}"
+        featuresPath, labelsPath, sequencesPath = self.segmentFiles(segmentName)
+        _atomicSave(featuresPath, features.astype(self.manifest['featureDtype'], copy=False))
+        _atomicSave(labelsPath, labels.astype(self.manifest['labelDtype'], copy=False))
+        _atomicSave(sequencesPath, sequenceIDs.astype(self.manifest['sequenceDtype'], copy=False))
+        _atomicSave(self.indexFile(segmentName), computeRuns(labels, sequenceIDs))
+        if handedness is not None:
+            _atomicSave(self.handednessFile(segmentName), np.asarray(handedness, dtype=np.int8))
+        extraColumns = extraColumns or {}
+        for name, values in extraColumns.items():
+            _atomicSave(self.columnFile(segmentName, name), np.asarray(values))
+
+        segment = {'name': segmentName, 'rows': int(len(labels)),
+                   'sequenceRange': [int(sequenceIDs.min()), int(sequenceIDs.max())],
+                   'columns': list(extraColumns)}
+        self.manifest['segments'].append(segment)
+        self.manifest['lastSequenceID'] = max(self.manifest['lastSequenceID'], segment['sequenceRange'][1])
+        self._writeManifest()
+        return segment
+
+    def load(self):
+        """ Return a LazyDataset over the committed segments, None if the store does not exist """
+        if self.readManifest() is None:
+            return None
+        return LazyDataset(self, self.manifest)
+
+
+class LazyDataset:
+    """ Class presenting the memory mapped segments of a SegmentStore as one concatenated dataset """
+    def __init__(self, store, manifest):
+        self.store = store
+        self.manifest = manifest
+        self.featureColumns = manifest['featureColumns']
+        self.labelNames = manifest['labels']
+        self.labelIDs = {label: labelID for labelID, label in enumerate(self.labelNames)}
+        self.segmentRows = np.array([segment['rows'] for segment in manifest['segments']], dtype=np.int64)
+        # offsets[i] is the first row of segment i
+        self.offsets = np.concatenate([[0], np.cumsum(self.segmentRows)])
+        self._segments = {}
+        self._sequenceIndex = None
+        self._labelIndex = None
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    @property
+    def shape(self):
+        return (len(self), len(self.featureColumns) + 2)
+
+    def getSegment(self, index):
+        """ Return the memory mapped (features, labels, sequenceIDs) arrays of a segment """
+        if index not in self._segments:
+            paths = self.store.segmentFiles(self.manifest['segments'][index]['name'])
+            self._segments[index] = tuple(np.load(path, mmap_mode='r') for path in paths)
+        return self._segments[index]
+
+    def getSegmentHandedness(self, index):
+        """ Return the memory mapped (rows, hand slots) handedness of a segment, None if it has none """
+        path = self.store.handednessFile(self.manifest['segments'][index]['name'])
+        return np.load(path, mmap_mode='r') if os.path.isfile(path) else None
+
+    def getSegmentColumn(self, index, name):
+        """ Return the memory mapped values of an extra column of a segment, None if the segment does not have it """
+        segment = self.manifest['segments'][index]
+        if name not in segment.get('columns', []):
+            return None
+        return np.load(self.store.columnFile(segment['name'], name), mmap_mode='r')
+
+    def rows(self, start = 0, stop = None):
+        """
+        Return the (features, labels, sequenceIDs) of the rows start->stop, only the segments
+        overlapping the range are read and a single segment range is returned as a memory mapped view
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        first = int(np.searchsorted(self.offsets, start, side='right')) - 1
+        parts = []
+        for index in range(max(first, 0), len(self.segmentRows)):
+            if self.offsets[index] >= stop:
+                break
+            segmentStart = max(start - self.offsets[index], 0)
+            segmentStop = min(stop, self.offsets[index + 1]) - self.offsets[index]
+            parts.append(tuple(array[segmentStart:segmentStop] for array in self.getSegment(index)))
+        if not parts:
+            return (np.empty((0, len(self.featureColumns)), dtype=self.manifest['featureDtype']),
+                    np.empty(0, dtype=self.manifest['labelDtype']),
+                    np.empty(0, dtype=self.manifest['sequenceDtype']))
+        if len(parts) == 1:
+            return parts[0]
+        return tuple(np.concatenate(columns) for columns in zip(*parts))
+
+    def toDataFrame(self, start = 0, stop = None):
+        """ Load the rows start->stop in a DataFrame with the Snap dataset columns """
+        features, labels, sequenceIDs = self.rows(start, stop)
+        dataFrame = pd.DataFrame(np.asarray(features), columns=self.featureColumns)
+        # the label IDs are decoded with the stored vocabulary as a categorical column
+        dataFrame['Label'] = pd.Categorical.from_codes(np.asarray(labels), categories=self.labelNames)
+        dataFrame['Sequence ID'] = np.asarray(sequenceIDs)
+        return dataFrame
+
+    def getSegmentIndex(self, index):
+        """ Return the (sequenceID, label, start, stop) runs of a segment """
+        indexPath = self.store.indexFile(self.manifest['segments'][index]['name'])
+        if os.path.isfile(indexPath):
+            return np.load(indexPath)
+        # segments written before the index existed are indexed from their labels and sequences
+        _, labels, sequenceIDs = self.getSegment(index)
+        return computeRuns(labels, sequenceIDs)
+
+    def buildIndex(self):
+        """
+        Build the sequence ID -> row ranges and label -> sequence IDs indexes from the segment indexes,
+        only the small index files are read
+        """
+        sequenceIndex = {}
+        labelIndex = {}
+        for index in range(len(self.segmentRows)):
+            for sequenceID, label, start, stop in self.getSegmentIndex(index).tolist():
+                sequenceIndex.setdefault(sequenceID, []).append((index, start, stop))
+                labelIndex.setdefault(label, {})[sequenceID] = None
+        self._sequenceIndex = sequenceIndex
+        self._labelIndex = {label: list(sequenceIDs) for label, sequenceIDs in labelIndex.items()}
+
+    def _labelID(self, label):
+        if label in self.labelIDs:
+            return self.labelIDs[label]
+        raise KeyError(f"{label} is not in the dataset labels")
+
+    def getSequenceIDs(self, label = None):
+        """
+        Return the stored sequence IDs in storage order
+
+        Parameters
+        ----------
+        label : str only return the sequences containing this label
+        """
+        if self._sequenceIndex is None:
+            self.buildIndex()
+        if label is None:
+            return list(self._sequenceIndex)
+        return list(self._labelIndex.get(self._labelID(label), []))
+
+    def getSequenceLength(self, sequenceID):
+        """ Return the number of rows of a sequence, only the index is read """
+        if self._sequenceIndex is None:
+            self.buildIndex()
+        if sequenceID not in self._sequenceIndex:
+            raise KeyError(f"Sequence {sequenceID} is not in the dataset")
+        return sum(stop - start for _, start, stop in self._sequenceIndex[sequenceID])
+
+    def getSequence(self, sequenceID):
+        """
+        Return the (features, labels) rows of a sequence, a sequence stored in one run is returned
+        as a memory mapped view without reading the other rows
+
+        Parameters
+        ----------
+        sequenceID : int
+
+        Return
+        ----------
+        (features of shape (rows, features), label IDs of shape (rows,))
+        """
+        if self._sequenceIndex is None:
+            self.buildIndex()
+        if sequenceID not in self._sequenceIndex:
+            raise KeyError(f"Sequence {sequenceID} is not in the dataset")
+        runs = self._sequenceIndex[sequenceID]
+        if len(runs) == 1:
+            index, start, stop = runs[0]
+            features, labels, _ = self.getSegment(index)
+            return features[start:stop], labels[start:stop]
+        parts = [(self.getSegment(index)[0][start:stop], self.getSegment(index)[1][start:stop])
+                 for index, start, stop in runs]
+        return np.concatenate([part[0] for part in parts]), np.concatenate([part[1] for part in parts])
+
+    def iterSequences(self, label = None):
+        """
+        Generator yielding (sequenceID, features, label IDs) of the sequences, optionally only those containing label
+        """
+        for sequenceID in self.getSequenceIDs(label):
+            features, labels = self.getSequence(sequenceID)
+            yield sequenceID, features, labels
+
+    def sampleSequences(self, count = 1, label = None, replace = False, rng = None):
+        """
+        Return count randomly chosen (sequenceID, features, label IDs), only the chosen sequences are read
+
+        Parameters
+        ----------
+        count : int number of sequences
+        label : str only sample the sequences containing this label
+        replace : bool sample with replacement
+        rng : numpy Generator or seed
+        """
+        rng = np.random.default_rng(rng)
+        sequenceIDs = self.getSequenceIDs(label)
+        chosen = rng.choice(len(sequenceIDs), size=count, replace=replace)
+        return [(sequenceIDs[i],) + self.getSequence(sequenceIDs[i]) for i in chosen]
+
+
+def migrateCsv(csvPath, store, chunkSize = 1000000):
+    """
+    Migrate a csv dataset written by Snap.saveDataset to a SegmentStore, one segment per chunk of rows
+
+    Parameters
+    ----------
+    csvPath : path to the csv dataset
+    store : SegmentStore receiving the rows
+    chunkSize : int number of csv rows per segment
+
+    Return
+    ----------
+    int number of migrated rows
+    """
+    migratedRows = 0
+    for chunk in pd.read_csv(csvPath, index_col=0, chunksize=chunkSize):
+        chunk = chunk.drop(columns=[column for column in LEGACY_INDEX_COLUMNS if column in chunk.columns])
+        featureColumns = [column for column in chunk.columns if column not in ('Label', 'Sequence ID')]
+        labelNames, labels = np.unique(chunk['Label'].astype(str).to_numpy(), return_inverse=True)
+        store.appendSegment(chunk[featureColumns].to_numpy(dtype=np.float32), labels,
+                            chunk['Sequence ID'].to_numpy(), labelNames=list(labelNames),
+                            featureColumns=featureColumns, renumberSequences=False)
+        migratedRows += len(chunk)
+    return migratedRows
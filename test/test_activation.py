@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+from collections import namedtuple
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from activation import SyntheticEventSource, keyboardEventActivator, mouseEventActivator
+
+
+# same fields as the mouse module MoveEvent, which has no event_type
+MoveEvent = namedtuple('MoveEvent', ['x', 'y', 'time'])
+
+
+def tick():
+    """ Wait until the monotonic clock moved so two events never share a timestamp """
+    start = time.monotonic_ns()
+    while time.monotonic_ns() == start:
+        pass
+    return time.monotonic_ns()
+
+
+def makeActivator(event = 'left'):
+    source = SyntheticEventSource()
+    activator = mouseEventActivator(event, eventSource=source)
+    activator.start()
+    return activator, source
+
+
+def test_press_release_edges():
+    activator, source = makeActivator()
+    assert activator.stateAt() == (False, 0)
+    source.press('left')
+    assert activator.stateAt() == (True, 1)
+    # a repeated down event is not a new press
+    source.press('left')
+    assert activator.stateAt() == (True, 1)
+    source.release('left')
+    assert activator.stateAt() == (False, 1)
+    assert [pressed for _, pressed in activator.edges] == [True, False]
+
+
+def test_other_buttons_and_move_events_are_ignored():
+    activator, source = makeActivator()
+    source.press('right')
+    for callback in source.callbacks:
+        callback(MoveEvent(1, 2, 0.0))
+    assert activator.stateAt() == (False, 0)
+    assert not activator.edges
+
+
+def test_stateAt_rolls_back_the_later_edges():
+    activator, source = makeActivator()
+    source.press('left')
+    frameTimestamp = tick()
+    tick()
+    source.release('left')
+    # the frame was captured while the button was pressed
+    assert activator.stateAt(frameTimestamp) == (True, 1)
+    assert activator.stateAt() == (False, 1)
+    before = activator.edges[0][0] - 1
+    assert activator.stateAt(before) == (False, 0)
+
+
+def test_repress_between_frames_starts_a_new_activation():
+    activator, source = makeActivator()
+    source.press('left')
+    firstFrame = activator.stateAt(tick())
+    # released and pressed again before the next frame was captured
+    source.release('left')
+    source.press('left')
+    secondFrame = activator.stateAt(tick())
+    assert firstFrame == (True, 1)
+    assert secondFrame == (True, 2)
+    assert len(activator.edgesBetween(activator.edges[0][0], tick())) == 2
+
+
+def test_keyboard_space_and_unhook():
+    source = SyntheticEventSource()
+    activator = keyboardEventActivator(' ', eventSource=source)
+    assert not activator.isActive()
+    source.press('space')
+    assert activator.isActive()
+    activator.stop()
+    source.release('space')
+    # a stopped activator is not hooked again by the queries and keeps its last state
+    assert activator.isActive()
+    assert activator.stateAt() == (True, 1)
+    assert not activator.hooked and not source.callbacks
+    activator.start()
+    source.release('space')
+    assert not activator.isActive()
+
+
+def test_double_click_is_a_press():
+    activator, source = makeActivator()
+    source.press('left')
+    source.release('left')
+    # the mouse module reports the second press of a double click as 'double'
+    source.emit('double', 'left')
+    assert activator.stateAt() == (True, 2)
+    source.release('left')
+    assert activator.stateAt() == (False, 2)
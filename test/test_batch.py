@@ -0,0 +1,53 @@
+import os
+import sys
+import numpy as np
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+cv2 = pytest.importorskip('cv2')
+pytest.importorskip('mediapipe')
+import batch
+from benchmark import stubExtractor
+
+
+def writeVideo(path, frames, frameShape = (48, 64)):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (frameShape[1], frameShape[0]))
+    for index in range(frames):
+        writer.write(np.full(frameShape + (3,), index, dtype=np.uint8))
+    writer.release()
+
+
+@pytest.mark.parametrize('missEvery, expected', [(1, 0), (0, 40)])
+def test_process_shard_with_batches_without_hands(tmp_path, missEvery, expected):
+    video = str(tmp_path / 'video.avi')
+    writeVideo(video, 40)
+    # every frame misses with missEvery=1, so every batch of 8 frames is empty
+    batch._workerExtractor = stubExtractor(missEvery=missEvery, features_size=42)
+    shard = {'file': video, 'start': 0, 'end': -1, 'labelID': 0, 'sequenceID': 1}
+    shardPath, samples, misses = batch._processShard(0, shard, str(tmp_path), False, 8)
+    assert samples == expected
+    assert misses == 40 - expected
+    with np.load(shardPath) as result:
+        assert result['features'].shape == (expected, 42)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_fixed_shape_extractMany_returns_the_handedness(workers):
+    extractor = stubExtractor(hands=2, missEvery=3, fixedShape=True, maxHands=2)
+    frames = [np.zeros((48, 64, 3), dtype=np.uint8)] * 6
+    features, found, handedness = extractor.extractMany(frames, workers=workers, returnHandedness=True)
+    assert features.shape == (6, 84)
+    assert found.sum() == 4
+    np.testing.assert_array_equal(handedness[found], np.tile([0, 1], (4, 1)))
+    # the two element form is kept for the existing callers
+    assert len(extractor.extractMany(frames)) == 2
+
+
+def test_process_shard_stores_the_handedness(tmp_path):
+    video = str(tmp_path / 'video.avi')
+    writeVideo(video, 10)
+    batch._workerExtractor = stubExtractor(hands=2, fixedShape=True, maxHands=2)
+    shard = {'file': video, 'start': 0, 'end': -1, 'labelID': 0, 'sequenceID': 1}
+    shardPath, samples, misses = batch._processShard(0, shard, str(tmp_path), False, 4)
+    assert samples == 10
+    with np.load(shardPath) as result:
+        np.testing.assert_array_equal(result['handedness'], np.tile([0, 1], (10, 1)))
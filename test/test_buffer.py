@@ -0,0 +1,53 @@
+import os
+import sys
+import numpy as np
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from buffer import SampleBuffer
+
+
+def test_append_grows_and_keeps_the_rows():
+    buffer = SampleBuffer(capacity=2)
+    for index in range(5):
+        buffer.append(np.full(3, index), index % 2, index // 2 + 1)
+    assert len(buffer) == 5
+    assert buffer.capacity == 8
+    assert buffer.featureSize == 3
+    np.testing.assert_array_equal(buffer.getFeatures()[:, 0], np.arange(5))
+    np.testing.assert_array_equal(buffer.getLabels(), [0, 1, 0, 1, 0])
+    np.testing.assert_array_equal(buffer.getSequenceIDs(), [1, 1, 2, 2, 3])
+
+
+def test_append_rejects_another_feature_size():
+    buffer = SampleBuffer(4)
+    with pytest.raises(ValueError):
+        buffer.append(np.zeros(5), 0, 1)
+
+
+def test_extend_grows_to_the_batch():
+    buffer = SampleBuffer(2, capacity=4)
+    buffer.append([1, 1], 0, 1)
+    buffer.extend(np.arange(20).reshape(10, 2), 1, np.arange(10))
+    assert len(buffer) == 11
+    assert buffer.capacity == 16
+    np.testing.assert_array_equal(buffer.getFeatures()[1:, 0], np.arange(0, 20, 2))
+    np.testing.assert_array_equal(buffer.getLabels()[1:], 1)
+
+
+def test_extend_with_an_empty_batch_adds_nothing():
+    buffer = SampleBuffer(42)
+    buffer.extend(np.zeros((0, 42)), 0, 1)
+    assert len(buffer) == 0
+    # before the feature size is known
+    buffer = SampleBuffer()
+    buffer.extend(np.zeros((0, 42)), 0, 1)
+    assert len(buffer) == 0 and buffer.featureSize == 0
+
+
+def test_hand_slots_and_extra_columns():
+    buffer = SampleBuffer(4, handSlots=2, extraColumns={'sourceID': np.int16})
+    buffer.append(np.ones(4), 0, 1, sourceID=3)
+    buffer.extend(np.zeros((2, 4)), 0, 2, handedness=np.array([[0, -1], [0, 1]]), sourceID=[4, 5])
+    np.testing.assert_array_equal(buffer.getHandedness(), [[-1, -1], [0, -1], [0, 1]])
+    np.testing.assert_array_equal(buffer.getHandMask()[2], [True, True])
+    np.testing.assert_array_equal(buffer.getColumn('sourceID'), [3, 4, 5])
@@ -0,0 +1,56 @@
+import os
+import sys
+import numpy as np
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from export import WindowExporter, slidingWindows, windowCount, windowLabels
+from storage import SegmentStore
+
+
+def test_sliding_windows_and_padding():
+    features = np.arange(10).reshape(5, 2)
+    windows = slidingWindows(features, 3, stride=2)
+    assert windows.shape == (2, 3, 2)
+    np.testing.assert_array_equal(windows[1], features[2:5])
+    assert np.shares_memory(windows, features)
+    # the padding completes the last window and the too short sequences
+    assert windowCount(4, 3, stride=2, padding='edge') == 2
+    np.testing.assert_array_equal(slidingWindows(features[:4], 3, 2, 'edge')[1], features[[2, 3, 3]])
+    np.testing.assert_array_equal(slidingWindows(features[:2], 3, padding='zero')[0], [[0, 1], [2, 3], [0, 0]])
+    assert len(slidingWindows(features[:2], 3)) == 0
+
+
+def test_window_labels():
+    labels = np.array([0, 0, 1, 1, 1])
+    np.testing.assert_array_equal(windowLabels(labels, 3), [1, 1, 1])
+    np.testing.assert_array_equal(windowLabels(labels, 3, labelMode='majority'), [0, 1, 1])
+    with pytest.raises(ValueError):
+        windowLabels(labels, 3, labelMode='first')
+
+
+def test_incremental_export(tmp_path):
+    store = SegmentStore(str(tmp_path / 'store'))
+    store.appendSegment(np.arange(12, dtype=np.float32).reshape(6, 2), [0] * 4 + [1] * 2, [1] * 4 + [2] * 2,
+                        labelNames=['wave', 'fist'])
+    exporter = WindowExporter(str(tmp_path / 'export'), 3)
+    part = exporter.export(store.load())
+    # the second sequence is too short for a window
+    assert part['windows'] == 2
+    store.appendSegment(np.zeros((3, 2), dtype=np.float32), [0] * 3, [1] * 3, labelNames=['fist'])
+    part = WindowExporter(str(tmp_path / 'export'), 3).export(store.load())
+    # only the new sequence is exported by the next run
+    assert part == {'name': 'part-00001', 'windows': 1, 'sequences': 1}
+    parts = exporter.load()
+    windows = np.concatenate([part[0] for part in parts])
+    np.testing.assert_array_equal(windows[1], np.arange(2, 8).reshape(3, 2))
+    np.testing.assert_array_equal(np.concatenate([part[1] for part in parts]), [0, 0, 1])
+    np.testing.assert_array_equal(np.concatenate([part[2] for part in parts]), [1, 1, 3])
+    assert exporter.export(store.load()) is None
+
+
+def test_the_windowing_can_not_change(tmp_path):
+    store = SegmentStore(str(tmp_path / 'store'))
+    store.appendSegment(np.zeros((4, 2), dtype=np.float32), [0] * 4, [1] * 4, labelNames=['wave'])
+    WindowExporter(str(tmp_path / 'export'), 3).export(store.load())
+    with pytest.raises(ValueError):
+        WindowExporter(str(tmp_path / 'export'), 2).export(store.load())
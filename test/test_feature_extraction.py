@@ -0,0 +1,23 @@
+import os
+import sys
+import numpy as np
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+pytest.importorskip('cv2')
+pytest.importorskip('mediapipe')
+from benchmark import stubExtractor
+
+
+def test_roi_crops_and_full_frames_run_on_their_own_model():
+    extractor = stubExtractor(roi=True, normalized=True)
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    # no previous hands, the first frame runs on the video mode model then the hands give the next crop
+    assert extractor.extract(frame) is not None
+    assert (extractor.hands.calls, extractor.roiHands.calls) == (1, 0)
+    assert extractor.previousBox is not None
+    assert extractor.extract(frame) is not None
+    assert (extractor.hands.calls, extractor.roiHands.calls) == (1, 1)
+
+
+def test_without_roi_there_is_no_image_mode_model():
+    assert stubExtractor().roiHands is None
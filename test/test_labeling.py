@@ -0,0 +1,56 @@
+import os
+import sys
+import numpy as np
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from labeling import Labeler
+from scheduling import CaptureSchedule
+
+SECOND = 10 ** 9
+
+
+def test_label_ids_follow_the_insertion_order():
+    labeler = Labeler(['wave', 'fist'])
+    assert labeler.addLabel('open')
+    assert not labeler.addLabel('open')
+    assert labeler.getLabelID('open') == 2
+    assert labeler.getLabelName(1) == 'fist'
+    assert labeler.getLabels() == ['wave', 'fist', 'open']
+
+
+def test_reordering_keeps_the_label_ids():
+    labeler = Labeler(['wave', 'fist', 'open'])
+    labeler.setCurrentLabel('wave')
+    capturedID = labeler.getCurrentLabelID()
+    assert labeler.changeLabelPlace('wave', 2)
+    assert labeler.labelList == ['fist', 'open', 'wave']
+    assert labeler.getLabelName(capturedID) == 'wave'
+    assert labeler.getLabels() == ['wave', 'fist', 'open']
+    assert labeler.getCurrentLabel() == 'wave'
+
+
+def test_schedule_rotates_in_the_display_order():
+    labeler = Labeler(['wave', 'fist', 'open'])
+    labeler.changeLabelPlace('open', 1)
+    schedule = CaptureSchedule(onSeconds=1, repetitions=0)
+    schedule.start(0)
+    labeler.followSchedule(schedule)
+    assert [labeler.getCurrentLabel(window * SECOND) for window in range(3)] == ['wave', 'open', 'fist']
+
+
+def test_captured_rows_keep_their_label_after_a_reorder():
+    pytest.importorskip('mediapipe')
+    pytest.importorskip('mouse')
+    pytest.importorskip('keyboard')
+    from benchmark import FakeVideoCapture, stubExtractor
+    from snap import Snap
+
+    snap = Snap(featureExtractor=stubExtractor(), labelList=['fist', 'wave'])
+    frame = FakeVideoCapture(frameShape=(48, 64, 3), poolSize=1).pool[0]
+    snap.sequenceID = 1
+    snap.labeler.setCurrentLabel('wave')
+    snap.addSample(frame)
+    snap.labeler.changeLabelPlace('wave', 1)
+    snap.labeler.changeLabelPlace('fist', 1)
+    dataframe = snap.buildDataFrame()
+    np.testing.assert_array_equal(dataframe['Label'].astype(str), ['wave'])
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import numpy as np
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from labeling import Labeler
+from scheduling import CaptureSchedule, scheduledActivator
+
+SECOND = 10 ** 9
+
+
+def test_windows_and_pauses():
+    schedule = CaptureSchedule(onSeconds=2, offSeconds=1, repetitions=3, delaySeconds=1)
+    schedule.start(0)
+    assert schedule.windowAt(0) == (False, -1)
+    assert schedule.windowAt(1 * SECOND) == (True, 0)
+    assert schedule.windowAt(3 * SECOND) == (False, 0)
+    assert schedule.windowAt(4 * SECOND) == (True, 1)
+    assert schedule.windowAt(9 * SECOND) == (False, 2)
+    assert not schedule.isFinished(8 * SECOND - 1)
+    assert schedule.isFinished(9 * SECOND)
+
+
+def test_endless_schedule_and_labels_per_window():
+    schedule = CaptureSchedule(onSeconds=1, repetitions=0, repetitionsPerLabel=2)
+    schedule.start(0)
+    assert [schedule.labelIndexAt(window * SECOND) for window in range(6)] == [0, 0, 1, 1, 2, 2]
+    assert schedule.windowAt(1000 * SECOND) == (True, 1000)
+    assert not schedule.isFinished(1000 * SECOND)
+
+
+def test_invalid_schedules():
+    with pytest.raises(ValueError):
+        CaptureSchedule(onSeconds=0)
+    with pytest.raises(ValueError):
+        CaptureSchedule(offSeconds=-1)
+    with pytest.raises(ValueError):
+        CaptureSchedule(repetitionsPerLabel=0)
+
+
+def test_activator_starts_a_sequence_per_window():
+    schedule = CaptureSchedule(onSeconds=1, repetitions=2)
+    schedule.start(0)
+    activator = scheduledActivator(schedule)
+    assert activator.stateAt(SECOND // 2) == (True, 0)
+    assert activator.stateAt(SECOND + 1) == (True, 1)
+    assert activator.stateAt(3 * SECOND) == (False, 1)
+
+
+def test_labeler_follows_the_frame_timestamp():
+    schedule = CaptureSchedule(onSeconds=1, repetitions=0)
+    schedule.start(0)
+    labeler = Labeler(['wave', 'fist'])
+    labeler.followSchedule(schedule)
+    assert labeler.getCurrentLabel(SECOND // 2) == 'wave'
+    assert labeler.getCurrentLabelID(SECOND + 1) == 1
+    assert labeler.getCurrentLabelID(2 * SECOND) == 0
+
+
+def test_scheduled_capture_keeps_one_label_per_sequence():
+    pytest.importorskip('mediapipe')
+    pytest.importorskip('mouse')
+    pytest.importorskip('keyboard')
+    from benchmark import FakeVideoCapture, stubExtractor
+    from preview import CaptureControl
+    from snap import Snap
+
+    extractor = stubExtractor()
+    process = extractor.hands.process
+
+    def slowProcess(image):
+        # an inference of 10 ms, the frames captured at the end of a window are extracted after it ended
+        time.sleep(0.01)
+        return process(image)
+
+    extractor.hands.process = slowProcess
+    schedule = CaptureSchedule(onSeconds=0.05, repetitions=6)
+    snap = Snap(activator=scheduledActivator(schedule), featureExtractor=extractor,
+                labelList=['wave', 'fist', 'open'])
+    snap.labeler.followSchedule(schedule)
+    snap.addData(FakeVideoCapture(frameShape=(48, 64, 3)), preview=None, control=CaptureControl(maxSeconds=0.4))
+    labels = snap.dataset.getLabels()
+    sequenceIDs = snap.dataset.getSequenceIDs()
+    assert len(np.unique(sequenceIDs)) >= 5
+    for sequenceID in np.unique(sequenceIDs):
+        assert len(np.unique(labels[sequenceIDs == sequenceID])) == 1
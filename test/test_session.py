@@ -0,0 +1,99 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import numpy as np
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+pytest.importorskip('mediapipe')
+pytest.importorskip('mouse')
+pytest.importorskip('keyboard')
+from benchmark import FakeVideoCapture, stubExtractor
+from session import AsyncCaptureSession, CaptureSource
+from snap import Snap
+
+
+def makeSources(frames = 20):
+    return [CaptureSource(sourceID, FakeVideoCapture(frames, frameShape=(48, 64, 3), seed=sourceID), maxEmptyFrames=1)
+            for sourceID in range(2)]
+
+
+def test_every_frame_of_every_source_is_written():
+    snap = Snap(featureExtractor=stubExtractor(), labelList=['wave'])
+    dataframe = snap.addDataSources(makeSources(), workers=2)
+    assert len(dataframe) == 40
+    sourceIDs = snap.dataset.getColumn('sourceID')
+    assert sorted(np.unique(sourceIDs)) == [0, 1]
+    # the frames of a source are written in capture order
+    for sourceID in range(2):
+        assert np.all(np.diff(snap.dataset.getColumn('timestamp')[sourceIDs == sourceID]) > 0)
+
+
+def test_addDataSources_in_a_running_event_loop():
+    snap = Snap(featureExtractor=stubExtractor(), labelList=['wave'])
+
+    async def notebookCell():
+        return snap.addDataSources(makeSources(), workers=2)
+
+    assert len(asyncio.run(notebookCell())) == 40
+
+
+def test_addDataSourcesAsync():
+    snap = Snap(featureExtractor=stubExtractor(), labelList=['wave'])
+    assert len(asyncio.run(snap.addDataSourcesAsync(makeSources(), workers=2))) == 40
+
+
+def test_snap_stop_ends_the_session():
+    snap = Snap(featureExtractor=stubExtractor(), labelList=['wave'])
+    timer = threading.Timer(0.3, snap.stop)
+    start = time.monotonic()
+    timer.start()
+    snap.addDataSources(makeSources(frames=None), workers=2)
+    assert time.monotonic() - start < 5
+    assert snap.session is None
+    assert len(snap.dataset) > 0
+
+
+def test_failing_frames_are_misses():
+    extractor = stubExtractor()
+    calls = []
+
+    def failing(image):
+        calls.append(image)
+        if len(calls) % 5 == 0:
+            raise RuntimeError("model failed")
+        return np.zeros(42, dtype=np.float32)
+
+    extractor.clone = lambda: extractor
+    extractor.extract = failing
+    sources = makeSources()
+    session = AsyncCaptureSession(sources, extractor, workers=1, queueSize=1)
+    dataset = asyncio.run(asyncio.wait_for(session.run(), 10))
+    assert len(dataset) == 32
+    assert sum(source.errors for source in sources) == 8
+
+
+def test_fixed_shape_sessions_keep_the_handedness():
+    snap = Snap(featureExtractor=stubExtractor(hands=2, fixedShape=True, maxHands=2), labelList=['wave'])
+    snap.addDataSources(makeSources(), workers=2)
+    assert len(snap.dataset) == 40
+    np.testing.assert_array_equal(snap.dataset.getHandedness(), np.tile([0, 1], (40, 1)))
+
+
+def test_extractors_without_the_base_constructor():
+    from feature_extraction import BaseExtractor
+
+    class ConstantExtractor(BaseExtractor):
+        def __init__(self):
+            self.features_size = 4
+            self.feature_dimensions = 1
+
+        def extract(self, inputData):
+            return np.ones(4)
+
+        def clone(self):
+            return ConstantExtractor()
+
+    snap = Snap(featureExtractor=ConstantExtractor(), labelList=['wave'])
+    assert len(snap.addDataSources(makeSources(), workers=2)) == 40
@@ -0,0 +1,86 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from storage import LEGACY_INDEX_COLUMNS, SegmentStore, migrateCsv
+
+
+def makeRows(rows, features = 3, start = 0):
+    return np.arange(start, start + rows * features, dtype=np.float32).reshape(rows, features)
+
+
+def test_segments_round_trip(tmp_path):
+    store = SegmentStore(str(tmp_path / 'store'))
+    store.appendSegment(makeRows(4), [0, 0, 1, 1], [1, 1, 2, 2], labelNames=['wave', 'fist'])
+    # the second session renumbers its sequences after the stored ones and reuses the vocabulary
+    store.appendSegment(makeRows(3, start=100), [0, 0, 1], [1, 1, 2], labelNames=['open', 'wave'])
+    dataset = SegmentStore(str(tmp_path / 'store')).load()
+    assert len(dataset) == 7
+    assert dataset.labelNames == ['wave', 'fist', 'open']
+    assert dataset.getSequenceIDs() == [1, 2, 3, 4]
+    assert dataset.getSequenceIDs('wave') == [1, 4]
+    features, labels = dataset.getSequence(3)
+    np.testing.assert_array_equal(features, makeRows(2, start=100))
+    np.testing.assert_array_equal(labels, [2, 2])
+    features, labels, sequenceIDs = dataset.rows(2, 6)
+    np.testing.assert_array_equal(features, np.concatenate([makeRows(4)[2:], makeRows(2, start=100)]))
+    np.testing.assert_array_equal(sequenceIDs, [2, 2, 3, 3])
+    dataFrame = dataset.toDataFrame()
+    assert list(dataFrame['Label'].astype(str)) == ['wave', 'wave', 'fist', 'fist', 'open', 'open', 'wave']
+
+
+def test_segments_without_rows_are_not_written(tmp_path):
+    store = SegmentStore(str(tmp_path / 'store'))
+    assert store.appendSegment(np.empty((0, 3)), [], []) is None
+    assert store.load() is None
+
+
+def test_handedness_and_extra_columns(tmp_path):
+    store = SegmentStore(str(tmp_path / 'store'))
+    store.appendSegment(makeRows(2), [0, 0], [1, 1], labelNames=['wave'], handedness=[[0, -1], [0, 1]],
+                        extraColumns={'sourceID': np.array([3, 4], dtype=np.int16)})
+    dataset = store.load()
+    np.testing.assert_array_equal(dataset.getSegmentHandedness(0), [[0, -1], [0, 1]])
+    np.testing.assert_array_equal(dataset.getSegmentColumn(0, 'sourceID'), [3, 4])
+    assert dataset.getSegmentColumn(0, 'timestamp') is None
+
+
+def test_migrate_csv(tmp_path):
+    features = makeRows(5)
+    dataFrame = pd.DataFrame(features, columns=['0', '1', '2'])
+    dataFrame['Label'] = ['wave', 'wave', 'wave', 'fist', 'fist']
+    dataFrame['Sequence ID'] = [7, 7, 7, 8, 8]
+    # older saveDataset versions wrote the index twice
+    dataFrame.insert(0, LEGACY_INDEX_COLUMNS[1], range(5))
+    csvPath = str(tmp_path / 'dataset.csv')
+    dataFrame.to_csv(csvPath)
+    store = SegmentStore(str(tmp_path / 'store'))
+    # the chunks split the first sequence over two segments
+    assert migrateCsv(csvPath, store, chunkSize=2) == 5
+    dataset = store.load()
+    assert len(dataset.manifest['segments']) == 3
+    assert dataset.featureColumns == ['0', '1', '2']
+    assert dataset.getSequenceIDs() == [7, 8]
+    sequence, labels = dataset.getSequence(7)
+    np.testing.assert_array_equal(sequence, features[:3])
+    assert [dataset.labelNames[label] for label in labels] == ['wave'] * 3
+
+
+def test_merged_shards_follow_the_stored_sequences(tmp_path):
+    pytest.importorskip('cv2')
+    from batch import mergeShards
+
+    store = SegmentStore(str(tmp_path / 'store'))
+    store.appendSegment(makeRows(2), [0, 0], [1, 2], labelNames=['wave'])
+    shardPaths = []
+    for index, sequenceID in enumerate([1, 1, 2]):
+        shardPaths.append(str(tmp_path / f'shard-{index}.npz'))
+        np.savez(shardPaths[-1], features=makeRows(2), labels=np.zeros(2, dtype=np.int16),
+                 sequenceIDs=np.full(2, sequenceID, dtype=np.int32))
+    dataset = mergeShards(shardPaths, ['fist'], store)
+    # the shards of one video keep sharing their sequence ID after the offset
+    assert dataset.getSequenceIDs() == [1, 2, 3, 4]
+    assert dataset.getSequenceLength(3) == 4
+    assert dataset.getSequenceIDs('fist') == [3, 4]
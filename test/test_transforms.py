@@ -0,0 +1,64 @@
+import os
+import sys
+import numpy as np
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from storage import SegmentStore
+from transforms import (FeatureTransformer, FingertipDistances, JointAngles, ScaleNormalize, TransformCache,
+                        Velocities, WristRelative)
+
+
+def makeTransformer():
+    return FeatureTransformer([WristRelative(), ScaleNormalize(), FingertipDistances(), JointAngles(), Velocities()],
+                              coordinateDimensions=2)
+
+
+def makeLandmarks(samples = 12, hands = 2, seed = 0):
+    features = np.random.default_rng(seed).random((samples, hands, 21, 2), dtype=np.float32)
+    # the second hand slot is empty on some frames like the fixed shape layout
+    features[::3, 1] = 0
+    return features.reshape(samples, -1)
+
+
+def test_online_matches_offline():
+    features = makeLandmarks()
+    sequenceIDs = np.repeat([1, 2, 3], 4)
+    offline = makeTransformer().transform(features, sequenceIDs)
+    transformer = makeTransformer()
+    online = np.stack([transformer.transformOnline(row, sequenceID) for row, sequenceID in zip(features, sequenceIDs)])
+    assert offline.shape == (12, transformer.getOutputSize(features.shape[1]))
+    np.testing.assert_allclose(online, offline, rtol=1e-6, atol=1e-6)
+    # the velocities restart with every sequence
+    assert not offline[4].reshape(2, -1)[:, -42:].any()
+
+
+def test_interleaved_sequences_keep_their_previous_frame():
+    features = makeLandmarks()
+    sequenceIDs = np.tile([1, 2], 6)
+    transformer = makeTransformer()
+    online = np.stack([transformer.transformOnline(row, sequenceID) for row, sequenceID in zip(features, sequenceIDs)])
+    for sequenceID in (1, 2):
+        rows = sequenceIDs == sequenceID
+        np.testing.assert_allclose(online[rows], makeTransformer().transform(features[rows]), rtol=1e-6, atol=1e-6)
+
+
+def test_feature_names_and_invalid_sizes():
+    transformer = makeTransformer()
+    names = transformer.featureNames(84)
+    assert len(names) == transformer.getOutputSize(84)
+    assert names[0] == 'hand0_0_x' and names[-1] == 'hand1_velocity_20_y'
+    with pytest.raises(ValueError):
+        transformer.transform(np.zeros((2, 43)))
+
+
+def test_cached_segments_match_the_offline_transform(tmp_path):
+    store = SegmentStore(str(tmp_path / 'store'))
+    features = makeLandmarks()
+    sequenceIDs = np.repeat([1, 2], 6)
+    store.appendSegment(features, np.zeros(12, dtype=np.int16), sequenceIDs, labelNames=['wave'])
+    cache = TransformCache(makeTransformer())
+    cached = cache.load(store.load())
+    np.testing.assert_allclose(cached[0], makeTransformer().transform(features, sequenceIDs), rtol=1e-6, atol=1e-6)
+    # the second load reads the stored features
+    assert os.path.isfile(os.path.join(cache.cacheDirectory(store.load()), 'segment-00000.npy'))
+    np.testing.assert_array_equal(cache.load(store.load())[0], cached[0])
@@ -0,0 +1,303 @@
+import hashlib
+import json
+import os
+from abc import abstractmethod
+from collections import OrderedDict
+from itertools import combinations
+import numpy as np
+from storage import _atomicSave
+
+
+HAND_LANDMARKS = 21
+WRIST = 0
+MIDDLE_MCP = 9
+FINGERTIPS = (4, 8, 12, 16, 20)
+# landmark chains of the fingers from the wrist to the tip
+FINGERS = ((0, 1, 2, 3, 4), (0, 5, 6, 7, 8), (0, 9, 10, 11, 12), (0, 13, 14, 15, 16), (0, 17, 18, 19, 20))
+COORDINATE_NAMES = ('x', 'y', 'z')
+
+
+class LandmarkTransform:
+    """
+    Base class of the batched landmark transforms
+
+    The transforms work on whole (samples, hands, 21, dimensions) arrays with a (samples, hands) presence mask,
+    the landmark transforms return new landmarks, the feature transforms return (samples, hands, values)
+    derived features and the temporal feature transforms also receive the landmarks of the previous frame
+    """
+    # 'landmarks' for the transforms replacing the landmarks, 'features' for the derived features
+    kind = 'features'
+    temporal = False
+
+    def __init__(self, **options):
+        self.options = options
+
+    def config(self):
+        """ Return the json serializable description of the transform used by the cache key """
+        return dict(self.options, transform=type(self).__name__)
+
+    @abstractmethod
+    def apply(self, landmarks, present, previous = None, previousPresent = None):
+        """
+        Parameters
+        ----------
+        landmarks : float32 array of shape (samples, hands, 21, dimensions)
+        present : bool array of shape (samples, hands), False for the empty hand slots
+        previous, previousPresent : landmarks and presence of the previous frame of the same sequence,
+            only given to the temporal transforms
+
+        Return
+        ----------
+        the new landmarks or the (samples, hands, values) features
+        """
+
+    @abstractmethod
+    def names(self, dimensions):
+        """ Return the names of the values computed for one hand, implemented by the feature transforms """
+
+
+class WristRelative(LandmarkTransform):
+    """ Translate every hand so its wrist is the origin """
+    kind = 'landmarks'
+
+    def apply(self, landmarks, present, previous = None, previousPresent = None):
+        return landmarks - landmarks[:, :, WRIST:WRIST + 1]
+
+
+class ScaleNormalize(LandmarkTransform):
+    """ Scale every hand so the distance between two reference landmarks (wrist and middle finger base) is 1 """
+    kind = 'landmarks'
+
+    def __init__(self, reference = (WRIST, MIDDLE_MCP)):
+        super().__init__(reference=list(reference))
+
+    def apply(self, landmarks, present, previous = None, previousPresent = None):
+        first, second = self.options['reference']
+        scale = np.linalg.norm(landmarks[:, :, second] - landmarks[:, :, first], axis=-1)
+        # the empty hand slots and degenerate hands are left unscaled
+        scale[scale == 0] = 1
+        return landmarks / scale[:, :, np.newaxis, np.newaxis]
+
+
+class FingertipDistances(LandmarkTransform):
+    """ Distances between every pair of fingertips """
+    def __init__(self, tips = FINGERTIPS):
+        super().__init__(tips=list(tips))
+        self.pairs = np.array(list(combinations(tips, 2)))
+
+    def apply(self, landmarks, present, previous = None, previousPresent = None):
+        return np.linalg.norm(landmarks[:, :, self.pairs[:, 0]] - landmarks[:, :, self.pairs[:, 1]], axis=-1)
+
+    def names(self, dimensions):
+        return [f"distance_{first}_{second}" for first, second in self.pairs]
+
+
+class JointAngles(LandmarkTransform):
+    """ Bending angle in radians at every finger joint, 0 for a straight joint """
+    def __init__(self, fingers = FINGERS):
+        super().__init__(fingers=[list(finger) for finger in fingers])
+        self.joints = np.array([(finger[i - 1], finger[i], finger[i + 1]) for finger in fingers
+                                for i in range(1, len(finger) - 1)])
+
+    def apply(self, landmarks, present, previous = None, previousPresent = None):
+        incoming = landmarks[:, :, self.joints[:, 1]] - landmarks[:, :, self.joints[:, 0]]
+        outgoing = landmarks[:, :, self.joints[:, 2]] - landmarks[:, :, self.joints[:, 1]]
+        norms = np.linalg.norm(incoming, axis=-1) * np.linalg.norm(outgoing, axis=-1)
+        cosines = np.einsum('shjd,shjd->shj', incoming, outgoing) / np.where(norms == 0, 1, norms)
+        angles = np.arccos(np.clip(cosines, -1, 1))
+        angles[~present] = 0
+        return angles
+
+    def names(self, dimensions):
+        return [f"angle_{joint}" for _, joint, _ in self.joints]
+
+
+class Velocities(LandmarkTransform):
+    """ Frame to frame displacement of every landmark, 0 on the first frame of a sequence or of a hand """
+    temporal = True
+
+    def apply(self, landmarks, present, previous = None, previousPresent = None):
+        velocities = (landmarks - previous).reshape(landmarks.shape[0], landmarks.shape[1], -1)
+        velocities[~(present & previousPresent)] = 0
+        return velocities
+
+    def names(self, dimensions):
+        return [f"velocity_{landmark}_{COORDINATE_NAMES[dimension]}"
+                for landmark in range(HAND_LANDMARKS) for dimension in range(dimensions)]
+
+
+class FeatureTransformer:
+    """
+    Class composing landmark transforms into a derived feature vector
+
+    The landmark transforms are applied in order, then the feature of every hand is made of its (transformed)
+    landmarks if keepLandmarks followed by the values of every feature transform. transform works on whole
+    batches (offline), transformOnline on one frame keeping the previous frame of every sequence (online)
+    """
+    def __init__(self, transforms, coordinateDimensions = 2, keepLandmarks = True, maxSequences = 16):
+        """
+        Parameters
+        ----------
+        transforms : list of LandmarkTransform
+        coordinateDimensions : int 2 for x, y landmarks or 3 with the depth
+        keepLandmarks : bool start the features of every hand with its transformed landmarks
+        maxSequences : int number of sequences whose previous frame is kept by the online mode
+        """
+        self.transforms = list(transforms)
+        self.landmarkTransforms = [transform for transform in self.transforms if transform.kind == 'landmarks']
+        self.featureTransforms = [transform for transform in self.transforms if transform.kind == 'features']
+        self.temporal = any(transform.temporal for transform in self.featureTransforms)
+        self.coordinateDimensions = coordinateDimensions
+        self.keepLandmarks = keepLandmarks
+        self.maxSequences = maxSequences
+        # raw feature size of the latest transformed samples
+        self.featureSize = 0
+        # sequence ID -> (landmarks, presence) of the latest frame, for the online temporal transforms
+        self.state = OrderedDict()
+
+    def config(self):
+        """ Return the json serializable description of the transformer """
+        return {'coordinateDimensions': self.coordinateDimensions, 'keepLandmarks': self.keepLandmarks,
+                'transforms': [transform.config() for transform in self.transforms]}
+
+    def configHash(self):
+        """ Return a short hash of the configuration, the key of the cached outputs """
+        return hashlib.sha1(json.dumps(self.config(), sort_keys=True).encode()).hexdigest()[:16]
+
+    def handsOf(self, featureSize):
+        """ Return the number of hands of a raw feature vector """
+        hands, remainder = divmod(featureSize, HAND_LANDMARKS * self.coordinateDimensions)
+        if remainder or not hands:
+            raise ValueError(f"{featureSize} features are not whole hands of {HAND_LANDMARKS} landmarks "
+                             f"with {self.coordinateDimensions} coordinates")
+        return hands
+
+    def featureNames(self, featureSize = None):
+        """ Return the names of the derived features of a raw feature vector, of the latest samples by default """
+        featureSize = featureSize or self.featureSize
+        perHand = []
+        if self.keepLandmarks:
+            perHand += [f"{landmark}_{COORDINATE_NAMES[dimension]}"
+                        for landmark in range(HAND_LANDMARKS) for dimension in range(self.coordinateDimensions)]
+        for transform in self.featureTransforms:
+            perHand += transform.names(self.coordinateDimensions)
+        return [f"hand{hand}_{name}" for hand in range(self.handsOf(featureSize)) for name in perHand]
+
+    def getOutputSize(self, featureSize):
+        return len(self.featureNames(featureSize))
+
+    def toLandmarks(self, features):
+        """ Return the raw features of shape (samples, featureSize) as float32 (samples, hands, 21, dimensions) """
+        features = np.asarray(features)
+        features = features.reshape(features.shape[0], -1)
+        hands = self.handsOf(features.shape[1])
+        self.featureSize = features.shape[1]
+        return features.astype(np.float32).reshape(features.shape[0], hands, HAND_LANDMARKS, self.coordinateDimensions)
+
+    def _apply(self, landmarks, present, previous, previousPresent):
+        outputs = [landmarks.reshape(landmarks.shape[0], landmarks.shape[1], -1)] if self.keepLandmarks else []
+        for transform in self.featureTransforms:
+            outputs.append(transform.apply(landmarks, present, previous, previousPresent))
+        # the values of every hand stay together
+        return np.concatenate(outputs, axis=2).reshape(landmarks.shape[0], -1).astype(np.float32, copy=False)
+
+    def _prepare(self, features):
+        landmarks = self.toLandmarks(features)
+        # the empty hand slots of the fixed shape layout are all zeros
+        present = np.any(landmarks != 0, axis=(2, 3))
+        for transform in self.landmarkTransforms:
+            landmarks = transform.apply(landmarks, present)
+        return landmarks, present
+
+    def transform(self, features, sequenceIDs = None):
+        """
+        Compute the derived features of a batch of samples
+
+        Parameters
+        ----------
+        features : array of shape (samples, featureSize) of raw landmarks in capture order
+        sequenceIDs : array of the sequence IDs of the samples, the temporal features restart with every
+            sequence, the whole batch is one sequence if None
+
+        Return
+        ----------
+        float32 array of shape (samples, output size)
+        """
+        landmarks, present = self._prepare(features)
+        previous = previousPresent = None
+        if self.temporal:
+            previous = np.empty_like(landmarks)
+            previous[1:] = landmarks[:-1]
+            previous[:1] = landmarks[:1]
+            previousPresent = np.empty_like(present)
+            previousPresent[1:] = present[:-1]
+            previousPresent[:1] = False
+            if sequenceIDs is not None:
+                sequenceIDs = np.asarray(sequenceIDs)
+                previousPresent[1:][sequenceIDs[1:] != sequenceIDs[:-1]] = False
+        return self._apply(landmarks, present, previous, previousPresent)
+
+    def transformOnline(self, features, sequenceID = 0):
+        """
+        Compute the derived features of one live frame, the previous frame of its sequence is kept for
+        the temporal features
+
+        Return
+        ----------
+        float32 array of the output size
+        """
+        landmarks, present = self._prepare(np.asarray(features).reshape(1, -1))
+        previous = previousPresent = None
+        if self.temporal:
+            if sequenceID in self.state:
+                previous, previousPresent = self.state.pop(sequenceID)
+            else:
+                previous, previousPresent = landmarks, np.zeros_like(present)
+            # the sequences are kept in the order of their latest frame, the oldest one is forgotten first
+            self.state[sequenceID] = (landmarks, present)
+            if len(self.state) > self.maxSequences:
+                self.state.popitem(last=False)
+        return self._apply(landmarks, present, previous, previousPresent)[0]
+
+    def reset(self):
+        """ Forget the previous frames of the online mode """
+        self.state.clear()
+
+
+class TransformCache:
+    """
+    Class caching the derived features of the segments of a SegmentStore
+
+    The segments are append only so the derived features of a segment are computed once and stored as
+    <store>/derived/<config hash>/<segment>.npy, another transform configuration gets its own directory
+    """
+    def __init__(self, transformer, path = None):
+        """
+        Parameters
+        ----------
+        transformer : FeatureTransformer
+        path : str directory of the cache, <store>/derived/<config hash> by default
+        """
+        self.transformer = transformer
+        self.path = path
+
+    def cacheDirectory(self, dataset):
+        return self.path or os.path.join(dataset.store.path, 'derived', self.transformer.configHash())
+
+    def getSegment(self, dataset, index):
+        """ Return the memory mapped derived features of a segment, computed and stored on first use """
+        directory = self.cacheDirectory(dataset)
+        path = os.path.join(directory, dataset.manifest['segments'][index]['name'] + '.npy')
+        if not os.path.isfile(path):
+            os.makedirs(directory, exist_ok=True)
+            configPath = os.path.join(directory, 'config.json')
+            if not os.path.isfile(configPath):
+                with open(configPath, 'w') as file:
+                    json.dump(self.transformer.config(), file, indent=1)
+            features, _, sequenceIDs = dataset.getSegment(index)
+            _atomicSave(path, self.transformer.transform(features, sequenceIDs))
+        return np.load(path, mmap_mode='r')
+
+    def load(self, dataset):
+        """ Return the derived features of every segment of a LazyDataset """
+        return [self.getSegment(dataset, index) for index in range(len(dataset.segmentRows))]
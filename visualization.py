@@ -0,0 +1,181 @@
+import numpy as np
+from matplotlib import pyplot as plt
+from matplotlib.collections import LineCollection
+
+
+def decimationIndices(rows, maxPoints = None):
+    """
+    Return the indices of the rows kept to draw at most maxPoints rows, every step-th row is kept
+    so the kept rows stay in capture order
+
+    Parameters
+    ----------
+    rows : int number of rows
+    maxPoints : int maximum number of kept rows, every row is kept if None
+    """
+    if maxPoints is None or rows <= maxPoints:
+        return np.arange(rows)
+    step = -(-rows // maxPoints)
+    return np.arange(0, rows, step)
+
+
+def splitCoordinates(features, columns = None):
+    """
+    Split the interleaved x, y feature columns of the samples
+
+    Parameters
+    ----------
+    features : array of shape (rows, features) of x0, y0, x1, y1, ... coordinates
+    columns : list of the feature columns of interest (x, y pairs), every column if None
+
+    Return
+    ----------
+    (x, y) arrays of shape (rows, points)
+    """
+    features = np.asarray(features)
+    if columns is not None:
+        features = features[:, columns]
+    return features[:, 0::2], features[:, 1::2]
+
+
+def readRows(dataset, rows, columns = None):
+    """
+    Read the given rows of a LazyDataset, only the memory mapped pages holding the rows are read
+
+    Parameters
+    ----------
+    dataset : LazyDataset
+    rows : sorted array of global row indices
+    columns : list of feature columns to read, every column if None
+
+    Return
+    ----------
+    (features, label IDs, sequence IDs) of the rows
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    segments = np.searchsorted(dataset.offsets, rows, side='right') - 1
+    parts = []
+    for index in np.unique(segments):
+        local = rows[segments == index] - dataset.offsets[index]
+        features, labels, sequenceIDs = dataset.getSegment(int(index))
+        features = features[local] if columns is None else features[local][:, columns]
+        parts.append((features, labels[local], sequenceIDs[local]))
+    if not parts:
+        width = len(dataset.featureColumns) if columns is None else len(columns)
+        return np.empty((0, width), dtype=np.float32), np.empty(0, dtype=np.int16), np.empty(0, dtype=np.int32)
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+def plotPoints(features, labels = None, sequenceIDs = None, columns = None, colorBy = 'order',
+               labelNames = None, maxPoints = 200000, ax = None, pointSize = 4):
+    """
+    Draw the landmarks of the samples as points, with one scatter call per label or one scatter call in total
+
+    Parameters
+    ----------
+    features : array of shape (rows, features) of x, y coordinates
+    labels : array of the label IDs of the rows, needed to color by label
+    sequenceIDs : array of the sequence IDs of the rows, needed to color by sequence
+    columns : list of the feature columns of interest (x, y pairs), every column if None
+    colorBy : str 'order' (grey fading with the capture order), 'label' or 'sequence'
+    labelNames : list of the label names indexed by the label IDs, used in the legend
+    maxPoints : int maximum number of drawn rows, the rows are decimated above it
+    ax : matplotlib Axes, a new figure if None
+    pointSize : float size of the points
+
+    Return
+    ----------
+    the matplotlib Axes
+    """
+    if ax is None:
+        _, ax = plt.subplots()
+    keep = decimationIndices(len(features), maxPoints)
+    x, y = splitCoordinates(np.asarray(features)[keep], columns)
+    points = x.shape[1]
+    if colorBy == 'label':
+        if labels is None:
+            raise ValueError("The labels are needed to color by label")
+        labels = np.asarray(labels)[keep]
+        for labelID in np.unique(labels):
+            mask = labels == labelID
+            name = labelNames[labelID] if labelNames is not None else labelID
+            ax.scatter(x[mask].ravel(), y[mask].ravel(), s=pointSize, label=str(name))
+        ax.legend()
+    elif colorBy == 'sequence':
+        if sequenceIDs is None:
+            raise ValueError("The sequence IDs are needed to color by sequence")
+        colors = np.repeat(np.asarray(sequenceIDs)[keep] % 20, points)
+        ax.scatter(x.ravel(), y.ravel(), s=pointSize, c=colors, cmap='tab20', vmin=0, vmax=19)
+    elif colorBy == 'order':
+        # the grey fades from white to mid grey along the capture order
+        order = keep / max(len(features), 1)
+        colors = np.repeat(np.power(2.0, -order), points)
+        ax.scatter(x.ravel(), y.ravel(), s=pointSize, c=colors, cmap='gray', vmin=0, vmax=1)
+    else:
+        raise ValueError("The points have to be colored by order, label or sequence")
+    return ax
+
+
+def plotTrajectories(features, sequenceIDs, columns = None, labels = None, maxPoints = 200000, ax = None,
+                     lineWidth = 1):
+    """
+    Draw the trajectory of every landmark of every sequence with a single LineCollection
+
+    Parameters
+    ----------
+    features : array of shape (rows, features) of x, y coordinates
+    sequenceIDs : array of the sequence IDs of the rows
+    columns : list of the feature columns of interest (x, y pairs), every column if None
+    labels : array of the label IDs of the rows, the trajectories are colored by label if given
+    maxPoints : int maximum number of drawn rows, the rows are decimated above it
+    ax : matplotlib Axes, a new figure if None
+
+    Return
+    ----------
+    the matplotlib Axes
+    """
+    if ax is None:
+        _, ax = plt.subplots()
+    keep = decimationIndices(len(features), maxPoints)
+    x, y = splitCoordinates(np.asarray(features)[keep], columns)
+    sequenceIDs = np.asarray(sequenceIDs)[keep]
+    # a trajectory breaks wherever the sequence changes
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(sequenceIDs) != 0) + 1])
+    stops = np.concatenate([starts[1:], [len(sequenceIDs)]])
+    coordinates = np.stack([x, y], axis=-1)
+    lines = [coordinates[start:stop, point] for start, stop in zip(starts, stops) for point in range(x.shape[1])]
+    collection = LineCollection(lines, linewidths=lineWidth)
+    if labels is not None:
+        lineLabels = np.repeat(np.asarray(labels)[keep][starts], x.shape[1])
+        collection.set_array(lineLabels.astype(np.float64))
+        collection.set_cmap('tab10')
+    ax.add_collection(collection)
+    ax.autoscale_view()
+    return ax
+
+
+def plotDataset(dataset, columns = None, colorBy = 'label', maxPoints = 200000, trajectories = False, ax = None):
+    """
+    Draw a LazyDataset straight from its memory mapped segments, only the decimated rows are read
+
+    Parameters
+    ----------
+    dataset : LazyDataset (see SegmentStore.load)
+    columns : list of the feature columns of interest (x, y pairs), every column if None
+    colorBy : str 'order', 'label' or 'sequence' (see plotPoints)
+    maxPoints : int maximum number of drawn rows
+    trajectories : bool draw the trajectories of the sequences instead of the points
+    ax : matplotlib Axes, a new figure if None
+
+    Return
+    ----------
+    the matplotlib Axes
+    """
+    rows = decimationIndices(len(dataset), maxPoints)
+    features, labels, sequenceIDs = readRows(dataset, rows, columns)
+    if trajectories:
+        ax = plotTrajectories(features, sequenceIDs, labels=labels, maxPoints=None, ax=ax)
+    else:
+        ax = plotPoints(features, labels, sequenceIDs, colorBy=colorBy, labelNames=dataset.labelNames,
+                        maxPoints=None, ax=ax)
+    return ax